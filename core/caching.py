@@ -0,0 +1,133 @@
+import hashlib
+import logging
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import caches
+from django.utils.cache import patch_vary_headers
+from rest_framework import status
+from rest_framework.renderers import JSONRenderer
+from rest_framework.response import Response
+
+logger = logging.getLogger(__name__)
+
+
+# -----------------------------
+# 🗄️ Response cache
+# -----------------------------
+# Anonymous GET responses are cached under keys that embed a version number per
+# namespace ("media", "places", ...). Saving or deleting a model bumps its
+# namespace version, which orphans every cached page that depended on it.
+# Per-view hit/miss counters are reported by `manage.py response_cache_stats`.
+
+CACHED_VIEWS = set()  # __qualname__ of every view method using the response cache
+
+def get_cache():
+    return caches[settings.RESPONSE_CACHE_ALIAS]
+
+
+def _version_key(namespace):
+    return f"respcache:version:{namespace}"
+
+
+def get_cache_version(namespace):
+    """Current version number of a namespace"""
+    cache = get_cache()
+    version = cache.get(_version_key(namespace))
+    if version is None:
+        cache.add(_version_key(namespace), 1, timeout=None)
+        version = cache.get(_version_key(namespace), 1)
+    return version
+
+
+def bump_cache_version(*namespaces):
+    """Invalidate every cached response that depends on the given namespaces"""
+    cache = get_cache()
+    for namespace in namespaces:
+        try:
+            cache.incr(_version_key(namespace))
+        except ValueError:
+            cache.set(_version_key(namespace), 2, timeout=None)
+
+
+def _record(name, outcome):
+    cache = get_cache()
+    key = f"respcache:stats:{name}:{outcome}"
+    if not cache.add(key, 1, timeout=None):
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, 1, timeout=None)
+
+
+def get_response_cache_stats(name):
+    """Hit/miss/not-modified counters for a cached view"""
+    cache = get_cache()
+    outcomes = ('hit', 'miss', 'not_modified')
+    values = cache.get_many([f"respcache:stats:{name}:{outcome}" for outcome in outcomes])
+    return {outcome: values.get(f"respcache:stats:{name}:{outcome}", 0) for outcome in outcomes}
+
+
+def reset_response_cache_stats(name):
+    cache = get_cache()
+    cache.delete_many([f"respcache:stats:{name}:{outcome}" for outcome in ('hit', 'miss', 'not_modified')])
+
+
+def _etag_matches(request, etag):
+    header = request.headers.get('If-None-Match')
+    if not header:
+        return False
+    candidates = [tag.strip() for tag in header.split(',')]
+    return '*' in candidates or etag in candidates or f"W/{etag}" in candidates
+
+
+def anonymous_response_cache(*namespaces, timeout=None):
+    """
+    Cache a DRF view method's 200 responses for anonymous users.
+
+    Keys are built from the namespace versions, the scheme, host and full query
+    string (filters, cursor, page size). Responses carry an ETag, and a
+    matching If-None-Match gets a 304 without rebuilding the payload.
+    """
+    def decorator(view_method):
+        name = view_method.__qualname__
+        CACHED_VIEWS.add(name)
+
+        @wraps(view_method)
+        def wrapper(self, request, *args, **kwargs):
+            if request.user and request.user.is_authenticated:
+                return view_method(self, request, *args, **kwargs)
+
+            cache = get_cache()
+            versions = '.'.join(str(get_cache_version(namespace)) for namespace in namespaces)
+            raw_key = f"{request.scheme}://{request.get_host()}{request.get_full_path()}"
+            key = f"respcache:{name}:{versions}:{hashlib.md5(raw_key.encode()).hexdigest()}"
+
+            cached = cache.get(key)
+            if cached is not None:
+                data, etag = cached
+                if _etag_matches(request, etag):
+                    _record(name, 'not_modified')
+                    response = Response(status=status.HTTP_304_NOT_MODIFIED)
+                else:
+                    _record(name, 'hit')
+                    response = Response(data)
+                response['X-Cache'] = 'HIT'
+            else:
+                _record(name, 'miss')
+                response = view_method(self, request, *args, **kwargs)
+                if response.status_code != status.HTTP_200_OK:
+                    return response
+                etag = f'"{hashlib.md5(JSONRenderer().render(response.data)).hexdigest()}"'
+                cache.set(key, (response.data, etag), timeout or settings.RESPONSE_CACHE_TIMEOUT)
+                if _etag_matches(request, etag):
+                    response = Response(status=status.HTTP_304_NOT_MODIFIED)
+                response['X-Cache'] = 'MISS'
+
+            logger.debug("%s cache %s for %s", name, response['X-Cache'], raw_key)
+            response['ETag'] = etag
+            patch_vary_headers(response, ['Authorization'])
+            return response
+
+        return wrapper
+    return decorator
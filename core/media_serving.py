@@ -0,0 +1,159 @@
+import mimetypes
+import os
+import re
+from urllib.parse import quote
+
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import FileResponse, Http404, HttpResponse
+from django.utils._os import safe_join
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, parse_http_date_safe
+from django.utils.module_loading import import_string
+from django.views.decorators.http import require_safe
+
+RANGE_HEADER = re.compile(r'^bytes=(\d*)-(\d*)$')
+IMMUTABLE_PREFIXES = ('blobs/',)
+
+
+# -----------------------------
+# 📼 Media serving
+# -----------------------------
+# Single byte ranges let video players seek without re-downloading, and
+# FileResponse hands whole files to the WSGI server's file_wrapper, which
+# sends them with sendfile(2) where available. With MEDIA_SERVE_MODE set to
+# 'x-accel' (nginx) or 'x-sendfile' (Apache/lighttpd) Django only resolves the
+# path and the front proxy streams the bytes. Every request first goes
+# through MEDIA_ACCESS_POLICY, so private media is only sent to its owner.
+
+class FileRange:
+    """
+    File-like view of length bytes starting at start.
+
+    There is deliberately no fileno(): sendfile-based file wrappers would
+    stream the descriptor to EOF instead of stopping at the range end.
+    """
+
+    def __init__(self, file, start, length):
+        self.file = file
+        self.name = file.name
+        self.remaining = length
+        file.seek(start)
+
+    def read(self, size=-1):
+        if self.remaining <= 0:
+            return b''
+        if size is None or size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self.file.read(size)
+        self.remaining -= len(data)
+        return data
+
+    def close(self):
+        self.file.close()
+
+
+def parse_range(header, size):
+    """(start, end) for a single 'bytes=' range, or None when the header should be ignored"""
+    match = RANGE_HEADER.match(header.strip())
+    if not match or match.groups() == ('', ''):
+        # Malformed and multi-range requests get the whole file
+        return None
+    first, last = match.groups()
+    if not first:
+        # Suffix range: the last N bytes ("bytes=-0" is unsatisfiable)
+        suffix = int(last)
+        start = max(size - suffix, 0) if suffix else size
+        return start, size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if last and int(last) < start:
+        return None
+    return start, end
+
+
+def range_still_valid(request, etag, last_modified):
+    """If-Range: only honour Range when the client's copy is the current one"""
+    if_range = request.headers.get('If-Range')
+    if not if_range:
+        return True
+    if if_range.startswith(('"', 'W/')):
+        return if_range == etag
+    return parse_http_date_safe(if_range) == last_modified
+
+
+def cache_control(path, visibility):
+    """visibility is 'public', or 'private' for files only their owner may fetch"""
+    if path.startswith(IMMUTABLE_PREFIXES):
+        # Content-addressed: the bytes at this path never change
+        return f'{visibility}, max-age=31536000, immutable'
+    return f'{visibility}, max-age={settings.MEDIA_CACHE_MAX_AGE}'
+
+
+def get_access_policy():
+    return import_string(settings.MEDIA_ACCESS_POLICY)
+
+
+@require_safe
+def serve_media(request, path):
+    """Serve a file from MEDIA_ROOT with conditional and Range support"""
+    try:
+        full_path = safe_join(settings.MEDIA_ROOT, path)
+    except SuspiciousFileOperation:
+        raise Http404("Media not found")
+    if not os.path.isfile(full_path):
+        raise Http404("Media not found")
+    # Unauthorised requests get the same 404 as missing files
+    visibility = get_access_policy()(request, path)
+    if visibility is None:
+        raise Http404("Media not found")
+
+    content_type, encoding = mimetypes.guess_type(full_path)
+    content_type = content_type or 'application/octet-stream'
+    mode = settings.MEDIA_SERVE_MODE
+
+    if mode in ('x-accel', 'x-sendfile'):
+        response = HttpResponse(content_type=content_type)
+        if mode == 'x-accel':
+            response['X-Accel-Redirect'] = settings.MEDIA_ACCEL_PREFIX.rstrip('/') + '/' + quote(path)
+        else:
+            response['X-Sendfile'] = full_path
+        response['Cache-Control'] = cache_control(path, visibility)
+        return response
+
+    stat = os.stat(full_path)
+    size = stat.st_size
+    last_modified = int(stat.st_mtime)
+    etag = f'"{stat.st_mtime_ns:x}-{size:x}"'
+
+    not_modified = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if not_modified is not None:
+        not_modified['Cache-Control'] = cache_control(path, visibility)
+        return not_modified
+
+    byte_range = None
+    if 'Range' in request.headers and range_still_valid(request, etag, last_modified):
+        byte_range = parse_range(request.headers['Range'], size)
+
+    if byte_range is not None and byte_range[0] >= size:
+        response = HttpResponse(status=416)
+        response['Content-Range'] = f'bytes */{size}'
+        return response
+
+    file = open(full_path, 'rb')
+    if byte_range is None:
+        response = FileResponse(file, content_type=content_type)
+        response['Content-Length'] = size
+    else:
+        start, end = byte_range
+        response = FileResponse(FileRange(file, start, end - start + 1), content_type=content_type, status=206)
+        response['Content-Length'] = end - start + 1
+        response['Content-Range'] = f'bytes {start}-{end}/{size}'
+
+    if encoding:
+        response['Content-Encoding'] = encoding
+    response['Accept-Ranges'] = 'bytes'
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(stat.st_mtime)
+    response['Cache-Control'] = cache_control(path, visibility)
+    return response
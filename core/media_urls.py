@@ -0,0 +1,46 @@
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.utils.encoding import filepath_to_uri
+
+
+# -----------------------------
+# 🔗 Media URLs
+# -----------------------------
+
+class MediaURLResolver:
+    """
+    Turns stored files into absolute URLs.
+
+    The scheme/host prefix is worked out once per request, so each file costs
+    a string concatenation. When MEDIA_CDN_URL is set, files are addressed on
+    the CDN instead of the API host.
+    """
+
+    def __init__(self, request=None):
+        cdn_url = getattr(settings, 'MEDIA_CDN_URL', '')
+        self.cdn_base = f"{cdn_url.rstrip('/')}/" if cdn_url else None
+        self.origin = request.build_absolute_uri('/')[:-1] if request is not None else ''
+
+    def url(self, file):
+        """Absolute URL for a FieldFile, or None when the field is empty"""
+        if not file:
+            return None
+        return self.url_for_name(file.name, file.storage)
+
+    def url_for_name(self, name, storage=default_storage):
+        """Absolute URL for a stored file name (e.g. one read with values())"""
+        if self.cdn_base:
+            return self.cdn_base + filepath_to_uri(name)
+        url = storage.url(name)
+        if url.startswith('/'):
+            return self.origin + url
+        return url
+
+
+def get_media_url_resolver(context):
+    """Resolver shared by every serializer rendering the same request"""
+    resolver = context.get('media_url_resolver')
+    if resolver is None:
+        resolver = MediaURLResolver(context.get('request'))
+        context['media_url_resolver'] = resolver
+    return resolver
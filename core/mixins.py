@@ -1,4 +1,6 @@
 from django.db import models
+from django.db.models import F
+from django.db.models.functions import Greatest
 from django.utils import timezone
 from django.contrib.contenttypes.models import ContentType
 from django.contrib.contenttypes.fields import GenericForeignKey
@@ -31,6 +33,30 @@ class SoftDeleteMixin(models.Model):
     class Meta:
         abstract = True
 
+class EngagementCounterMixin(models.Model):
+    """Stored like/comment/share totals, kept in step with social.Like/Comment/Share"""
+    like_count = models.PositiveIntegerField(default=0)
+    comment_count = models.PositiveIntegerField(default=0)
+    share_count = models.PositiveIntegerField(default=0)
+
+    @classmethod
+    def adjust_counter(cls, pk, field, delta):
+        """Shift a stored counter in the database without reading it, never below zero"""
+        if delta >= 0:
+            value = F(field) + delta
+        else:
+            value = Greatest(F(field) + delta, 0)
+        cls.objects.filter(pk=pk).update(**{field: value})
+        cls.counter_changed(pk)
+
+    @classmethod
+    def counter_changed(cls, pk):
+        """Hook for models that derive cached values from their counters"""
+        pass
+
+    class Meta:
+        abstract = True
+
 class GenericRelationBaseMixin(models.Model):
     content_type = models.ForeignKey(ContentType, on_delete=models.CASCADE)
     object_id = models.PositiveIntegerField()
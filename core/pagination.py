@@ -0,0 +1,155 @@
+import base64
+import binascii
+import json
+
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+# -----------------------------
+# 📄 Pagination
+# -----------------------------
+
+class KeysetPagination(BasePagination):
+    """
+    Cursor pagination keyed on (created_at, id), newest first.
+
+    Every page is a range scan starting from the last seen key, so deep pages
+    cost the same as the first one. Cursors are opaque to clients.
+    """
+    page_size = 20
+    max_page_size = 100
+    page_size_query_param = 'page_size'
+    cursor_query_param = 'cursor'
+    ordering_field = 'created_at'
+    tiebreak_field = 'id'
+    invalid_cursor_message = 'Invalid cursor'
+
+    # Absolute URL that next/previous links point at; defaults to the current request
+    base_url = None
+
+    def paginate_queryset(self, queryset, request, view=None):
+        return self.paginate(queryset, request, self.decode_cursor(request))
+
+    def paginate(self, queryset, request, cursor=None):
+        """Fetch the page after (or, for reverse cursors, before) the cursor key"""
+        self.request = request
+        self.page_size = self.get_page_size(request)
+
+        if cursor is None:
+            rows = list(self._ordered(queryset, reverse=False)[:self.page_size + 1])
+            self.has_next = len(rows) > self.page_size
+            self.has_previous = False
+            rows = rows[:self.page_size]
+        elif cursor['reverse']:
+            # Walking backwards: read ascending from the key, then flip
+            queryset = queryset.filter(self._after_key(cursor, reverse=True))
+            rows = list(self._ordered(queryset, reverse=True)[:self.page_size + 1])
+            self.has_previous = len(rows) > self.page_size
+            self.has_next = True
+            rows = rows[:self.page_size]
+            rows.reverse()
+        else:
+            queryset = queryset.filter(self._after_key(cursor, reverse=False))
+            rows = list(self._ordered(queryset, reverse=False)[:self.page_size + 1])
+            self.has_next = len(rows) > self.page_size
+            self.has_previous = True
+            rows = rows[:self.page_size]
+
+        self.page = rows
+        return rows
+
+    def get_page_size(self, request):
+        """Get page size from query params, clamped to max_page_size"""
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return max(1, min(size, self.max_page_size))
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'previous': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self._link(self.page[-1], reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous or not self.page:
+            return None
+        return self._link(self.page[0], reverse=True)
+
+    def get_next_cursor(self):
+        """Get the raw next cursor token (for embedding pages in other payloads)"""
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(self.page[-1], reverse=False)
+
+    # Cursor encoding
+
+    def encode_cursor(self, row, reverse):
+        payload = {
+            't': getattr(row, self.ordering_field).isoformat(),
+            'i': getattr(row, self.tiebreak_field),
+        }
+        if reverse:
+            payload['r'] = 1
+        raw = json.dumps(payload, separators=(',', ':')).encode('ascii')
+        return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+    def decode_cursor(self, request):
+        token = request.query_params.get(self.cursor_query_param)
+        if not token:
+            return None
+        try:
+            padded = token + '=' * (-len(token) % 4)
+            payload = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+            timestamp = parse_datetime(payload['t'])
+            key = int(payload['i'])
+        except (binascii.Error, UnicodeError, ValueError, TypeError, KeyError):
+            raise NotFound(self.invalid_cursor_message)
+        if timestamp is None:
+            raise NotFound(self.invalid_cursor_message)
+        return {'timestamp': timestamp, 'key': key, 'reverse': bool(payload.get('r'))}
+
+    # Query helpers
+
+    def _ordered(self, queryset, reverse):
+        if reverse:
+            return queryset.order_by(self.ordering_field, self.tiebreak_field)
+        return queryset.order_by(f'-{self.ordering_field}', f'-{self.tiebreak_field}')
+
+    def _after_key(self, cursor, reverse):
+        """Rows strictly past the cursor key in the walking direction"""
+        op = 'gt' if reverse else 'lt'
+        return (
+            Q(**{f'{self.ordering_field}__{op}': cursor['timestamp']}) |
+            Q(**{
+                self.ordering_field: cursor['timestamp'],
+                f'{self.tiebreak_field}__{op}': cursor['key'],
+            })
+        )
+
+    def _link(self, row, reverse):
+        url = self.base_url or self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.encode_cursor(row, reverse))
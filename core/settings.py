@@ -16,6 +16,15 @@ from pathlib import Path
 BASE_DIR = Path(__file__).resolve().parent.parent
 MEDIA_URL = 'media/'
 MEDIA_ROOT = BASE_DIR / 'media'
+MEDIA_CDN_URL = ''  # e.g. 'https://cdn.example.com/'; when set, media URLs point here instead of the API host
+# How /media/ responses are sent: 'django' streams with Range support (sendfile via the WSGI
+# file_wrapper), 'x-accel' hands off to nginx through an internal location at MEDIA_ACCEL_PREFIX,
+# 'x-sendfile' hands off to Apache/lighttpd with the absolute file path.
+MEDIA_SERVE_MODE = 'django'
+MEDIA_ACCEL_PREFIX = '/protected-media/'
+MEDIA_CACHE_MAX_AGE = 60 * 60  # Seconds; content-addressed blobs are cached for a year
+# Callable (request, path) -> 'public', 'private' or None (404) deciding who may fetch a media file
+MEDIA_ACCESS_POLICY = 'feed.media_access.media_visibility'
 
 
 # Quick-start development settings - unsuitable for production
@@ -135,6 +144,60 @@ STATIC_URL = 'static/'
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+# Swap in Redis/Memcached (or FileBasedCache) to share entries across processes.
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'spots-default',
+    }
+}
+
+RESPONSE_CACHE_ALIAS = 'default'
+RESPONSE_CACHE_TIMEOUT = 60  # Seconds; also bounds how stale engagement counts in cached feeds can be
+PLACE_CLUSTER_CACHE_TIMEOUT = 300  # Seconds; Place saves invalidate sooner, cluster thumbnails may lag this long
+
+# Media processing jobs (thumbnails, renditions)
+# 'thread' runs jobs on a small pool inside the web process, 'eager' runs them inline,
+# 'worker' leaves them to `manage.py process_media_jobs`.
+MEDIA_JOBS_MODE = 'thread'
+MEDIA_JOB_WORKERS = 2
+MEDIA_JOB_MAX_ATTEMPTS = 5
+MEDIA_JOB_RETRY_DELAY = 30  # Seconds before the first retry, doubled on each further attempt
+MEDIA_JOB_STALE_AFTER = 15 * 60  # Seconds a RUNNING job may go without updates before it is requeued
+THUMBNAIL_SIZE = (480, 480)
+MEDIA_RENDITION_WIDTHS = (320, 640, 1280)  # Photo widths stored for srcset; never upscaled
+MEDIA_RENDITION_FORMATS = ('webp', 'jpeg')
+
+# Chunked, resumable uploads
+# Part files are kept outside MEDIA_ROOT so half-uploaded files are never served.
+MEDIA_UPLOAD_MAX_SIZE = 100 * 1024 * 1024  # 100MB
+UPLOAD_SESSION_DIR = BASE_DIR / 'upload_sessions'
+UPLOAD_CHUNK_MAX_SIZE = 8 * 1024 * 1024  # 8MB per PUT
+UPLOAD_SESSION_TTL = 24 * 60 * 60  # Seconds an unfinished session is kept
+
+# Search
+# FTS5 index on SQLite; use 'feed.search.LikeBackend' on databases without FTS5.
+SEARCH_BACKEND = 'feed.search.SQLiteFTSBackend'
+# Seconds before a process rebuilds its in-memory place autocomplete index,
+# picking up changes made by other processes.
+AUTOCOMPLETE_REBUILD_INTERVAL = 600
+# 'thread' builds the index on a background thread, 'eager' inline (tests and scripts)
+AUTOCOMPLETE_REBUILD_MODE = 'thread'
+
+# Home timeline fan-out
+TIMELINE_FANOUT_BATCH_SIZE = 500  # Timeline rows written per bulk insert
+TIMELINE_PULL_FOLLOWER_THRESHOLD = 5000  # Accounts this popular are pulled at read time instead of fanned out
+TIMELINE_BACKFILL_LIMIT = 50  # Recent media copied into a timeline on a new follow
+
+# Activity notifications
+# Likes, comments and shares on one object are rolled into a single unread
+# notification while new ones keep arriving within the window; 0 disables it.
+ACTIVITY_AGGREGATION_WINDOW = 24 * 60 * 60  # Seconds
+ACTIVITY_RECENT_ACTORS = 3  # Actor ids kept on a rolled-up notification
+
 # Email Configuration
 EMAIL_BACKEND = 'django.core.mail.backends.smtp.EmailBackend'
 EMAIL_HOST = 'smtp.gmail.com'  # Change this to your email provider
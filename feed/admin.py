@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import UserProfile, City, Category, Place, Media
+from .models import UserProfile, City, Category, Place, Media, MediaBlob, MediaJob, MediaRendition
 
 # 🧍 User Profile
 @admin.register(UserProfile)
@@ -7,6 +7,7 @@ class UserProfileAdmin(admin.ModelAdmin):
     list_display = ("user", "city", "age_group")
     search_fields = ("user__username", "city__name")
     list_filter = ("age_group", "city")
+    readonly_fields = ("like_count", "comment_count", "share_count")
 # 🏙️ City
 @admin.register(City)
 class CityAdmin(admin.ModelAdmin):
@@ -25,23 +26,47 @@ class PlaceAdmin(admin.ModelAdmin):
     list_display = ("name", "category", "city", "created_by")
     search_fields = ("name", "description")
     list_filter = ("category", "city")
+    readonly_fields = ("like_count", "comment_count", "share_count")
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).with_engagement()
 
     def likes_count(self, obj):
-        return obj.likes.count()
+        return obj.live_like_count
     likes_count.short_description = "Likes"
 
     def comments_count(self, obj):
-        return obj.comments.count()
+        return obj.live_comment_count
     comments_count.short_description = "Comments"
 
     def shares_count(self, obj):
-        return obj.shares.count()
+        return obj.live_share_count
     shares_count.short_description = "Shares"
 
 # 📸 Media
+class MediaRenditionInline(admin.TabularInline):
+    model = MediaRendition
+    extra = 0
+    readonly_fields = ("width", "height", "format", "file", "file_size")
+
 @admin.register(Media)
 class MediaAdmin(admin.ModelAdmin):
-    list_display = ("title", "media_type", "uploaded_by", "place", "is_public", "created_at")
+    list_display = ("title", "media_type", "uploaded_by", "place", "is_public", "processing_status", "created_at")
     list_filter = ("media_type", "is_public", "created_at", "uploaded_by")
     search_fields = ("title", "uploaded_by__username", "description")
-    readonly_fields = ("file_size_mb",)
+    readonly_fields = ("file_size_mb", "like_count", "comment_count", "share_count")
+    inlines = [MediaRenditionInline]
+
+# 🧱 Media blobs
+@admin.register(MediaBlob)
+class MediaBlobAdmin(admin.ModelAdmin):
+    list_display = ("sha256", "size", "ref_count", "created_at")
+    search_fields = ("sha256",)
+    readonly_fields = ("sha256", "file", "size", "ref_count")
+
+# ⚙️ Media jobs
+@admin.register(MediaJob)
+class MediaJobAdmin(admin.ModelAdmin):
+    list_display = ("media", "kind", "status", "attempts", "run_after", "updated_at")
+    list_filter = ("kind", "status")
+    readonly_fields = ("last_error",)
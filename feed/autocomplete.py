@@ -0,0 +1,190 @@
+import heapq
+import logging
+import re
+import threading
+import time
+import unicodedata
+from bisect import bisect_left, insort
+
+from django.conf import settings
+from django.db import close_old_connections
+from django.db.models import Count
+
+from feed.models import Media, Place
+
+NON_ALNUM = re.compile(r'[^0-9a-z]+')
+
+logger = logging.getLogger(__name__)
+
+
+# -----------------------------
+# ⌨️ Place autocomplete
+# -----------------------------
+# Every place is stored under each word-suffix of its normalized name and
+# city ("badshahi mosque lahore", "mosque lahore", "lahore") in one sorted
+# list, so a prefix is a bisect plus a short scan, and matches are ranked by
+# how many public media the place has. The index lives in process memory: it
+# is built on a background thread when the process serves its first request,
+# patched by signals for writes handled by this process, and rebuilt in the
+# background every AUTOCOMPLETE_REBUILD_INTERVAL seconds to pick up writes
+# made elsewhere. Queries never wait for a rebuild; they read the current
+# index (empty until the first build finishes).
+
+def normalize(text):
+    """Lowercase ASCII words: accents stripped, punctuation collapsed"""
+    text = unicodedata.normalize('NFKD', text or '')
+    text = ''.join(char for char in text if not unicodedata.combining(char))
+    return NON_ALNUM.sub(' ', text.lower()).strip()
+
+
+def index_keys(name, city_name):
+    words = f"{normalize(name)} {normalize(city_name)}".split()
+    return {' '.join(words[start:]) for start in range(len(words))}
+
+
+class PlaceAutocompleteIndex:
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._keys = []  # Sorted (key, place_id)
+        self._places = {}  # place_id -> entry
+        self._built_at = None
+        self._rebuild_lock = threading.Lock()  # Held for the duration of a rebuild
+        # Changes seen while a rebuild reads the database, replayed after the swap
+        self._dirty_places = set()
+        self._dirty_counts = set()
+
+    def is_stale(self):
+        return self._built_at is None or time.monotonic() - self._built_at > settings.AUTOCOMPLETE_REBUILD_INTERVAL
+
+    def rebuild_in_background(self):
+        """Start a rebuild on a daemon thread unless one is already running ('eager' mode: inline)"""
+        if settings.AUTOCOMPLETE_REBUILD_MODE == 'eager':
+            self.rebuild()
+            return True
+        if not self._rebuild_lock.acquire(blocking=False):
+            return False
+
+        def run():
+            close_old_connections()
+            try:
+                self._rebuild()
+            except Exception:
+                logger.exception("Place autocomplete rebuild failed")
+            finally:
+                close_old_connections()
+                self._rebuild_lock.release()
+
+        threading.Thread(target=run, name='place-autocomplete', daemon=True).start()
+        return True
+
+    def rebuild(self):
+        """Rebuild in the calling thread, waiting for a background rebuild to finish first"""
+        with self._rebuild_lock:
+            self._rebuild()
+
+    def _rebuild(self):
+        with self._lock:
+            self._dirty_places, self._dirty_counts = set(), set()
+        counts = dict(
+            Media.objects.filter(is_public=True, is_deleted=False, place__isnull=False)
+            .order_by().values_list('place').annotate(total=Count('id'))
+        )
+        places = {}
+        keys = []
+        rows = Place.objects.filter(is_deleted=False).values_list('id', 'name', 'city__name')
+        for place_id, name, city_name in rows.iterator(chunk_size=2000):
+            entry = self._entry(place_id, name, city_name, counts.get(place_id, 0))
+            places[place_id] = entry
+            keys.extend((key, place_id) for key in entry['keys'])
+        keys.sort()
+        with self._lock:
+            self._keys, self._places = keys, places
+            self._built_at = time.monotonic()
+            dirty_places, self._dirty_places = self._dirty_places, set()
+            dirty_counts, self._dirty_counts = self._dirty_counts, set()
+        if dirty_places:
+            self.refresh_places(list(dirty_places))
+        for place_id in dirty_counts:
+            self.refresh_media_count(place_id)
+
+    @staticmethod
+    def _entry(place_id, name, city_name, media_count):
+        return {
+            'id': place_id,
+            'name': name,
+            'city_name': city_name,
+            'media_count': media_count,
+            'keys': index_keys(name, city_name),
+        }
+
+    def _add(self, entry):
+        self._places[entry['id']] = entry
+        for key in entry['keys']:
+            insort(self._keys, (key, entry['id']))
+
+    def _discard(self, place_id):
+        entry = self._places.pop(place_id, None)
+        if entry is None:
+            return None
+        for key in entry['keys']:
+            position = bisect_left(self._keys, (key, place_id))
+            if position < len(self._keys) and self._keys[position] == (key, place_id):
+                del self._keys[position]
+        return entry
+
+    def search(self, query, limit=10):
+        """Top places (by media count) whose name or city has a word starting with query"""
+        prefix = normalize(query)
+        if not prefix:
+            return []
+        if self.is_stale():
+            self.rebuild_in_background()
+        with self._lock:
+            matched = set()
+            position = bisect_left(self._keys, (prefix,))
+            while position < len(self._keys) and self._keys[position][0].startswith(prefix):
+                matched.add(self._keys[position][1])
+                position += 1
+            best = heapq.nsmallest(
+                limit, matched,
+                key=lambda place_id: (-self._places[place_id]['media_count'], self._places[place_id]['name']),
+            )
+            return [
+                {field: self._places[place_id][field] for field in ('id', 'name', 'city_name', 'media_count')}
+                for place_id in best
+            ]
+
+    # Incremental updates, only applied once the index exists
+
+    def refresh_places(self, place_ids):
+        """Re-read places (added, renamed, moved city or deleted)"""
+        if self._rebuild_lock.locked():
+            with self._lock:
+                self._dirty_places.update(place_ids)
+        if self._built_at is None:
+            return
+        rows = Place.objects.filter(id__in=place_ids, is_deleted=False).values_list('id', 'name', 'city__name')
+        with self._lock:
+            current = {}
+            for place_id in place_ids:
+                entry = self._discard(place_id)
+                if entry is not None:
+                    current[place_id] = entry['media_count']
+            for place_id, name, city_name in rows:
+                self._add(self._entry(place_id, name, city_name, current.get(place_id, 0)))
+
+    def refresh_media_count(self, place_id):
+        if place_id is None:
+            return
+        if self._rebuild_lock.locked():
+            with self._lock:
+                self._dirty_counts.add(place_id)
+        if self._built_at is None:
+            return
+        total = Media.objects.filter(place_id=place_id, is_public=True, is_deleted=False).count()
+        with self._lock:
+            if place_id in self._places:
+                self._places[place_id]['media_count'] = total
+
+
+place_index = PlaceAutocompleteIndex()
@@ -0,0 +1,104 @@
+import math
+
+from django.conf import settings
+from django.db.models import Avg, Count, F, Min, Q, Window
+from django.db.models.functions import RowNumber, Substr
+
+from core.caching import get_cache, get_cache_version
+from feed import geo
+from feed.models import Media, Place
+
+# Geohash precision of the cluster cells at each map zoom level (0-21)
+ZOOM_PRECISION = (1, 1, 1, 2, 2, 3, 3, 3, 4, 4, 5, 5, 5, 6, 6, 7, 7, 7, 8, 8, 8, 9)
+MAX_CELLS = 4096
+
+
+# -----------------------------
+# 🗺️ Map clusters
+# -----------------------------
+# Places in a bounding box are grouped by the geohash prefix for the zoom
+# level in one GROUP BY, with each cluster's most liked thumbnail picked by a
+# ROW_NUMBER() window. The box is snapped outwards to the cell grid, so
+# panning reuses cached results and edge clusters are never cut in half.
+# Cached entries are keyed on the "places" version, which every Place save
+# bumps; thumbnails may lag by PLACE_CLUSTER_CACHE_TIMEOUT.
+
+def precision_for_zoom(zoom):
+    return ZOOM_PRECISION[max(0, min(zoom, len(ZOOM_PRECISION) - 1))]
+
+
+def snap_bbox(south, west, north, east, precision):
+    """Grow a box to whole cells at a precision"""
+    height, width = geo.cell_size_degrees(precision)
+    south = max(math.floor((south + 90) / height) * height - 90, -90.0)
+    north = min(math.ceil((north + 90) / height) * height - 90, 90.0)
+    west = max(math.floor((west + 180) / width) * width - 180, -180.0)
+    east = min(math.ceil((east + 180) / width) * width - 180, 180.0)
+    return south, west, north, east
+
+
+def cell_count(south, west, north, east, precision):
+    height, width = geo.cell_size_degrees(precision)
+    return round((north - south) / height) * round((east - west) / width)
+
+
+def bbox_filter(south, west, north, east, prefix=''):
+    """Q for points inside a box given as south <= north, west <= east"""
+    return Q(**{
+        f'{prefix}latitude__gte': south, f'{prefix}latitude__lte': north,
+        f'{prefix}longitude__gte': west, f'{prefix}longitude__lte': east,
+    })
+
+
+def get_clusters(south, west, north, east, zoom):
+    """
+    Clusters for a snapped box, from cache when possible.
+
+    Each cluster is a dict with geohash, count, latitude, longitude, place_id
+    (only for single-place clusters) and top_media ({id, thumbnail} or None),
+    where thumbnail is a stored file name.
+    """
+    precision = precision_for_zoom(zoom)
+    key = "places:clusters:v{}:{}:{}".format(
+        get_cache_version('places'), precision, ':'.join(f'{value:.6f}' for value in (south, west, north, east))
+    )
+    cache = get_cache()
+    clusters = cache.get(key)
+    if clusters is None:
+        clusters = compute_clusters(south, west, north, east, precision)
+        cache.set(key, clusters, settings.PLACE_CLUSTER_CACHE_TIMEOUT)
+    return clusters
+
+
+def compute_clusters(south, west, north, east, precision):
+    cell = Substr('geohash', 1, precision)
+    rows = Place.objects.filter(bbox_filter(south, west, north, east), is_deleted=False).annotate(
+        cell=cell
+    ).values('cell').annotate(
+        count=Count('id'), latitude=Avg('latitude'), longitude=Avg('longitude'), first_place=Min('id')
+    ).order_by('cell')
+
+    media_cell = Substr('place__geohash', 1, precision)
+    top_media = Media.objects.filter(
+        bbox_filter(south, west, north, east, prefix='place__'),
+        place__is_deleted=False, is_public=True, is_deleted=False,
+    ).exclude(thumbnail='').exclude(thumbnail__isnull=True).annotate(
+        cell=media_cell,
+        rank=Window(
+            RowNumber(), partition_by=[media_cell],
+            order_by=[F('like_count').desc(), F('created_at').desc()],
+        ),
+    ).filter(rank=1).values_list('cell', 'id', 'thumbnail')
+    top_by_cell = {cell: {'id': pk, 'thumbnail': thumbnail} for cell, pk, thumbnail in top_media}
+
+    return [
+        {
+            'geohash': row['cell'],
+            'count': row['count'],
+            'latitude': round(float(row['latitude']), 6),
+            'longitude': round(float(row['longitude']), 6),
+            'place_id': row['first_place'] if row['count'] == 1 else None,
+            'top_media': top_by_cell.get(row['cell']),
+        }
+        for row in rows
+    ]
@@ -4,3 +4,35 @@ class MEDIA_TYPES(models.TextChoices):
     """Media types"""
     PHOTO = 'photo', 'Photo'
     VIDEO = 'video', 'Video'
+
+class ProcessingStatus(models.TextChoices):
+    """Post-upload processing state of a media item"""
+    PENDING = 'pending', 'Pending'
+    PROCESSING = 'processing', 'Processing'
+    READY = 'ready', 'Ready'
+    FAILED = 'failed', 'Failed'
+
+class MediaJobKind(models.TextChoices):
+    """Background jobs run on uploaded media"""
+    THUMBNAIL = 'thumbnail', 'Thumbnail'
+    RENDITIONS = 'renditions', 'Renditions'
+
+class MediaJobStatus(models.TextChoices):
+    """Lifecycle of a background media job"""
+    PENDING = 'pending', 'Pending'
+    RUNNING = 'running', 'Running'
+    DONE = 'done', 'Done'
+    FAILED = 'failed', 'Failed'
+
+class RenditionFormat(models.TextChoices):
+    """Encodings stored for responsive image renditions"""
+    WEBP = 'webp', 'WebP'
+    JPEG = 'jpeg', 'JPEG'
+
+class UploadSessionStatus(models.TextChoices):
+    """Lifecycle of a chunked upload session"""
+    ACTIVE = 'active', 'Active'
+    COMPLETING = 'completing', 'Completing'
+    COMPLETED = 'completed', 'Completed'
+    FAILED = 'failed', 'Failed'
+    ABORTED = 'aborted', 'Aborted'
@@ -0,0 +1,114 @@
+import math
+
+BASE32 = '0123456789bcdefghjkmnpqrstuvwxyz'
+PRECISION = 9  # ~5m cells; prefixes of the stored hash give coarser cells
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEGREE = 111.32
+
+
+# -----------------------------
+# 🌍 Geohash
+# -----------------------------
+# Places store a geohash, so every cell is a contiguous range of an indexed
+# string column: a cell prefix p matches geohash >= p AND geohash < p + '~'.
+# Radius queries read the 3x3 block of cells around the point at a precision
+# whose cells are at least as large as the radius, then refine the candidates
+# with haversine distances.
+
+def encode(latitude, longitude, precision=PRECISION):
+    """Geohash of a point"""
+    lat_range, lng_range = [-90.0, 90.0], [-180.0, 180.0]
+    chars = []
+    bits = value = 0
+    even = True
+    while len(chars) < precision:
+        interval, coordinate = (lng_range, longitude) if even else (lat_range, latitude)
+        middle = (interval[0] + interval[1]) / 2
+        value <<= 1
+        if coordinate >= middle:
+            value |= 1
+            interval[0] = middle
+        else:
+            interval[1] = middle
+        even = not even
+        bits += 1
+        if bits == 5:
+            chars.append(BASE32[value])
+            bits = value = 0
+    return ''.join(chars)
+
+
+def bounds(geohash):
+    """(south, north, west, east) of a geohash cell"""
+    lat_range, lng_range = [-90.0, 90.0], [-180.0, 180.0]
+    even = True
+    for char in geohash:
+        value = BASE32.index(char)
+        for shift in range(4, -1, -1):
+            interval = lng_range if even else lat_range
+            middle = (interval[0] + interval[1]) / 2
+            if value >> shift & 1:
+                interval[0] = middle
+            else:
+                interval[1] = middle
+            even = not even
+    return lat_range[0], lat_range[1], lng_range[0], lng_range[1]
+
+
+def cell_size_degrees(precision):
+    """(height, width) in degrees of cells at a precision"""
+    lng_bits = math.ceil(precision * 5 / 2)
+    lat_bits = precision * 5 - lng_bits
+    return 180.0 / 2 ** lat_bits, 360.0 / 2 ** lng_bits
+
+
+def neighbors(geohash):
+    """The 8 cells surrounding a cell (fewer at the poles)"""
+    south, north, west, east = bounds(geohash)
+    height, width = north - south, east - west
+    center_lat, center_lng = (south + north) / 2, (west + east) / 2
+    cells = []
+    for d_lat in (-1, 0, 1):
+        for d_lng in (-1, 0, 1):
+            if d_lat == d_lng == 0:
+                continue
+            latitude = center_lat + d_lat * height
+            if not -90 < latitude < 90:
+                continue
+            longitude = (center_lng + d_lng * width + 180) % 360 - 180
+            cells.append(encode(latitude, longitude, len(geohash)))
+    return cells
+
+
+def precision_for_radius(latitude, radius_km):
+    """Longest precision whose cells are at least radius_km tall and wide at this latitude"""
+    lng_scale = max(math.cos(math.radians(latitude)), 0.01)
+    for precision in range(PRECISION, 0, -1):
+        height, width = cell_size_degrees(precision)
+        if min(height * KM_PER_DEGREE, width * KM_PER_DEGREE * lng_scale) >= radius_km:
+            return precision
+    return 1
+
+
+def covering_cells(latitude, longitude, radius_km):
+    """Geohash prefixes whose cells together contain every point within radius_km"""
+    center = encode(latitude, longitude, precision_for_radius(latitude, radius_km))
+    return sorted({center, *neighbors(center)})
+
+
+def parse_point(latitude, longitude):
+    """(latitude, longitude) floats from query string values; ValueError when missing or out of range"""
+    try:
+        latitude, longitude = float(latitude), float(longitude)
+    except (TypeError, ValueError):
+        raise ValueError("lat and lng must be numbers")
+    if not (-90 <= latitude <= 90 and -180 <= longitude <= 180):
+        raise ValueError("lat must be within [-90, 90] and lng within [-180, 180]")
+    return latitude, longitude
+
+
+def haversine_km(lat1, lng1, lat2, lng2):
+    """Great-circle distance between two points"""
+    lat1, lng1, lat2, lng2 = map(math.radians, (lat1, lng1, lat2, lng2))
+    a = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lng2 - lng1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(a))
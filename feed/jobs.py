@@ -0,0 +1,171 @@
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.db.models import Case, Exists, F, Value, When
+from django.utils import timezone
+
+from feed import processing
+from feed.enums import MEDIA_TYPES, MediaJobKind, MediaJobStatus, ProcessingStatus
+from feed.models import Media, MediaJob
+
+logger = logging.getLogger(__name__)
+
+
+# -----------------------------
+# ⚙️ Media job queue
+# -----------------------------
+# Jobs live in the MediaJob table, so processing needs no broker: uploads enqueue
+# rows, and either a thread pool in the web process or `manage.py
+# process_media_jobs` claims and runs them. Failures are retried with
+# exponential backoff up to MEDIA_JOB_MAX_ATTEMPTS; in thread mode a timer
+# kicks the pool again when the retry is due. Jobs left RUNNING by a dead
+# worker are requeued after MEDIA_JOB_STALE_AFTER.
+
+HANDLERS = {
+    MediaJobKind.THUMBNAIL: processing.generate_thumbnail,
+    MediaJobKind.RENDITIONS: processing.generate_renditions,
+}
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def jobs_for(media):
+    """Job kinds an upload of this media type needs"""
+    if media.media_type == MEDIA_TYPES.PHOTO:
+        return [MediaJobKind.THUMBNAIL, MediaJobKind.RENDITIONS]
+    return [MediaJobKind.THUMBNAIL]
+
+
+def enqueue_processing(media):
+    """Queue post-upload jobs for media and start them once the upload commits"""
+    kinds = jobs_for(media)
+    if not kinds:
+        return
+    MediaJob.objects.bulk_create([MediaJob(media=media, kind=kind) for kind in kinds])
+    Media.objects.filter(pk=media.pk).update(processing_status=ProcessingStatus.PENDING)
+    media.processing_status = ProcessingStatus.PENDING
+    transaction.on_commit(kick)
+
+
+def kick():
+    """Run due jobs according to MEDIA_JOBS_MODE"""
+    mode = settings.MEDIA_JOBS_MODE
+    if mode == 'eager':
+        run_pending()
+    elif mode == 'thread':
+        _get_executor().submit(_drain)
+
+
+def kick_later(delay):
+    """Kick the pool once delay seconds have passed (thread mode only)"""
+    if settings.MEDIA_JOBS_MODE == 'thread':
+        timer = threading.Timer(delay, kick)
+        timer.daemon = True
+        timer.start()
+
+
+def requeue_stale(stale_after=None):
+    """Put RUNNING jobs whose worker stopped updating them back in the queue; returns how many"""
+    if stale_after is None:
+        stale_after = settings.MEDIA_JOB_STALE_AFTER
+    stale = timezone.now() - timedelta(seconds=stale_after)
+    return MediaJob.objects.filter(status=MediaJobStatus.RUNNING, updated_at__lt=stale).update(
+        status=MediaJobStatus.PENDING, updated_at=timezone.now()
+    )
+
+
+def _get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=settings.MEDIA_JOB_WORKERS, thread_name_prefix='media-jobs'
+            )
+        return _executor
+
+
+def _drain():
+    close_old_connections()
+    try:
+        requeue_stale()
+        run_pending()
+    except Exception:
+        logger.exception("Media job worker crashed")
+    finally:
+        close_old_connections()
+
+
+def claim_next():
+    """Atomically take the oldest due job, or None"""
+    due = MediaJob.objects.filter(status=MediaJobStatus.PENDING, run_after__lte=timezone.now())
+    for job_id in due.values_list('id', flat=True)[:10]:
+        claimed = MediaJob.objects.filter(id=job_id, status=MediaJobStatus.PENDING).update(
+            status=MediaJobStatus.RUNNING, attempts=F('attempts') + 1, updated_at=timezone.now()
+        )
+        if claimed:
+            return MediaJob.objects.select_related('media').get(id=job_id)
+    return None
+
+
+def refresh_processing_status(media_id):
+    """
+    Derive the media's processing_status from all of its jobs in one UPDATE.
+
+    Failed for good if any job failed, ready once every job is done, processing
+    while some have started or finished, pending otherwise.
+    """
+    jobs = MediaJob.objects.filter(media_id=media_id)
+    Media.objects.filter(pk=media_id).update(processing_status=Case(
+        When(Exists(jobs.filter(status=MediaJobStatus.FAILED)), then=Value(ProcessingStatus.FAILED)),
+        When(~Exists(jobs.exclude(status=MediaJobStatus.DONE)), then=Value(ProcessingStatus.READY)),
+        When(
+            Exists(jobs.filter(status__in=[MediaJobStatus.RUNNING, MediaJobStatus.DONE])),
+            then=Value(ProcessingStatus.PROCESSING),
+        ),
+        default=Value(ProcessingStatus.PENDING),
+    ))
+
+
+def run_job(job):
+    """Run one claimed job, scheduling a retry or marking failure on error"""
+    media = job.media
+    refresh_processing_status(media.pk)
+    try:
+        HANDLERS[job.kind](media)
+    except Exception as exc:
+        logger.warning("Media job %s (%s) failed on attempt %s: %s", job.pk, job.kind, job.attempts, exc)
+        job.last_error = f"{exc.__class__.__name__}: {exc}"
+        if job.attempts >= settings.MEDIA_JOB_MAX_ATTEMPTS:
+            job.status = MediaJobStatus.FAILED
+        else:
+            delay = settings.MEDIA_JOB_RETRY_DELAY * 2 ** (job.attempts - 1)
+            job.status = MediaJobStatus.PENDING
+            job.run_after = timezone.now() + timedelta(seconds=delay)
+        job.save(update_fields=['status', 'run_after', 'last_error', 'updated_at'])
+        refresh_processing_status(media.pk)
+        if job.status == MediaJobStatus.PENDING:
+            kick_later(delay)
+        return False
+
+    job.status = MediaJobStatus.DONE
+    job.last_error = ''
+    job.save(update_fields=['status', 'last_error', 'updated_at'])
+    refresh_processing_status(media.pk)
+    return True
+
+
+def run_pending(limit=None):
+    """Run due jobs until none are left (or limit is reached); returns how many ran"""
+    processed = 0
+    while limit is None or processed < limit:
+        job = claim_next()
+        if job is None:
+            break
+        run_job(job)
+        processed += 1
+    return processed
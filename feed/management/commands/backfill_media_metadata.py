@@ -0,0 +1,44 @@
+from django.core.management.base import BaseCommand
+from PIL import Image
+
+from feed.media_info import probe_media
+from feed.models import Media
+
+
+class Command(BaseCommand):
+    help = "Capture file size, dimensions and codec for media uploaded before they were stored"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=200)
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        fields = ['file_size', 'width', 'height', 'duration', 'codec']
+        updated = missing = 0
+        batch = []
+
+        # file_size marks a row as probed: videos whose codec can't be read keep an empty one
+        pending = Media.objects.filter(file_size__isnull=True).only('id', 'file', 'media_type', *fields)
+        for media in pending.iterator(chunk_size=batch_size):
+            try:
+                media.file.open('rb')
+                media.file_size = media.file.size
+                for field, value in probe_media(media.file, media.media_type).items():
+                    setattr(media, field, value)
+            except (OSError, ValueError, Image.DecompressionBombError):
+                missing += 1
+                continue
+            finally:
+                media.file.close()
+
+            batch.append(media)
+            if len(batch) >= batch_size:
+                Media.objects.bulk_update(batch, fields)
+                updated += len(batch)
+                batch = []
+
+        if batch:
+            Media.objects.bulk_update(batch, fields)
+            updated += len(batch)
+
+        self.stdout.write(self.style.SUCCESS(f"Backfilled {updated} media ({missing} files missing from storage)"))
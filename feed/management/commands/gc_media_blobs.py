@@ -0,0 +1,67 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, F, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from feed.models import Media, MediaBlob
+
+
+def stored_blob_files(storage, directory='blobs'):
+    """Names of every file under the blobs/ tree in storage"""
+    try:
+        directories, files = storage.listdir(directory)
+    except FileNotFoundError:
+        return
+    for name in files:
+        yield f"{directory}/{name}"
+    for name in directories:
+        yield from stored_blob_files(storage, f"{directory}/{name}")
+
+
+class Command(BaseCommand):
+    help = "Recount media blob references and delete blobs (and stored blob files) nothing points at"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help="Only report what would change")
+        parser.add_argument(
+            '--grace-minutes', type=int, default=60,
+            help="Leave unreferenced blobs younger than this alone (uploads still in flight)"
+        )
+
+    def handle(self, *args, **options):
+        references = Media.objects.filter(blob=OuterRef('pk')).order_by().values('blob').annotate(
+            total=Count('id')
+        ).values('total')
+        actual = Coalesce(Subquery(references, output_field=IntegerField()), 0)
+        cutoff = timezone.now() - timedelta(minutes=options['grace_minutes'])
+
+        with transaction.atomic():
+            drifted = MediaBlob.objects.alias(actual=actual).exclude(ref_count=F('actual')).count()
+            orphaned = MediaBlob.objects.alias(actual=actual).filter(actual=0, created_at__lt=cutoff)
+            if options['dry_run']:
+                collected = orphaned.count()
+            else:
+                if drifted:
+                    MediaBlob.objects.update(ref_count=actual)
+                collected = MediaBlob.collect(MediaBlob.objects.filter(pk__in=list(orphaned.values_list('pk', flat=True))))
+
+        # Files written by uploads whose transaction rolled back have no row at all
+        storage = MediaBlob._meta.get_field('file').storage
+        known = set(MediaBlob.objects.values_list('file', flat=True))
+        strays = 0
+        for name in stored_blob_files(storage):
+            if name in known or storage.get_modified_time(name) >= cutoff:
+                continue
+            if MediaBlob.objects.filter(file=name).exists():
+                # An identical upload adopted the file since the snapshot
+                continue
+            strays += 1
+            if not options['dry_run']:
+                storage.delete(name)
+
+        verb = "would" if options['dry_run'] else "did"
+        self.stdout.write(f"Reference counts: {verb} repair {drifted} blobs")
+        self.stdout.write(self.style.SUCCESS(f"Collected {collected} unreferenced blobs and {strays} stray files"))
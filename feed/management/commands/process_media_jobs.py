@@ -0,0 +1,32 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from feed import jobs
+
+
+class Command(BaseCommand):
+    help = "Run queued media jobs (thumbnails, renditions) outside the web process"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--loop', action='store_true', help="Keep polling for new and retried jobs")
+        parser.add_argument('--interval', type=float, default=5.0, help="Seconds between polls with --loop")
+        parser.add_argument(
+            '--stale-after', type=int, default=None,
+            help="Minutes after which a running job is assumed dead and requeued (default: MEDIA_JOB_STALE_AFTER)"
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            stale_after = options['stale_after']
+            requeued = jobs.requeue_stale(stale_after * 60 if stale_after is not None else None)
+            if requeued:
+                self.stdout.write(f"Requeued {requeued} stale jobs")
+
+            processed = jobs.run_pending()
+            if processed:
+                self.stdout.write(f"Processed {processed} jobs")
+
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
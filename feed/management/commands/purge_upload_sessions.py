@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+from django.utils import timezone
+
+from feed import uploads
+from feed.enums import UploadSessionStatus
+from feed.models import UploadSession
+
+
+class Command(BaseCommand):
+    help = "Delete expired, failed or aborted chunked upload sessions and their part files"
+
+    def handle(self, *args, **options):
+        stale = UploadSession.objects.filter(
+            Q(status__in=[UploadSessionStatus.ABORTED, UploadSessionStatus.FAILED])
+            | Q(status=UploadSessionStatus.ACTIVE, expires_at__lte=timezone.now())
+        )
+        purged = 0
+        for session in stale.iterator():
+            uploads.delete_part_file(session)
+            session.delete()
+            purged += 1
+
+        self.stdout.write(self.style.SUCCESS(f"Purged {purged} upload sessions"))
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from feed import search
+
+
+class Command(BaseCommand):
+    help = "Rebuild the full-text search index for places, media and users"
+
+    def handle(self, *args, **options):
+        search.rebuild_index()
+        self.stdout.write(self.style.SUCCESS("Search index rebuilt"))
@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+
+from feed import timeline
+from feed.models import Media, TimelineEntry
+from social.models import Follow
+
+
+class Command(BaseCommand):
+    help = "Rebuild materialized home timelines from Follow and recent Media"
+
+    def handle(self, *args, **options):
+        TimelineEntry.objects.all().delete()
+
+        for media in Media.objects.filter(is_deleted=False).iterator():
+            # Own uploads always appear on the uploader's timeline
+            timeline.write_entries(media, [media.uploaded_by_id])
+
+        follows = Follow.objects.values_list('follower_id', 'following_id')
+        for follower_id, following_id in follows.iterator():
+            timeline.backfill_follow(follower_id, following_id)
+
+        total = TimelineEntry.objects.count()
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt home timelines ({total} entries)"))
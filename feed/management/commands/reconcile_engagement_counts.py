@@ -0,0 +1,39 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import F, Q
+
+from feed.models import Media, Place, UserProfile
+
+
+COUNTER_FIELDS = ('like_count', 'comment_count', 'share_count')
+
+
+class Command(BaseCommand):
+    help = "Recompute stored like/comment/share counters from social.Like/Comment/Share"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help="Only report how many rows have drifted"
+        )
+
+    def handle(self, *args, **options):
+        for model in (Media, Place, UserProfile):
+            actual = model.objects.engagement_counts()
+
+            drift = Q()
+            for field in COUNTER_FIELDS:
+                drift |= ~Q(**{field: F(f'actual_{field}')})
+
+            with transaction.atomic():
+                drifted = model.objects.alias(
+                    **{f'actual_{field}': actual[field] for field in COUNTER_FIELDS}
+                ).filter(drift).count()
+                if drifted and not options['dry_run']:
+                    # One UPDATE ... SET col = (SELECT COUNT(*) ...) per model
+                    model.objects.update(**actual)
+
+            verb = "would repair" if options['dry_run'] else "repaired"
+            self.stdout.write(f"{model.__name__}: {verb} {drifted} drifted rows")
+
+        self.stdout.write(self.style.SUCCESS("Engagement counters reconciled"))
@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+from django.urls import get_resolver
+
+from core.caching import CACHED_VIEWS, get_response_cache_stats, reset_response_cache_stats
+
+
+class Command(BaseCommand):
+    help = "Report hit/miss counters of the anonymous response cache per view"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--reset', action='store_true', help="Zero the counters after reporting them")
+
+    def handle(self, *args, **options):
+        get_resolver().url_patterns  # Import every view so the cached ones register themselves
+
+        for name in sorted(CACHED_VIEWS):
+            stats = get_response_cache_stats(name)
+            served = stats['hit'] + stats['not_modified']
+            total = served + stats['miss']
+            ratio = f"{served / total:.1%}" if total else "-"
+            self.stdout.write(
+                f"{name}: {stats['hit']} hits, {stats['not_modified']} not modified, "
+                f"{stats['miss']} misses ({ratio} served from cache)"
+            )
+            if options['reset']:
+                reset_response_cache_stats(name)
@@ -0,0 +1,43 @@
+from django.db.models import Q
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.exceptions import AuthenticationFailed
+
+from feed.models import Media, MediaRendition, UserProfile
+
+
+# -----------------------------
+# 🔐 Media access
+# -----------------------------
+# serve_media asks this policy (settings.MEDIA_ACCESS_POLICY) before sending a
+# file. A path is served when it belongs to media the viewer may see: public
+# and not deleted, or uploaded by the viewer. Profile pictures are public.
+# Paths no row points at are not served.
+
+def request_user(request):
+    """Session user, or the user of an API token in the Authorization header"""
+    user = getattr(request, 'user', None)
+    if user is not None and user.is_authenticated:
+        return user
+    try:
+        authenticated = TokenAuthentication().authenticate(request)
+    except AuthenticationFailed:
+        return None
+    return authenticated[0] if authenticated else None
+
+
+def media_visibility(request, path):
+    """'public', 'private' (viewer's own non-public media) or None when the path must not be served"""
+    if path.startswith('profiles/'):
+        return 'public' if UserProfile.objects.filter(profile_picture=path).exists() else None
+
+    if path.startswith('renditions/'):
+        media = Media.objects.filter(pk__in=MediaRendition.objects.filter(file=path).values('media_id'))
+    else:
+        media = Media.objects.filter(Q(file=path) | Q(thumbnail=path))
+    # A blob may back several media rows; any visible one is enough
+    if media.filter(is_public=True, is_deleted=False).exists():
+        return 'public'
+    user = request_user(request)
+    if user is not None and media.filter(uploaded_by=user, is_deleted=False).exists():
+        return 'private'
+    return None
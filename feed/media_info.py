@@ -0,0 +1,162 @@
+import struct
+
+from PIL import Image, UnidentifiedImageError
+
+from feed.enums import MEDIA_TYPES
+
+SNIFF_SIZE = 4096
+
+# Container -> (media type, file extensions it may carry)
+CONTAINERS = {
+    'jpeg': (MEDIA_TYPES.PHOTO, ('.jpg', '.jpeg')),
+    'png': (MEDIA_TYPES.PHOTO, ('.png',)),
+    'gif': (MEDIA_TYPES.PHOTO, ('.gif',)),
+    'webp': (MEDIA_TYPES.PHOTO, ('.webp',)),
+    'iso-bmff': (MEDIA_TYPES.VIDEO, ('.mp4', '.mov')),
+    'quicktime': (MEDIA_TYPES.VIDEO, ('.mov',)),
+    'avi': (MEDIA_TYPES.VIDEO, ('.avi',)),
+    'asf': (MEDIA_TYPES.VIDEO, ('.wmv',)),
+    'flv': (MEDIA_TYPES.VIDEO, ('.flv',)),
+    'matroska': (MEDIA_TYPES.VIDEO, ('.webm',)),
+}
+
+# ftyp brands of still-image formats that share the MP4 container
+IMAGE_BRANDS = {b'heic', b'heix', b'hevc', b'mif1', b'msf1', b'avif'}
+
+# Leading atoms of QuickTime files written before the ftyp atom existed
+QUICKTIME_ATOMS = {b'moov', b'mdat', b'wide', b'free', b'skip', b'pnot'}
+
+
+# -----------------------------
+# 🔎 Content sniffing
+# -----------------------------
+
+def sniff_container(head):
+    """Container name from the first bytes of a file, or None if unrecognised"""
+    if head.startswith(b'\xff\xd8\xff'):
+        return 'jpeg'
+    if head.startswith(b'\x89PNG\r\n\x1a\n'):
+        return 'png'
+    if head[:6] in (b'GIF87a', b'GIF89a'):
+        return 'gif'
+    if head[:4] == b'RIFF' and head[8:12] == b'WEBP':
+        return 'webp'
+    if head[:4] == b'RIFF' and head[8:12] == b'AVI ':
+        return 'avi'
+    if head[4:8] == b'ftyp' and head[8:12] not in IMAGE_BRANDS:
+        return 'iso-bmff'
+    if head[4:8] in QUICKTIME_ATOMS and struct.unpack('>I', head[:4])[0] not in range(2, 8):
+        # Atom sizes below 8 are invalid except 0 (to end of file) and 1 (64-bit size follows)
+        return 'quicktime'
+    if head.startswith(b'\x30\x26\xb2\x75\x8e\x66\xcf\x11'):
+        return 'asf'
+    if head.startswith(b'FLV\x01'):
+        return 'flv'
+    if head.startswith(b'\x1a\x45\xdf\xa3'):
+        return 'matroska'
+    return None
+
+
+# -----------------------------
+# 🎞️ Media metadata
+# -----------------------------
+# Reads only headers: Pillow stops after the image header and the ISO-BMFF
+# walker seeks from box to box, so probing never loads a whole file.
+
+def probe_media(file, media_type):
+    """Get width/height, codec (and duration for videos) from an open file"""
+    info = {'width': None, 'height': None, 'duration': None, 'codec': ''}
+    try:
+        if media_type == MEDIA_TYPES.PHOTO:
+            info.update(_probe_image(file))
+        elif media_type == MEDIA_TYPES.VIDEO:
+            info.update(_probe_iso_bmff(file))
+    except (OSError, ValueError, IndexError, struct.error, UnidentifiedImageError):
+        # Truncated boxes read short; callers treat missing metadata as a corrupt file
+        pass
+    finally:
+        file.seek(0)
+    return info
+
+
+def _probe_image(file):
+    file.seek(0)
+    with Image.open(file) as image:
+        width, height = image.size
+        codec = (image.format or '').lower()
+    return {'width': width, 'height': height, 'codec': codec}
+
+
+def _iter_boxes(file, start, end):
+    """Yield (type, payload_start, box_end) for boxes between start and end"""
+    position = start
+    while position + 8 <= end:
+        file.seek(position)
+        header = file.read(8)
+        if len(header) < 8:
+            return
+        size, kind = struct.unpack('>I4s', header)
+        header_size = 8
+        if size == 1:
+            size = struct.unpack('>Q', file.read(8))[0]
+            header_size = 16
+        elif size == 0:
+            size = end - position
+        if size < header_size or position + size > end:
+            # Malformed, or cut off: the box claims more bytes than its parent holds
+            return
+        yield kind, position + header_size, position + size
+        position += size
+
+
+def _find_box(file, start, end, path):
+    """Payload bounds of the first box matching a path like (b'moov', b'trak')"""
+    for kind, payload_start, box_end in _iter_boxes(file, start, end):
+        if kind == path[0]:
+            if len(path) == 1:
+                return payload_start, box_end
+            return _find_box(file, payload_start, box_end, path[1:])
+    return None
+
+
+def _probe_iso_bmff(file):
+    """Duration, video track dimensions and codec from an MP4/MOV moov box"""
+    file.seek(0, 2)
+    moov = _find_box(file, 0, file.tell(), (b'moov',))
+    if moov is None:
+        return {}
+
+    info = {}
+    mvhd = _find_box(file, moov[0], moov[1], (b'mvhd',))
+    if mvhd is not None:
+        file.seek(mvhd[0])
+        version = file.read(1)[0]
+        if version == 1:
+            file.seek(mvhd[0] + 20)
+            timescale, duration = struct.unpack('>IQ', file.read(12))
+        else:
+            file.seek(mvhd[0] + 12)
+            timescale, duration = struct.unpack('>II', file.read(8))
+        if timescale:
+            info['duration'] = round(duration / timescale, 3)
+
+    for kind, trak_start, trak_end in _iter_boxes(file, moov[0], moov[1]):
+        if kind != b'trak':
+            continue
+        tkhd = _find_box(file, trak_start, trak_end, (b'tkhd',))
+        if tkhd is None:
+            continue
+        file.seek(tkhd[0])
+        version = file.read(1)[0]
+        file.seek(tkhd[0] + (88 if version == 1 else 76))
+        width, height = struct.unpack('>II', file.read(8))
+        if width and height:
+            # 16.16 fixed point; audio tracks report 0x0
+            info['width'], info['height'] = width >> 16, height >> 16
+            stsd = _find_box(file, trak_start, trak_end, (b'mdia', b'minf', b'stbl', b'stsd'))
+            if stsd is not None:
+                # version/flags, entry count, then the first sample entry's size and format
+                file.seek(stsd[0] + 12)
+                info['codec'] = file.read(4).decode('latin-1').strip()
+            break
+    return info
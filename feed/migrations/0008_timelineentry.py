@@ -0,0 +1,31 @@
+# Generated by Django 5.2.6 on 2026-10-16 22:31
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('feed', '0007_engagement_counters'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TimelineEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(help_text="Copy of the media's created_at so reads never join Media to sort")),
+                ('author', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('media', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='timeline_entries', to='feed.media')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='timeline_entries', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['user', '-created_at', '-media'], name='feed_timeli_user_id_b386db_idx'), models.Index(fields=['user', 'author'], name='feed_timeli_user_id_88b247_idx')],
+                'unique_together': {('user', 'media')},
+            },
+        ),
+    ]
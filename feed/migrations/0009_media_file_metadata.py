@@ -0,0 +1,33 @@
+# Generated by Django 5.2.6 on 2026-10-16 22:35
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('feed', '0008_timelineentry'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='media',
+            name='duration',
+            field=models.FloatField(blank=True, help_text='Video duration in seconds', null=True),
+        ),
+        migrations.AddField(
+            model_name='media',
+            name='file_size',
+            field=models.BigIntegerField(blank=True, help_text='File size in bytes, captured at upload', null=True),
+        ),
+        migrations.AddField(
+            model_name='media',
+            name='height',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='media',
+            name='width',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 5.2.6 on 2026-10-16 22:37
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('feed', '0010_media_processing_jobs'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='mediajob',
+            name='kind',
+            field=models.CharField(choices=[('thumbnail', 'Thumbnail'), ('renditions', 'Renditions')], max_length=20),
+        ),
+        migrations.CreateModel(
+            name='MediaRendition',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('width', models.PositiveIntegerField()),
+                ('height', models.PositiveIntegerField()),
+                ('format', models.CharField(choices=[('webp', 'WebP'), ('jpeg', 'JPEG')], max_length=10)),
+                ('file', models.FileField(upload_to='renditions/')),
+                ('file_size', models.BigIntegerField(default=0)),
+                ('media', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='renditions', to='feed.media')),
+            ],
+            options={
+                'ordering': ['width'],
+                'unique_together': {('media', 'width', 'format')},
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.6 on 2026-10-16 22:43
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('feed', '0012_upload_sessions'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='media',
+            name='codec',
+            field=models.CharField(blank=True, help_text='Image format or video codec (e.g. jpeg, avc1), sniffed at upload', max_length=20),
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 5.2.6 on 2026-10-16 22:49
+
+from django.conf import settings
+from django.db import migrations, models
+
+from feed.geo import encode
+
+
+def fill_geohashes(apps, schema_editor):
+    Place = apps.get_model('feed', 'Place')
+    places = list(Place.objects.only('id', 'latitude', 'longitude'))
+    for place in places:
+        place.geohash = encode(float(place.latitude), float(place.longitude))
+    Place.objects.bulk_update(places, ['geohash'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('feed', '0014_media_blobs'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='place',
+            name='geohash',
+            field=models.CharField(blank=True, editable=False, help_text='Derived from latitude/longitude on save', max_length=12),
+        ),
+        migrations.RunPython(fill_geohashes, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='place',
+            index=models.Index(fields=['geohash', 'is_deleted', 'latitude', 'longitude'], name='feed_place_geohash_e0a2ad_idx'),
+        ),
+    ]
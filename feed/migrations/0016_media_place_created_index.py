@@ -0,0 +1,19 @@
+# Generated by Django 5.2.6 on 2026-10-16 22:50
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('feed', '0015_place_geohash'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='media',
+            index=models.Index(fields=['place', '-created_at'], name='feed_media_place_i_fa8e14_idx'),
+        ),
+    ]
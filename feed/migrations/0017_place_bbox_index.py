@@ -0,0 +1,19 @@
+# Generated by Django 5.2.6 on 2026-10-16 22:52
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('feed', '0016_media_place_created_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='place',
+            index=models.Index(fields=['latitude', 'longitude', 'is_deleted', 'geohash'], name='feed_place_latitud_5ea211_idx'),
+        ),
+    ]
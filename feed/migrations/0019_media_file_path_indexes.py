@@ -0,0 +1,27 @@
+# Generated by Django 5.2.6 on 2026-10-16 23:11
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('feed', '0018_search_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='media',
+            index=models.Index(fields=['file'], name='feed_media_file_fbf973_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='media',
+            index=models.Index(fields=['thumbnail'], name='feed_media_thumbna_2e284d_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='mediarendition',
+            index=models.Index(fields=['file'], name='feed_mediar_file_1642e4_idx'),
+        ),
+    ]
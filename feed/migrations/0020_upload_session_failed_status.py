@@ -0,0 +1,18 @@
+# Generated by Django 5.2.6 on 2026-10-16 23:16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('feed', '0019_media_file_path_indexes'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='uploadsession',
+            name='status',
+            field=models.CharField(choices=[('active', 'Active'), ('completing', 'Completing'), ('completed', 'Completed'), ('failed', 'Failed'), ('aborted', 'Aborted')], default='active', max_length=12),
+        ),
+    ]
@@ -1,14 +1,115 @@
-from django.db import models
+import math
+import os
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import models, transaction
+from django.db.models import Count, F, FloatField, IntegerField, OuterRef, Q, Subquery, Sum
+from django.db.models.functions import ASin, Cast, Coalesce, Cos, Greatest, Power, Radians, Sin, Sqrt
 from django.contrib.auth.models import User
-from core.mixins import TimeStampedMixin, SoftDeleteMixin
+from django.utils import timezone
+from core.mixins import TimeStampedMixin, SoftDeleteMixin, EngagementCounterMixin
 from django.contrib.contenttypes.fields import GenericRelation
+from django.contrib.contenttypes.models import ContentType
 from core.settings import MEDIA_URL
 
-from feed.enums import MEDIA_TYPES
+from feed import geo
+from feed.enums import MEDIA_TYPES, ProcessingStatus, MediaJobKind, MediaJobStatus, RenditionFormat, UploadSessionStatus
 from .choices import Provinces, AgeGroup
 from social.models import Like, Comment, Share
 
-class UserProfile(TimeStampedMixin, SoftDeleteMixin, models.Model):
+
+class EngagementQuerySet(models.QuerySet):
+    """QuerySet for models with likes/comments/shares generic relations"""
+
+    def engagement_counts(self):
+        """Correlated COUNT(*) subqueries over social.Like/Comment/Share keyed on the outer row"""
+        content_type = ContentType.objects.get_for_model(self.model)
+        return {
+            'like_count': self._count(Like.objects.filter(content_type=content_type)),
+            'comment_count': self._count(Comment.objects.filter(content_type=content_type, is_deleted=False)),
+            'share_count': self._count(Share.objects.filter(content_type=content_type)),
+        }
+
+    def with_engagement(self):
+        """Annotate live_like_count/live_comment_count/live_share_count in the same statement"""
+        return self.annotate(**{
+            f'live_{field}': value for field, value in self.engagement_counts().items()
+        })
+
+    @staticmethod
+    def _count(queryset):
+        counts = queryset.filter(object_id=OuterRef('pk')).order_by().values('object_id').annotate(
+            total=Count('id')
+        ).values('total')
+        return Coalesce(Subquery(counts, output_field=IntegerField()), 0)
+
+
+class PlaceQuerySet(EngagementQuerySet):
+    """Place lookups through the indexed geohash column"""
+
+    def in_cells(self, prefixes):
+        """Places inside any of the geohash cells, as index range scans"""
+        condition = Q()
+        for prefix in prefixes:
+            condition |= Q(geohash__gte=prefix, geohash__lt=prefix + '~')
+        return self.filter(condition)
+
+    def within(self, latitude, longitude, radius_km):
+        """
+        Places within radius_km, filtered entirely in SQL so the result can be
+        used as a subquery however many places match: the geohash cells narrow
+        the rows through the index, then a haversine expression on those
+        candidates drops the ones outside the radius.
+        """
+        lat, lng = math.radians(latitude), math.radians(longitude)
+        place_lat = Radians(Cast('latitude', FloatField()))
+        place_lng = Radians(Cast('longitude', FloatField()))
+        a = Power(Sin((place_lat - lat) / 2), 2) + math.cos(lat) * Cos(place_lat) * Power(Sin((place_lng - lng) / 2), 2)
+        return self.in_cells(geo.covering_cells(latitude, longitude, radius_km)).alias(
+            distance_km=2 * geo.EARTH_RADIUS_KM * ASin(Sqrt(a))
+        ).filter(distance_km__lte=radius_km)
+
+    def distances_within(self, latitude, longitude, radius_km):
+        """[(distance_km, id)] for places within radius_km, nearest first"""
+        candidates = self.in_cells(geo.covering_cells(latitude, longitude, radius_km))
+        found = []
+        for pk, place_lat, place_lng in candidates.values_list('id', 'latitude', 'longitude'):
+            distance = geo.haversine_km(latitude, longitude, float(place_lat), float(place_lng))
+            if distance <= radius_km:
+                found.append((distance, pk))
+        found.sort()
+        return found
+
+    def nearby(self, latitude, longitude, limit, radius_km=None, max_radius_km=50):
+        """
+        Nearest places first, each with a distance_km attribute.
+
+        With radius_km, at most limit places inside that radius; without it,
+        the limit nearest, searching rings that grow up to max_radius_km.
+        """
+        if radius_km is not None:
+            found = self.distances_within(latitude, longitude, radius_km)
+        else:
+            radius = min(1.0, max_radius_km)
+            while True:
+                found = self.distances_within(latitude, longitude, radius)
+                if len(found) >= limit or radius >= max_radius_km:
+                    break
+                radius = min(radius * 4, max_radius_km)
+        found = found[:limit]
+
+        places = self.in_bulk([pk for _, pk in found])
+        results = []
+        for distance, pk in found:
+            place = places[pk]
+            place.distance_km = round(distance, 3)
+            results.append(place)
+        return results
+
+
+class UserProfile(TimeStampedMixin, SoftDeleteMixin, EngagementCounterMixin, models.Model):
     user = models.OneToOneField(User, on_delete=models.CASCADE, related_name='profile')
     profile_picture = models.ImageField(upload_to='profiles/', blank=True, null=True)
     bio = models.CharField(max_length=300, blank=True)
@@ -24,22 +125,49 @@ class UserProfile(TimeStampedMixin, SoftDeleteMixin, models.Model):
     comments = GenericRelation(Comment)
     shares = GenericRelation(Share)
 
+    objects = EngagementQuerySet.as_manager()
 
-    @property
-    def like_count(self):
-        return self.likes.count()
-
-    @property
-    def comment_count(self):
-        return self.comments.count()
-
-    @property
-    def share_count(self):
-        return self.shares.count()
+    ENGAGEMENT_TOTALS_TIMEOUT = 60 * 10
 
     def __str__(self):
         return self.user.username
 
+    @staticmethod
+    def engagement_totals_key(user_id):
+        return f"profile:engagement_totals:{user_id}"
+
+    def get_engagement_totals(self):
+        """Media count and engagement received across the user's media, one aggregate query, cached per user"""
+        if not hasattr(self, '_engagement_totals'):
+            key = self.engagement_totals_key(self.user_id)
+            totals = cache.get(key)
+            if totals is None:
+                totals = Media.objects.filter(uploaded_by_id=self.user_id, is_deleted=False).aggregate(
+                    total_videos=Count('id'),
+                    total_likes_received=Coalesce(Sum('like_count'), 0),
+                    total_comments_received=Coalesce(Sum('comment_count'), 0),
+                    total_shares_received=Coalesce(Sum('share_count'), 0),
+                )
+                cache.set(key, totals, self.ENGAGEMENT_TOTALS_TIMEOUT)
+            self._engagement_totals = totals
+        return self._engagement_totals
+
+    @classmethod
+    def invalidate_engagement_totals(cls, user_id):
+        # The cached profile header embeds these totals, so it goes too. Deleted on
+        # commit: a read before then would cache the old totals again.
+        keys = [cls.engagement_totals_key(user_id), cls.header_cache_key(user_id)]
+        transaction.on_commit(lambda: cache.delete_many(keys))
+
+    @staticmethod
+    def header_cache_key(user_id):
+        return f"profile:header:{user_id}"
+
+    @classmethod
+    def invalidate_header(cls, user_id):
+        key = cls.header_cache_key(user_id)
+        transaction.on_commit(lambda: cache.delete(key))
+
 class City(TimeStampedMixin, SoftDeleteMixin, models.Model):
     name = models.CharField(max_length=100, unique=True)
     province = models.CharField(max_length=100, choices=Provinces, default='punjab')
@@ -53,7 +181,7 @@ class Category(TimeStampedMixin, SoftDeleteMixin, models.Model):
     def __str__(self):
         return self.name
 
-class Place(TimeStampedMixin, SoftDeleteMixin, models.Model):
+class Place(TimeStampedMixin, SoftDeleteMixin, EngagementCounterMixin, models.Model):
     name = models.CharField(max_length=255)
     description = models.TextField(blank=True)
     category = models.ForeignKey(Category, on_delete=models.SET_NULL, null=True, blank=True)
@@ -61,26 +189,95 @@ class Place(TimeStampedMixin, SoftDeleteMixin, models.Model):
     latitude = models.DecimalField(max_digits=9, decimal_places=6)
     longitude = models.DecimalField(max_digits=9, decimal_places=6)
     created_by = models.ForeignKey(User, on_delete=models.CASCADE)
+    geohash = models.CharField(max_length=12, blank=True, editable=False, help_text="Derived from latitude/longitude on save")
     likes = GenericRelation(Like)
     comments = GenericRelation(Comment)
     shares = GenericRelation(Share)
 
-    @property
-    def like_count(self):
-        return self.likes.count()
-
-    @property
-    def comment_count(self):
-        return self.comments.count()
+    objects = PlaceQuerySet.as_manager()
 
-    @property
-    def share_count(self):
-        return self.shares.count()
+    class Meta:
+        indexes = [
+            # Covers the nearby candidate scan (cell ranges, then id/latitude/longitude) without table reads
+            models.Index(fields=['geohash', 'is_deleted', 'latitude', 'longitude']),
+            # Bounding-box reads for map clusters, grouped by geohash prefix without table reads
+            models.Index(fields=['latitude', 'longitude', 'is_deleted', 'geohash']),
+        ]
 
     def __str__(self):
         return self.name
 
-class Media(TimeStampedMixin, SoftDeleteMixin, models.Model):
+    def save(self, *args, **kwargs):
+        self.geohash = geo.encode(float(self.latitude), float(self.longitude))
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and {'latitude', 'longitude'} & set(update_fields):
+            kwargs['update_fields'] = {*update_fields, 'geohash'}
+        super().save(*args, **kwargs)
+
+class MediaBlob(TimeStampedMixin, models.Model):
+    """
+    Uploaded file content, stored once per SHA-256 under blobs/ab/cd/<sha256><ext>.
+
+    Every Media row holding the same bytes points at one blob; ref_count
+    tracks them and the file is removed when the last one is deleted.
+    """
+    sha256 = models.CharField(max_length=64, unique=True)
+    file = models.FileField(upload_to='blobs/', max_length=255)
+    size = models.BigIntegerField()
+    ref_count = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.sha256} ({self.ref_count} refs)"
+
+    @staticmethod
+    def path_for(digest, filename):
+        extension = os.path.splitext(filename)[1].lower()
+        return f"blobs/{digest[:2]}/{digest[2:4]}/{digest}{extension}"
+
+    @classmethod
+    def acquire(cls, file, digest):
+        """Blob for this content with one more reference, writing the file only if it is new"""
+        storage = cls._meta.get_field('file').storage
+        while True:
+            blob = cls.objects.filter(sha256=digest).first()
+            if blob is None:
+                path = cls.path_for(digest, file.name)
+                name = path if storage.exists(path) else storage.save(path, file)
+                blob, created = cls.objects.get_or_create(sha256=digest, defaults={'file': name, 'size': file.size})
+                if not created and name != blob.file.name:
+                    # Lost a race with an identical upload; keep the winner's copy
+                    storage.delete(name)
+            # Zero rows means the blob was collected in between; start over
+            if cls.objects.filter(pk=blob.pk).update(ref_count=F('ref_count') + 1):
+                blob.ref_count += 1
+                return blob
+
+    @classmethod
+    def release(cls, blob_id):
+        """Drop one reference and collect the blob when none are left"""
+        cls.objects.filter(pk=blob_id).update(ref_count=Greatest(F('ref_count') - 1, 0))
+        cls.collect(cls.objects.filter(pk=blob_id, ref_count=0))
+
+    @classmethod
+    def collect(cls, queryset):
+        """Delete unreferenced blobs in queryset; their files go once the transaction commits"""
+        names = list(queryset.filter(ref_count=0).values_list('file', flat=True))
+        if not names:
+            return 0
+        deleted, _ = queryset.filter(ref_count=0).delete()
+        storage = cls._meta.get_field('file').storage
+
+        def delete_files():
+            # An identical upload may have re-created the blob at the same path
+            in_use = set(cls.objects.filter(file__in=names).values_list('file', flat=True))
+            for name in names:
+                if name not in in_use:
+                    storage.delete(name)
+
+        transaction.on_commit(delete_files)
+        return deleted
+
+class Media(TimeStampedMixin, SoftDeleteMixin, EngagementCounterMixin, models.Model):
     """Unified model for both photos and videos"""
     
     
@@ -91,10 +288,27 @@ class Media(TimeStampedMixin, SoftDeleteMixin, models.Model):
     thumbnail = models.ImageField(upload_to="thumbnails/", blank=True, null=True, help_text="Auto-generated thumbnail for videos")
     place = models.ForeignKey(Place, on_delete=models.SET_NULL, null=True, blank=True)
     uploaded_by = models.ForeignKey(User, on_delete=models.CASCADE, related_name='uploaded_media')
+    blob = models.ForeignKey(
+        MediaBlob, on_delete=models.PROTECT, null=True, blank=True, related_name='media',
+        help_text="Shared content-addressed file; empty for media stored before deduplication"
+    )
     is_public = models.BooleanField(default=True, help_text="Whether this media is visible to other users")
+    file_size = models.BigIntegerField(null=True, blank=True, help_text="File size in bytes, captured at upload")
+    width = models.PositiveIntegerField(null=True, blank=True)
+    height = models.PositiveIntegerField(null=True, blank=True)
+    duration = models.FloatField(null=True, blank=True, help_text="Video duration in seconds")
+    codec = models.CharField(max_length=20, blank=True, help_text="Image format or video codec (e.g. jpeg, avc1), sniffed at upload")
+    processing_status = models.CharField(
+        max_length=10,
+        choices=ProcessingStatus.choices,
+        default=ProcessingStatus.READY,
+        help_text="State of thumbnail generation and other post-upload jobs"
+    )
     likes = GenericRelation(Like)
     comments = GenericRelation(Comment)
     shares = GenericRelation(Share)
+
+    objects = EngagementQuerySet.as_manager()
     
     class Meta:
         ordering = ['-created_at']
@@ -102,32 +316,167 @@ class Media(TimeStampedMixin, SoftDeleteMixin, models.Model):
             models.Index(fields=['uploaded_by', '-created_at']),
             models.Index(fields=['media_type', '-created_at']),
             models.Index(fields=['is_public', '-created_at']),
+            models.Index(fields=['place', '-created_at']),
+            models.Index(fields=['file']),  # Media access checks by served path
+            models.Index(fields=['thumbnail']),
         ]
 
     @property
-    def like_count(self):
-        return self.likes.count()
+    def file_size_mb(self):
+        """Get file size in MB from the stored size (no storage round trip)"""
+        return round((self.file_size or 0) / (1024 * 1024), 2)
 
-    @property
-    def comment_count(self):
-        return self.comments.count()
+    def __str__(self):
+        return self.title or f"{self.get_media_type_display()} {self.id}"
+
+    # Fields whose previous value signal receivers need to see
+    TRACKED_FIELDS = ('place_id', 'is_public', 'is_deleted')
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._remember_tracked_fields()
+        return instance
+
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        self._remember_tracked_fields()
+
+    def _remember_tracked_fields(self):
+        self._loaded_values = {field: self.__dict__[field] for field in self.TRACKED_FIELDS if field in self.__dict__}
+
+    def loaded_value(self, field):
+        """Value of a tracked field as last loaded or saved (None for unsaved media)"""
+        return getattr(self, '_loaded_values', {}).get(field)
+
+    @classmethod
+    def counter_changed(cls, pk):
+        """Engagement on a media item changes its uploader's profile totals"""
+        user_id = cls.objects.filter(pk=pk).values_list('uploaded_by_id', flat=True).first()
+        if user_id is not None:
+            UserProfile.invalidate_engagement_totals(user_id)
+
+class MediaRendition(TimeStampedMixin, models.Model):
+    """Resized copy of a photo at a fixed width, served to clients via srcset"""
+    media = models.ForeignKey(Media, on_delete=models.CASCADE, related_name='renditions')
+    width = models.PositiveIntegerField()
+    height = models.PositiveIntegerField()
+    format = models.CharField(max_length=10, choices=RenditionFormat.choices)
+    file = models.FileField(upload_to='renditions/')
+    file_size = models.BigIntegerField(default=0)
+
+    class Meta:
+        unique_together = ('media', 'width', 'format')
+        ordering = ['width']
+        indexes = [
+            models.Index(fields=['file']),  # Media access checks by served path
+        ]
+
+    def __str__(self):
+        return f"{self.media_id} @ {self.width}px ({self.format})"
+
+class MediaJob(TimeStampedMixin, models.Model):
+    """Background job queued for a media item, claimed by the media job worker"""
+    media = models.ForeignKey(Media, on_delete=models.CASCADE, related_name='jobs')
+    kind = models.CharField(max_length=20, choices=MediaJobKind.choices)
+    status = models.CharField(max_length=10, choices=MediaJobStatus.choices, default=MediaJobStatus.PENDING)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    run_after = models.DateTimeField(default=timezone.now, help_text="Not claimed before this time (retry backoff)")
+    last_error = models.TextField(blank=True)
+
+    class Meta:
+        ordering = ['run_after']
+        indexes = [
+            models.Index(fields=['status', 'run_after']),
+        ]
+
+    def __str__(self):
+        return f"{self.get_kind_display()} for media {self.media_id} ({self.status})"
+
+class TimelineEntry(models.Model):
+    """Materialized home timeline row, written when media is fanned out to followers"""
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='timeline_entries')
+    media = models.ForeignKey(Media, on_delete=models.CASCADE, related_name='timeline_entries')
+    author = models.ForeignKey(User, on_delete=models.CASCADE, related_name='+')
+    created_at = models.DateTimeField(help_text="Copy of the media's created_at so reads never join Media to sort")
+
+    class Meta:
+        unique_together = ('user', 'media')
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['user', '-created_at', '-media']),
+            models.Index(fields=['user', 'author']),
+        ]
+
+    def __str__(self):
+        return f"{self.media_id} on {self.user_id}'s timeline"
+
+class UploadSession(TimeStampedMixin, models.Model):
+    """Resumable chunked upload; chunks land in a part file that becomes a Media file on completion"""
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='upload_sessions')
+    filename = models.CharField(max_length=255)
+    media_type = models.CharField(max_length=10, choices=MEDIA_TYPES.choices)
+    total_size = models.BigIntegerField()
+    title = models.CharField(max_length=255, blank=True)
+    description = models.TextField(blank=True)
+    place = models.ForeignKey(Place, on_delete=models.SET_NULL, null=True, blank=True)
+    is_public = models.BooleanField(default=True)
+    status = models.CharField(max_length=12, choices=UploadSessionStatus.choices, default=UploadSessionStatus.ACTIVE)
+    expires_at = models.DateTimeField()
+    media = models.ForeignKey(Media, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['status', 'expires_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.filename} by {self.user.username} ({self.status})"
 
     @property
-    def share_count(self):
-        return self.shares.count()
-    
-    @property
-    def file_size(self):
-        """Get file size in bytes"""
-        try:
-            return self.file.size
-        except (ValueError, OSError):
-            return 0
-    
+    def part_path(self):
+        """Local file the chunks are written into"""
+        return os.path.join(settings.UPLOAD_SESSION_DIR, f"{self.pk}.part")
+
     @property
-    def file_size_mb(self):
-        """Get file size in MB"""
-        return round(self.file_size / (1024 * 1024), 2)
+    def is_expired(self):
+        return self.expires_at <= timezone.now()
+
+    def received_ranges(self):
+        """Merged [start, end) byte ranges stored so far"""
+        ranges = []
+        for offset, size in self.chunks.order_by('offset').values_list('offset', 'size'):
+            end = offset + size
+            if ranges and offset <= ranges[-1][1]:
+                ranges[-1][1] = max(ranges[-1][1], end)
+            else:
+                ranges.append([offset, end])
+        return ranges
+
+    def missing_ranges(self, received=None):
+        """[start, end) byte ranges still to upload"""
+        missing = []
+        position = 0
+        for start, end in self.received_ranges() if received is None else received:
+            if start > position:
+                missing.append([position, start])
+            position = max(position, end)
+        if position < self.total_size:
+            missing.append([position, self.total_size])
+        return missing
+
+class UploadChunk(models.Model):
+    """One stored byte range of an upload session; re-sending the same offset replaces it"""
+    session = models.ForeignKey(UploadSession, on_delete=models.CASCADE, related_name='chunks')
+    offset = models.BigIntegerField()
+    size = models.PositiveIntegerField()
+    created_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        unique_together = ('session', 'offset')
+        ordering = ['offset']
 
     def __str__(self):
-        return self.title or f"{self.get_media_type_display()} {self.id}"
+        return f"{self.session_id} [{self.offset}, {self.offset + self.size})"
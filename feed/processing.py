@@ -0,0 +1,102 @@
+import io
+import os
+import shutil
+import subprocess
+import tempfile
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from PIL import Image, ImageOps
+
+from core.caching import bump_cache_version
+from feed.enums import MEDIA_TYPES, RenditionFormat
+from feed.models import MediaRendition
+
+# Pillow encoder name and options per rendition format
+RENDITION_ENCODERS = {
+    RenditionFormat.WEBP: ('WEBP', {'quality': 80, 'method': 4}),
+    RenditionFormat.JPEG: ('JPEG', {'quality': 82, 'optimize': True, 'progressive': True}),
+}
+
+
+# -----------------------------
+# 🖼️ Media processing
+# -----------------------------
+
+def generate_thumbnail(media):
+    """Write a JPEG thumbnail for a photo, or a video's first-second frame when ffmpeg is available"""
+    if media.media_type == MEDIA_TYPES.PHOTO:
+        with media.file.open('rb'):
+            image = Image.open(media.file)
+            image.load()
+    else:
+        image = _extract_video_frame(media)
+        if image is None:
+            return
+
+    image = ImageOps.exif_transpose(image)
+    image.thumbnail(settings.THUMBNAIL_SIZE)
+    buffer = io.BytesIO()
+    image.convert('RGB').save(buffer, 'JPEG', quality=82, optimize=True)
+
+    if media.thumbnail:
+        media.thumbnail.delete(save=False)
+    media.thumbnail.save(f"{media.pk}.jpg", ContentFile(buffer.getvalue()), save=False)
+    media.save(update_fields=['thumbnail', 'updated_at'])
+
+
+def generate_renditions(media):
+    """Store each configured width (smaller than the original) in each rendition format"""
+    with media.file.open('rb'):
+        original = Image.open(media.file)
+        original.load()
+    original = ImageOps.exif_transpose(original).convert('RGB')
+
+    for rendition in media.renditions.all():
+        rendition.file.delete(save=False)
+    media.renditions.all().delete()
+
+    renditions = []
+    for width in sorted(settings.MEDIA_RENDITION_WIDTHS):
+        if width >= original.width:
+            break
+        height = round(original.height * width / original.width)
+        resized = original.resize((width, height), Image.LANCZOS)
+        for fmt in settings.MEDIA_RENDITION_FORMATS:
+            encoder, options = RENDITION_ENCODERS[fmt]
+            buffer = io.BytesIO()
+            resized.save(buffer, encoder, **options)
+            rendition = MediaRendition(media=media, width=width, height=height, format=fmt, file_size=buffer.tell())
+            extension = 'jpg' if fmt == RenditionFormat.JPEG else fmt
+            rendition.file.save(f"{media.pk}_{width}.{extension}", ContentFile(buffer.getvalue()), save=False)
+            renditions.append(rendition)
+
+    MediaRendition.objects.bulk_create(renditions)
+    # Renditions are written without saving Media, so cached feeds need an explicit bump
+    bump_cache_version('media')
+
+
+def _extract_video_frame(media):
+    """Grab a frame with ffmpeg; None when ffmpeg is not installed"""
+    ffmpeg = shutil.which('ffmpeg')
+    if ffmpeg is None:
+        return None
+
+    with tempfile.TemporaryDirectory() as workdir:
+        source = os.path.join(workdir, 'source')
+        with media.file.open('rb'), open(source, 'wb') as out:
+            for chunk in media.file.chunks():
+                out.write(chunk)
+        result = subprocess.run(
+            [ffmpeg, '-v', 'error', '-ss', '1', '-i', source, '-frames:v', '1', '-f', 'image2pipe', '-vcodec', 'png', '-'],
+            capture_output=True, timeout=60,
+        )
+        if result.returncode != 0 or not result.stdout:
+            # Clips shorter than a second: take the very first frame
+            result = subprocess.run(
+                [ffmpeg, '-v', 'error', '-i', source, '-frames:v', '1', '-f', 'image2pipe', '-vcodec', 'png', '-'],
+                capture_output=True, timeout=60, check=True,
+            )
+    image = Image.open(io.BytesIO(result.stdout))
+    image.load()
+    return image
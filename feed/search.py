@@ -0,0 +1,243 @@
+import re
+from abc import ABC, abstractmethod
+from functools import lru_cache
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db import connection, transaction
+from django.db.models import Case, IntegerField, Q, Value, When
+from django.utils.module_loading import import_string
+
+from feed.models import Media, Place, UserProfile
+
+TABLE = 'feed_search_index'
+TOKEN = re.compile(r'\w+', re.UNICODE)
+
+
+# -----------------------------
+# 🔍 Search documents
+# -----------------------------
+# Every searchable row becomes a (title, body) document of one kind. Backends
+# only see documents, so adding a kind means adding an entry here.
+
+def place_document(place):
+    city = place.city.name if place.city_id else ''
+    return place.name, f"{place.description} {city}".strip()
+
+
+def media_document(media):
+    return media.title or '', media.description
+
+
+def user_document(user):
+    try:
+        bio = user.profile.bio or ''
+    except UserProfile.DoesNotExist:
+        bio = ''
+    return f"{user.username} {user.get_full_name()}".strip(), bio
+
+
+class DocumentKind:
+    def __init__(self, name, code, model, searchable, document, fields):
+        self.name = name
+        self.code = code  # Packed into the FTS rowid next to the primary key
+        self.model = model
+        self.searchable = searchable  # Callable returning the rows that belong in the index
+        self.document = document
+        self.fields = fields  # Model fields whose changes require reindexing
+
+
+KINDS = {
+    kind.name: kind for kind in (
+        DocumentKind(
+            'place', 1, Place,
+            lambda: Place.objects.filter(is_deleted=False).select_related('city'),
+            place_document, {'name', 'description', 'city', 'is_deleted'},
+        ),
+        DocumentKind(
+            'media', 2, Media,
+            lambda: Media.objects.filter(is_deleted=False, is_public=True).select_related(
+                'uploaded_by__profile', 'place__city'
+            ).prefetch_related('renditions'),
+            media_document, {'title', 'description', 'is_public', 'is_deleted'},
+        ),
+        DocumentKind(
+            'user', 3, User,
+            lambda: User.objects.filter(is_active=True).select_related('profile'),
+            user_document, {'username', 'first_name', 'last_name', 'is_active'},
+        ),
+    )
+}
+
+MODEL_KINDS = {kind.model: kind.name for kind in KINDS.values()}
+
+
+def query_tokens(query):
+    return TOKEN.findall(query.lower())
+
+
+# -----------------------------
+# 🧰 Backends
+# -----------------------------
+
+class SearchBackend(ABC):
+    """Interface for search backends; results are [(kind, pk)] best first"""
+
+    @abstractmethod
+    def index(self, kind, pk, title, body):
+        """Add or replace one document"""
+
+    @abstractmethod
+    def remove(self, kind, pk):
+        """Drop one document if it is indexed"""
+
+    @abstractmethod
+    def rebuild(self, documents):
+        """Replace the whole index with (kind, pk, title, body) tuples"""
+
+    @abstractmethod
+    def search(self, query, kinds, limit):
+        """Up to limit (kind, pk) matches for query among kinds"""
+
+
+class SQLiteFTSBackend(SearchBackend):
+    """
+    FTS5 inverted index in the feed_search_index virtual table.
+
+    The rowid packs the primary key and kind, so updates and deletes are rowid
+    lookups. Each query token matches as a prefix (typeahead) and results are
+    ranked by bm25 with titles weighted above bodies.
+    """
+    title_weight = 10.0
+    body_weight = 1.0
+
+    @staticmethod
+    def rowid(kind, pk):
+        return pk * 8 + KINDS[kind].code
+
+    def index(self, kind, pk, title, body):
+        rowid = self.rowid(kind, pk)
+        with connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {TABLE} WHERE rowid = %s", [rowid])
+            cursor.execute(
+                f"INSERT INTO {TABLE} (rowid, kind, title, body) VALUES (%s, %s, %s, %s)",
+                [rowid, kind, title, body],
+            )
+
+    def remove(self, kind, pk):
+        with connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {TABLE} WHERE rowid = %s", [self.rowid(kind, pk)])
+
+    def rebuild(self, documents):
+        with connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {TABLE}")
+            batch = []
+            for kind, pk, title, body in documents:
+                batch.append([self.rowid(kind, pk), kind, title, body])
+                if len(batch) >= 500:
+                    cursor.executemany(f"INSERT INTO {TABLE} (rowid, kind, title, body) VALUES (%s, %s, %s, %s)", batch)
+                    batch = []
+            if batch:
+                cursor.executemany(f"INSERT INTO {TABLE} (rowid, kind, title, body) VALUES (%s, %s, %s, %s)", batch)
+            cursor.execute(f"INSERT INTO {TABLE} ({TABLE}) VALUES ('optimize')")
+
+    def search(self, query, kinds, limit):
+        tokens = query_tokens(query)
+        if not tokens:
+            return []
+        match = ' '.join(f'"{token}"*' for token in tokens)
+        placeholders = ', '.join(['%s'] * len(kinds))
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"SELECT rowid, kind FROM {TABLE} "
+                f"WHERE {TABLE} MATCH %s AND kind IN ({placeholders}) "
+                f"ORDER BY bm25({TABLE}, 0, %s, %s) LIMIT %s",
+                [match, *kinds, self.title_weight, self.body_weight, limit],
+            )
+            return [(kind, rowid // 8) for rowid, kind in cursor.fetchall()]
+
+
+class LikeBackend(SearchBackend):
+    """
+    Index-free fallback for databases without FTS5: every query scans the
+    searchable rows with icontains, ranking title prefix matches first.
+    """
+
+    lookups = {
+        'place': ('name', 'description'),
+        'media': ('title', 'description'),
+        'user': ('username', 'profile__bio'),
+    }
+
+    def index(self, kind, pk, title, body):
+        pass
+
+    def remove(self, kind, pk):
+        pass
+
+    def rebuild(self, documents):
+        pass
+
+    def search(self, query, kinds, limit):
+        tokens = query_tokens(query)
+        if not tokens:
+            return []
+        scored = []
+        for kind in kinds:
+            title_field, body_field = self.lookups[kind]
+            condition = Q()
+            for token in tokens:
+                condition &= Q(**{f'{title_field}__icontains': token}) | Q(**{f'{body_field}__icontains': token})
+            rank = Case(
+                When(**{f'{title_field}__istartswith': tokens[0]}, then=Value(0)),
+                When(**{f'{title_field}__icontains': tokens[0]}, then=Value(1)),
+                default=Value(2),
+                output_field=IntegerField(),
+            )
+            matches = KINDS[kind].searchable().prefetch_related(None).filter(condition).annotate(rank=rank).order_by('rank', '-pk')
+            scored += [(rank, kind, pk) for pk, rank in matches.values_list('pk', 'rank')[:limit]]
+        scored.sort(key=lambda item: item[0])
+        return [(kind, pk) for _, kind, pk in scored[:limit]]
+
+
+@lru_cache(maxsize=None)
+def get_backend():
+    return import_string(settings.SEARCH_BACKEND)()
+
+
+# -----------------------------
+# 🔄 Index maintenance
+# -----------------------------
+
+def update_document(kind, pk):
+    """Index or drop one row according to whether it is currently searchable"""
+    obj = KINDS[kind].searchable().filter(pk=pk).first()
+    backend = get_backend()
+    if obj is None:
+        backend.remove(kind, pk)
+    else:
+        backend.index(kind, pk, *KINDS[kind].document(obj))
+
+
+def iter_documents():
+    for kind in KINDS.values():
+        for obj in kind.searchable().iterator(chunk_size=500):
+            yield (kind.name, obj.pk, *kind.document(obj))
+
+
+def rebuild_index():
+    with transaction.atomic():
+        get_backend().rebuild(iter_documents())
+
+
+def search(query, kinds=None, limit=20):
+    """Matching objects, best first, as [(kind, obj)]"""
+    kinds = list(kinds or KINDS)
+    hits = get_backend().search(query, kinds, limit)
+
+    by_kind = {}
+    for kind, pk in hits:
+        by_kind.setdefault(kind, []).append(pk)
+    loaded = {kind: KINDS[kind].searchable().in_bulk(pks) for kind, pks in by_kind.items()}
+    # Rows that stopped being searchable since they were indexed are skipped
+    return [(kind, loaded[kind][pk]) for kind, pk in hits if pk in loaded[kind]]
@@ -1,16 +1,54 @@
 from rest_framework import serializers
-from .models import UserProfile, City, Media, Place
+from core.media_urls import get_media_url_resolver
+from .models import UserProfile, City, Media, MediaBlob, Place, UploadSession
+from .uploads import file_digest, inspect_upload, validate_upload
+from django.conf import settings
 from django.contrib.auth.models import User
+from django.contrib.contenttypes.models import ContentType
+from django.db.models import CharField, Value
+from django.db.models.manager import BaseManager
+from social.models import Like, Comment
 
 # Legacy VideoFeedSerializer removed - use MediaFeedSerializer instead
 
-class UserMediaSerializer(serializers.ModelSerializer):
+class EngagementCountField(serializers.ReadOnlyField):
+    """Engagement count that prefers a with_engagement() annotation over the stored column"""
+
+    def get_attribute(self, instance):
+        live = getattr(instance, f"live_{self.source}", None)
+        if live is not None:
+            return live
+        return super().get_attribute(instance)
+
+
+class RenditionsMixin(serializers.Serializer):
+    """Adds the responsive image renditions of a media item (prefetch 'renditions' for lists)"""
+    renditions = serializers.SerializerMethodField()
+    srcset = serializers.SerializerMethodField()
+
+    def get_renditions(self, obj):
+        """Map of format -> {width: url}"""
+        resolver = get_media_url_resolver(self.context)
+        renditions = {}
+        for rendition in obj.renditions.all():
+            renditions.setdefault(rendition.format, {})[str(rendition.width)] = resolver.url(rendition.file)
+        return renditions
+
+    def get_srcset(self, obj):
+        """Ready-made srcset attribute per format"""
+        return {
+            fmt: ", ".join(f"{url} {width}w" for width, url in urls.items())
+            for fmt, urls in self.get_renditions(obj).items()
+        }
+
+
+class UserMediaSerializer(RenditionsMixin, serializers.ModelSerializer):
     """Serializer for user's own media in profile"""
     url = serializers.SerializerMethodField()
     thumbnail_url = serializers.SerializerMethodField()
-    like_count = serializers.ReadOnlyField()
-    comment_count = serializers.ReadOnlyField()
-    share_count = serializers.ReadOnlyField()
+    like_count = EngagementCountField()
+    comment_count = EngagementCountField()
+    share_count = EngagementCountField()
     file_size_mb = serializers.ReadOnlyField()
     place_name = serializers.CharField(source="place.name", read_only=True)
     place_city = serializers.CharField(source="place.city.name", read_only=True)
@@ -19,20 +57,17 @@ class UserMediaSerializer(serializers.ModelSerializer):
         model = Media
         fields = [
             "id", "title", "description", "url", "thumbnail_url",
+            "renditions", "srcset",
             "media_type", "place_name", "place_city", "is_public",
             "like_count", "comment_count", "share_count", 
-            "file_size_mb", "created_at"
+            "file_size_mb", "processing_status", "created_at"
         ]
 
     def get_url(self, obj):
-        request = self.context.get("request")
-        return request.build_absolute_uri(obj.file.url)
+        return get_media_url_resolver(self.context).url(obj.file)
     
     def get_thumbnail_url(self, obj):
-        if obj.thumbnail:
-            request = self.context.get("request")
-            return request.build_absolute_uri(obj.thumbnail.url)
-        return None
+        return get_media_url_resolver(self.context).url(obj.thumbnail)
 
 class CitySerializer(serializers.ModelSerializer):
     """Serializer for city information"""
@@ -41,14 +76,13 @@ class CitySerializer(serializers.ModelSerializer):
         fields = ["id", "name", "province"]
 
 class UserProfileSerializer(serializers.ModelSerializer):
-    """Comprehensive user profile serializer"""
+    """Profile header: user details and totals (media is paged separately)"""
     username = serializers.CharField(source="user.username", read_only=True)
     email = serializers.CharField(source="user.email", read_only=True)
     first_name = serializers.CharField(source="user.first_name", read_only=True)
     last_name = serializers.CharField(source="user.last_name", read_only=True)
     profile_picture_url = serializers.SerializerMethodField()
     city_info = CitySerializer(source="city", read_only=True)
-    uploaded_media = UserMediaSerializer(source="user.uploaded_media", many=True, read_only=True)
     total_videos = serializers.SerializerMethodField()
     total_likes_received = serializers.SerializerMethodField()
     total_comments_received = serializers.SerializerMethodField()
@@ -65,7 +99,6 @@ class UserProfileSerializer(serializers.ModelSerializer):
             "bio",
             "city_info",
             "age_group",
-            "uploaded_media",
             "total_videos",
             "total_likes_received",
             "total_comments_received",
@@ -74,34 +107,22 @@ class UserProfileSerializer(serializers.ModelSerializer):
         ]
 
     def get_profile_picture_url(self, obj):
-        if obj.profile_picture:
-            request = self.context.get("request")
-            return request.build_absolute_uri(obj.profile_picture.url)
-        return None
+        return get_media_url_resolver(self.context).url(obj.profile_picture)
 
     def get_total_videos(self, obj):
-        return obj.user.uploaded_media.filter(is_deleted=False).count()
+        return obj.get_engagement_totals()["total_videos"]
 
     def get_total_likes_received(self, obj):
-        """Calculate total likes received on all user's media"""
-        total_likes = 0
-        for media in obj.user.uploaded_media.filter(is_deleted=False):
-            total_likes += media.like_count
-        return total_likes
+        """Total likes received on all user's media"""
+        return obj.get_engagement_totals()["total_likes_received"]
 
     def get_total_comments_received(self, obj):
-        """Calculate total comments received on all user's media"""
-        total_comments = 0
-        for media in obj.user.uploaded_media.filter(is_deleted=False):
-            total_comments += media.comment_count
-        return total_comments
+        """Total comments received on all user's media"""
+        return obj.get_engagement_totals()["total_comments_received"]
 
     def get_total_shares_received(self, obj):
-        """Calculate total shares received on all user's media"""
-        total_shares = 0
-        for media in obj.user.uploaded_media.filter(is_deleted=False):
-            total_shares += media.share_count
-        return total_shares
+        """Total shares received on all user's media"""
+        return obj.get_engagement_totals()["total_shares_received"]
 
 
 # -----------------------------
@@ -124,21 +145,10 @@ class MediaUploadSerializer(serializers.ModelSerializer):
         if not value:
             raise serializers.ValidationError("No file provided")
         
-        # Check file size (max 100MB)
-        max_size = 100 * 1024 * 1024  # 100MB
-        if value.size > max_size:
-            raise serializers.ValidationError("File size cannot exceed 100MB")
-        
-        # Check file type based on media_type
-        media_type = self.initial_data.get('media_type')
-        if media_type == 'photo':
-            allowed_extensions = ['.jpg', '.jpeg', '.png', '.gif', '.webp']
-            if not any(value.name.lower().endswith(ext) for ext in allowed_extensions):
-                raise serializers.ValidationError("Invalid photo format. Allowed: JPG, PNG, GIF, WebP")
-        elif media_type == 'video':
-            allowed_extensions = ['.mp4', '.avi', '.mov', '.wmv', '.flv', '.webm']
-            if not any(value.name.lower().endswith(ext) for ext in allowed_extensions):
-                raise serializers.ValidationError("Invalid video format. Allowed: MP4, AVI, MOV, WMV, FLV, WebM")
+        media_type = self.initial_data.get('media_type') or getattr(self.instance, 'media_type', None)
+        validate_upload(value.name, value.size, media_type)
+        # Content checks and metadata come from one read of the file's headers
+        self.file_info = inspect_upload(value, media_type)
         
         return value
     
@@ -151,42 +161,149 @@ class MediaUploadSerializer(serializers.ModelSerializer):
     def create(self, validated_data):
         """Create media instance with uploaded_by user"""
         validated_data['uploaded_by'] = self.context['request'].user
+        self._capture_file_metadata(validated_data)
+        self._store_blob(validated_data)
         return super().create(validated_data)
+    
+    def update(self, instance, validated_data):
+        """Update media, re-reading file metadata if the file was replaced"""
+        if 'file' not in validated_data:
+            return super().update(instance, validated_data)
+        
+        self._capture_file_metadata(validated_data)
+        self._store_blob(validated_data)
+        previous_blob_id = instance.blob_id
+        instance = super().update(instance, validated_data)
+        if previous_blob_id:
+            MediaBlob.release(previous_blob_id)
+        return instance
+    
+    def _capture_file_metadata(self, validated_data):
+        """Store size, dimensions and codec once so feeds never stat the file"""
+        validated_data['file_size'] = validated_data['file'].size
+        validated_data.update(self.file_info)
+    
+    def _store_blob(self, validated_data):
+        """Point the media at the shared copy of its content, storing the file only if it is new"""
+        file = validated_data['file']
+        blob = MediaBlob.acquire(file, file_digest(file))
+        validated_data['blob'] = blob
+        validated_data['file'] = blob.file.name
 
 
-class MediaFeedSerializer(serializers.ModelSerializer):
+class UploadSessionSerializer(serializers.ModelSerializer):
+    """Starts a chunked upload; file checks run here so bad uploads fail before any bytes are sent"""
+    received_ranges = serializers.SerializerMethodField()
+    missing_ranges = serializers.SerializerMethodField()
+    chunk_max_size = serializers.SerializerMethodField()
+    
+    class Meta:
+        model = UploadSession
+        fields = [
+            'id', 'filename', 'media_type', 'total_size', 'title', 'description',
+            'place', 'is_public', 'status', 'expires_at', 'media',
+            'received_ranges', 'missing_ranges', 'chunk_max_size'
+        ]
+        read_only_fields = ['id', 'status', 'expires_at', 'media']
+    
+    def validate_total_size(self, value):
+        if value <= 0:
+            raise serializers.ValidationError("File is empty")
+        return value
+    
+    def validate(self, attrs):
+        try:
+            validate_upload(attrs['filename'], attrs['total_size'], attrs['media_type'])
+        except serializers.ValidationError as exc:
+            raise serializers.ValidationError({'filename': exc.detail})
+        return attrs
+    
+    def get_received_ranges(self, obj):
+        return obj.received_ranges()
+    
+    def get_missing_ranges(self, obj):
+        return obj.missing_ranges()
+    
+    def get_chunk_max_size(self, obj):
+        return settings.UPLOAD_CHUNK_MAX_SIZE
+
+
+class MediaFeedListSerializer(serializers.ListSerializer):
+    """List serializer that loads the viewer's likes/comments for the whole page up front"""
+
+    def to_representation(self, data):
+        items = list(data.all() if isinstance(data, BaseManager) else data)
+        self.child.load_viewer_engagement(items)
+        return super().to_representation(items)
+
+
+class MediaFeedSerializer(RenditionsMixin, serializers.ModelSerializer):
     """Serializer for displaying media in feed"""
     url = serializers.SerializerMethodField()
     thumbnail_url = serializers.SerializerMethodField()
     uploaded_by = serializers.SerializerMethodField()
     place_name = serializers.CharField(source="place.name", read_only=True)
     place_city = serializers.CharField(source="place.city.name", read_only=True)
-    like_count = serializers.ReadOnlyField()
-    comment_count = serializers.ReadOnlyField()
-    share_count = serializers.ReadOnlyField()
+    like_count = EngagementCountField()
+    comment_count = EngagementCountField()
+    share_count = EngagementCountField()
+    is_liked = serializers.SerializerMethodField()
+    is_commented = serializers.SerializerMethodField()
     file_size_mb = serializers.ReadOnlyField()
     time_ago = serializers.SerializerMethodField()
     
     class Meta:
         model = Media
+        list_serializer_class = MediaFeedListSerializer
         fields = [
             'id', 'title', 'description', 'url', 'thumbnail_url',
+            'renditions', 'srcset',
             'media_type', 'uploaded_by', 'place_name', 'place_city',
-            'like_count', 'comment_count', 'share_count', 
-            'file_size_mb', 'time_ago', 'created_at'
+            'like_count', 'comment_count', 'share_count',
+            'is_liked', 'is_commented',
+            'file_size_mb', 'processing_status', 'time_ago', 'created_at'
         ]
     
+    def get_is_liked(self, obj):
+        """Whether the requesting user has liked this media"""
+        return "like" in self.load_viewer_engagement([obj])[obj.pk]
+    
+    def get_is_commented(self, obj):
+        """Whether the requesting user has commented on this media"""
+        return "comment" in self.load_viewer_engagement([obj])[obj.pk]
+    
+    def load_viewer_engagement(self, media_items):
+        """Map media id -> {"like", "comment"} for the viewer, one query per batch, memoized in context"""
+        state = self.context.setdefault("viewer_engagement", {})
+        pending = [media.pk for media in media_items if media.pk not in state]
+        if not pending:
+            return state
+        for pk in pending:
+            state[pk] = set()
+        
+        request = self.context.get("request")
+        user = getattr(request, "user", None)
+        if user is None or not user.is_authenticated:
+            return state
+        
+        content_type = ContentType.objects.get_for_model(Media)
+        likes = Like.objects.filter(
+            user=user, content_type=content_type, object_id__in=pending
+        ).order_by().values_list("object_id", Value("like", output_field=CharField()))
+        comments = Comment.objects.filter(
+            user=user, content_type=content_type, object_id__in=pending, is_deleted=False
+        ).order_by().values_list("object_id", Value("comment", output_field=CharField()))
+        for object_id, kind in likes.union(comments, all=True):
+            state[object_id].add(kind)
+        return state
+    
     def get_url(self, obj):
         """Get full URL for the media file"""
-        request = self.context.get("request")
-        return request.build_absolute_uri(obj.file.url)
+        return get_media_url_resolver(self.context).url(obj.file)
     
     def get_thumbnail_url(self, obj):
         """Get thumbnail URL if available"""
-        if obj.thumbnail:
-            request = self.context.get("request")
-            return request.build_absolute_uri(obj.thumbnail.url)
-        return None
+        return get_media_url_resolver(self.context).url(obj.thumbnail)
     
     def get_uploaded_by(self, obj):
         """Get user information who uploaded the media"""
@@ -201,13 +318,9 @@ class MediaFeedSerializer(serializers.ModelSerializer):
     def _get_profile_picture_url(self, user):
         """Get user's profile picture URL"""
         try:
-            profile = user.profile
-            if profile.profile_picture:
-                request = self.context.get("request")
-                return request.build_absolute_uri(profile.profile_picture.url)
+            return get_media_url_resolver(self.context).url(user.profile.profile_picture)
         except UserProfile.DoesNotExist:
-            pass
-        return None
+            return None
     
     def get_time_ago(self, obj):
         """Get human-readable time difference"""
@@ -232,7 +345,21 @@ class MediaFeedSerializer(serializers.ModelSerializer):
 class PlaceSerializer(serializers.ModelSerializer):
     """Serializer for places"""
     city_name = serializers.CharField(source="city.name", read_only=True)
+    like_count = EngagementCountField()
+    comment_count = EngagementCountField()
+    share_count = EngagementCountField()
     
     class Meta:
         model = Place
-        fields = ['id', 'name', 'description', 'city_name', 'latitude', 'longitude']
+        fields = [
+            'id', 'name', 'description', 'city_name', 'latitude', 'longitude',
+            'like_count', 'comment_count', 'share_count'
+        ]
+
+
+class NearbyPlaceSerializer(PlaceSerializer):
+    """Place with its distance from the queried point"""
+    distance_km = serializers.ReadOnlyField()
+    
+    class Meta(PlaceSerializer.Meta):
+        fields = PlaceSerializer.Meta.fields + ['distance_km']
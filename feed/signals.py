@@ -0,0 +1,186 @@
+from django.contrib.auth.models import User
+from django.core.signals import request_started
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from core.caching import bump_cache_version
+from social.models import Follow
+from . import search, timeline
+from .autocomplete import place_index
+from .models import City, Media, MediaBlob, Place, UserProfile
+
+
+@receiver(post_save, sender=Media)
+@receiver(post_delete, sender=Media)
+def invalidate_profile_totals(sender, instance, **kwargs):
+    """Uploads, soft deletes and removals change the uploader's profile totals"""
+    UserProfile.invalidate_engagement_totals(instance.uploaded_by_id)
+
+
+@receiver(post_delete, sender=Media)
+def release_media_blob(sender, instance, **kwargs):
+    """hard_delete (and cascades from User/Place) drop a reference to the shared file"""
+    if instance.blob_id:
+        MediaBlob.release(instance.blob_id)
+
+
+@receiver(post_save, sender=UserProfile)
+def invalidate_profile_header(sender, instance, **kwargs):
+    """Profile edits change the cached profile header"""
+    UserProfile.invalidate_header(instance.user_id)
+
+
+@receiver(post_save, sender=User)
+def invalidate_user_profile_header(sender, instance, created, **kwargs):
+    """Name and email edits change the cached profile header"""
+    if not created:
+        UserProfile.invalidate_header(instance.pk)
+
+
+# -----------------------------
+# 🏠 Home timeline fan-out
+# -----------------------------
+
+TIMELINE_VISIBILITY_FIELDS = ('is_public', 'is_deleted')
+
+
+@receiver(post_save, sender=Media)
+def update_timelines(sender, instance, created, update_fields=None, **kwargs):
+    """Push new (or newly public) media to timelines, pull it back when hidden"""
+    if created:
+        transaction.on_commit(lambda: timeline.fan_out_media(instance))
+        return
+    if update_fields is not None and not set(update_fields) & set(TIMELINE_VISIBILITY_FIELDS):
+        # Counter, thumbnail and metadata updates
+        return
+    previous = [instance.loaded_value(field) for field in TIMELINE_VISIBILITY_FIELDS]
+    current = [getattr(instance, field) for field in TIMELINE_VISIBILITY_FIELDS]
+    if None not in previous and previous == current:
+        return
+    if instance.is_deleted or not instance.is_public:
+        transaction.on_commit(lambda: timeline.retract_media(instance))
+    else:
+        transaction.on_commit(lambda: timeline.fan_out_media(instance))
+
+
+@receiver(post_save, sender=Follow)
+def backfill_timeline(sender, instance, created, **kwargs):
+    """Seed the follower's timeline with recent media from the followed account"""
+    if created:
+        transaction.on_commit(lambda: timeline.backfill_follow(instance.follower_id, instance.following_id))
+
+
+@receiver(post_delete, sender=Follow)
+def clear_timeline(sender, instance, **kwargs):
+    """Drop the unfollowed account's media from the follower's timeline"""
+    transaction.on_commit(lambda: timeline.remove_follow(instance.follower_id, instance.following_id))
+
+
+# -----------------------------
+# 🗄️ Response cache versions
+# -----------------------------
+# Bumped on commit: a request served before then would cache the old rows
+# under the new version.
+
+@receiver(post_save, sender=Media)
+@receiver(post_delete, sender=Media)
+def invalidate_media_responses(sender, instance, **kwargs):
+    """Media changes invalidate cached public feeds"""
+    transaction.on_commit(lambda: bump_cache_version('media'))
+
+
+@receiver(post_save, sender=Place)
+@receiver(post_delete, sender=Place)
+@receiver(post_save, sender=City)
+@receiver(post_delete, sender=City)
+def invalidate_place_responses(sender, instance, **kwargs):
+    """Place and city names appear in both the places list and feed items"""
+    transaction.on_commit(lambda: bump_cache_version('places', 'media'))
+
+
+# -----------------------------
+# 🔍 Search index
+# -----------------------------
+
+def reindex_on_commit(kind, pk):
+    transaction.on_commit(lambda: search.update_document(kind, pk))
+
+
+@receiver(post_save, sender=Place)
+@receiver(post_save, sender=Media)
+@receiver(post_save, sender=User)
+def update_search_document(sender, instance, update_fields=None, **kwargs):
+    """Reindex rows whose searchable text or visibility may have changed"""
+    kind = search.MODEL_KINDS[sender]
+    if update_fields is not None and not set(update_fields) & search.KINDS[kind].fields:
+        # e.g. thumbnail and processing updates on Media
+        return
+    reindex_on_commit(kind, instance.pk)
+
+
+@receiver(post_delete, sender=Place)
+@receiver(post_delete, sender=Media)
+@receiver(post_delete, sender=User)
+def remove_search_document(sender, instance, **kwargs):
+    kind = search.MODEL_KINDS[sender]
+    pk = instance.pk
+    transaction.on_commit(lambda: search.get_backend().remove(kind, pk))
+
+
+@receiver(post_save, sender=UserProfile)
+def update_user_search_document(sender, instance, **kwargs):
+    """The bio is part of the user's document"""
+    reindex_on_commit('user', instance.user_id)
+
+
+@receiver(post_save, sender=City)
+def update_city_place_documents(sender, instance, created, **kwargs):
+    """City names are part of their places' documents"""
+    if not created:
+        for place_id in Place.objects.filter(city=instance).values_list('id', flat=True):
+            reindex_on_commit('place', place_id)
+
+
+# -----------------------------
+# ⌨️ Place autocomplete
+# -----------------------------
+
+@receiver(post_save, sender=Place)
+@receiver(post_delete, sender=Place)
+def update_place_autocomplete(sender, instance, update_fields=None, **kwargs):
+    if update_fields is not None and not set(update_fields) & {'name', 'city', 'is_deleted'}:
+        return
+    place_id = instance.pk
+    transaction.on_commit(lambda: place_index.refresh_places([place_id]))
+
+
+@receiver(post_save, sender=City)
+def update_city_autocomplete(sender, instance, created, **kwargs):
+    """City names are part of their places' autocomplete keys"""
+    if not created:
+        place_ids = list(Place.objects.filter(city=instance).values_list('id', flat=True))
+        transaction.on_commit(lambda: place_index.refresh_places(place_ids))
+
+
+@receiver(post_save, sender=Media)
+@receiver(post_delete, sender=Media)
+def update_place_popularity(sender, instance, update_fields=None, **kwargs):
+    """Autocomplete ranks places by their public media count"""
+    if update_fields is not None and not set(update_fields) & {'place', 'is_public', 'is_deleted'}:
+        return
+    # Moving media to another place changes both places' counts
+    place_ids = {instance.place_id, instance.loaded_value('place_id')} - {None}
+
+    def refresh():
+        for place_id in place_ids:
+            place_index.refresh_media_count(place_id)
+
+    transaction.on_commit(refresh)
+
+
+@receiver(request_started)
+def warm_place_autocomplete(sender, **kwargs):
+    """Build (and periodically rebuild) the index off the request path"""
+    if place_index.is_stale():
+        place_index.rebuild_in_background()
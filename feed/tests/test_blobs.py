@@ -0,0 +1,130 @@
+import os
+import time
+from io import StringIO
+from unittest import mock
+
+from django.core.files.base import ContentFile
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from feed.models import Media, MediaBlob
+from feed.tests.utils import MediaTestCase, image_bytes, make_user
+
+
+class MediaBlobTests(MediaTestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = make_user('uploader')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def upload(self, data, name='photo.png'):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(
+                reverse('media-upload'),
+                {'file': SimpleUploadedFile(name, data), 'media_type': 'photo'},
+                format='multipart',
+            )
+        self.assertEqual(response.status_code, 201, response.content)
+        return Media.objects.get(pk=response.json()['media']['id'])
+
+    def blob_path(self, blob):
+        return os.path.join(self.media_root, blob.file.name)
+
+    def test_identical_uploads_share_one_blob(self):
+        data = image_bytes(30, 30)
+        first, second = self.upload(data), self.upload(data, name='copy.png')
+        blob = MediaBlob.objects.get()
+        self.assertEqual((first.blob_id, second.blob_id), (blob.pk, blob.pk))
+        self.assertEqual(first.file.name, second.file.name)
+        self.assertEqual(blob.ref_count, 2)
+        self.assertTrue(blob.file.name.startswith(f"blobs/{blob.sha256[:2]}/{blob.sha256[2:4]}/"))
+
+        self.upload(image_bytes(31, 30))
+        self.assertEqual(MediaBlob.objects.count(), 2)
+
+    def test_replacing_the_file_moves_the_reference(self):
+        shared = image_bytes(30, 30)
+        media = self.upload(shared)
+        self.upload(shared)
+        old_blob = media.blob
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.patch(
+                reverse('media-update', args=[media.pk]),
+                {'file': SimpleUploadedFile('new.png', image_bytes(40, 30)), 'media_type': 'photo'},
+                format='multipart',
+            )
+        self.assertEqual(response.status_code, 200, response.content)
+        media.refresh_from_db()
+        self.assertNotEqual(media.blob_id, old_blob.pk)
+        self.assertEqual(media.blob.ref_count, 1)
+        old_blob.refresh_from_db()
+        self.assertEqual(old_blob.ref_count, 1)
+
+    def test_last_hard_delete_collects_the_blob_and_file(self):
+        data = image_bytes(30, 30)
+        first, second = self.upload(data), self.upload(data)
+        blob = MediaBlob.objects.get()
+        path = self.blob_path(blob)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            first.hard_delete()
+        blob.refresh_from_db()
+        self.assertEqual(blob.ref_count, 1)
+        self.assertTrue(os.path.exists(path))
+
+        # Soft deletes keep the reference
+        with self.captureOnCommitCallbacks(execute=True):
+            second.delete()
+        self.assertEqual(MediaBlob.objects.get().ref_count, 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            second.hard_delete()
+        self.assertFalse(MediaBlob.objects.exists())
+        self.assertFalse(os.path.exists(path))
+
+    def test_collect_only_deletes_unreferenced_blobs(self):
+        kept = self.upload(image_bytes(30, 30)).blob
+        orphan = MediaBlob.acquire(ContentFile(image_bytes(20, 20), name='x.png'), 'f' * 64)
+        MediaBlob.objects.filter(pk=orphan.pk).update(ref_count=0)
+
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            self.assertEqual(MediaBlob.collect(MediaBlob.objects.all()), 1)
+            # Files only go once the transaction commits
+            self.assertTrue(os.path.exists(self.blob_path(orphan)))
+        self.assertEqual(len(callbacks), 1)
+        self.assertFalse(os.path.exists(self.blob_path(orphan)))
+        self.assertEqual(list(MediaBlob.objects.all()), [kept])
+        self.assertTrue(os.path.exists(self.blob_path(kept)))
+
+    def test_gc_removes_files_left_by_rolled_back_uploads(self):
+        self.client.raise_request_exception = False
+        with mock.patch('feed.jobs.enqueue_processing', side_effect=RuntimeError):
+            response = self.client.post(
+                reverse('media-upload'),
+                {'file': SimpleUploadedFile('photo.png', image_bytes(30, 30)), 'media_type': 'photo'},
+                format='multipart',
+            )
+        self.assertEqual(response.status_code, 500)
+        self.assertFalse(MediaBlob.objects.exists())
+        blobs_dir = os.path.join(self.media_root, 'blobs')
+        stray = [os.path.join(root, name) for root, _, names in os.walk(blobs_dir) for name in names]
+        self.assertEqual(len(stray), 1)
+
+        kept = self.upload(image_bytes(40, 40)).blob
+        out = StringIO()
+        call_command('gc_media_blobs', stdout=out)
+        # Too recent: the upload might still be in flight
+        self.assertTrue(os.path.exists(stray[0]))
+
+        an_hour_ago = time.time() - 2 * 60 * 60
+        os.utime(stray[0], (an_hour_ago, an_hour_ago))
+        os.utime(self.blob_path(kept), (an_hour_ago, an_hour_ago))
+        call_command('gc_media_blobs', '--dry-run', stdout=out)
+        self.assertTrue(os.path.exists(stray[0]))
+        call_command('gc_media_blobs', stdout=out)
+        self.assertFalse(os.path.exists(stray[0]))
+        self.assertTrue(os.path.exists(self.blob_path(kept)))
+        self.assertIn('and 1 stray files', out.getvalue())
@@ -0,0 +1,100 @@
+import math
+
+from feed import geo
+from feed.models import Place
+from feed.tests.utils import MediaTestCase, make_user
+
+
+def destination(latitude, longitude, bearing_degrees, distance_km):
+    """Point distance_km from a start point along a bearing (spherical earth)"""
+    lat, lng, bearing = math.radians(latitude), math.radians(longitude), math.radians(bearing_degrees)
+    angle = distance_km / geo.EARTH_RADIUS_KM
+    lat2 = math.asin(math.sin(lat) * math.cos(angle) + math.cos(lat) * math.sin(angle) * math.cos(bearing))
+    lng2 = lng + math.atan2(
+        math.sin(bearing) * math.sin(angle) * math.cos(lat), math.cos(angle) - math.sin(lat) * math.sin(lat2)
+    )
+    return math.degrees(lat2), (math.degrees(lng2) + 540) % 360 - 180
+
+
+class GeohashTests(MediaTestCase):
+    def test_encode_and_bounds_agree(self):
+        self.assertEqual(geo.encode(57.64911, 10.40744, 11), 'u4pruydqqvj')
+        south, north, west, east = geo.bounds('u4pruydqqvj')
+        self.assertTrue(south <= 57.64911 <= north and west <= 10.40744 <= east)
+
+    def test_neighbors_wrap_the_antimeridian(self):
+        east_edge = geo.encode(0.0, 179.999, 5)
+        west_edge = geo.encode(0.0, -179.999, 5)
+        self.assertIn(west_edge, geo.neighbors(east_edge))
+        self.assertIn(east_edge, geo.neighbors(west_edge))
+        self.assertEqual(len(geo.neighbors(geo.encode(89.99, 0.0, 3))), 5)
+
+    def test_covering_cells_contain_every_point_in_the_radius(self):
+        centers = [
+            (31.5204, 74.3587),  # Lahore
+            (0.0, 0.0),  # corner of four top-level cells
+            (45.0, 22.5),  # on cell edges at several precisions
+            (-33.8688, 151.2093),
+            (0.0, 179.9999),  # antimeridian
+            (-16.5, -179.9999),
+            (64.1466, -21.9426),  # high latitude: cells narrow with the latitude
+            (78.2232, 15.6267),
+        ]
+        for latitude, longitude in centers:
+            for radius in (0.5, 5, 50):
+                cells = geo.covering_cells(latitude, longitude, radius)
+                for bearing in range(0, 360, 15):
+                    for fraction in (0.25, 0.5, 0.99):
+                        point = destination(latitude, longitude, bearing, radius * fraction)
+                        with self.subTest(center=(latitude, longitude), radius=radius, point=point):
+                            self.assertTrue(geo.encode(*point).startswith(tuple(cells)))
+
+    def test_parse_point(self):
+        self.assertEqual(geo.parse_point('31.5', '-74'), (31.5, -74.0))
+        for latitude, longitude in ((None, '1'), ('x', '1'), ('91', '0'), ('0', '-181')):
+            with self.subTest(point=(latitude, longitude)), self.assertRaises(ValueError):
+                geo.parse_point(latitude, longitude)
+
+
+class NearbyPlacesTests(MediaTestCase):
+    center = (31.5204, 74.3587)
+
+    def setUp(self):
+        super().setUp()
+        self.creator = make_user('creator')
+
+    def place_at(self, name, bearing, distance_km):
+        latitude, longitude = destination(*self.center, bearing, distance_km)
+        return Place.objects.create(
+            name=name, latitude=round(latitude, 6), longitude=round(longitude, 6), created_by=self.creator
+        )
+
+    def test_ring_search_orders_by_distance_and_stops_at_the_max_radius(self):
+        for name, bearing, distance in (('d30', 200, 30), ('d0.3', 10, 0.3), ('d3', 95, 3), ('d49', 300, 49),
+                                        ('d60', 45, 60), ('d0.8', 250, 0.8)):
+            self.place_at(name, bearing, distance)
+
+        places = Place.objects.nearby(*self.center, limit=10)
+        self.assertEqual([place.name for place in places], ['d0.3', 'd0.8', 'd3', 'd30', 'd49'])
+        self.assertEqual([place.distance_km for place in places], sorted(place.distance_km for place in places))
+        self.assertAlmostEqual(places[-1].distance_km, 49, delta=0.05)
+
+        # The first ring that holds enough places ends the search
+        self.assertEqual([place.name for place in Place.objects.nearby(*self.center, limit=2)], ['d0.3', 'd0.8'])
+        self.assertEqual(len(Place.objects.nearby(*self.center, limit=10, max_radius_km=5)), 3)
+
+    def test_fixed_radius(self):
+        self.place_at('inside', 0, 4.9)
+        self.place_at('outside', 180, 5.2)
+        self.assertEqual([place.name for place in Place.objects.nearby(*self.center, limit=10, radius_km=5)],
+                         ['inside'])
+        self.assertEqual(list(Place.objects.within(*self.center, 5).values_list('name', flat=True)), ['inside'])
+
+    def test_within_matches_python_distances_across_the_antimeridian(self):
+        self.center = (-16.5, 179.99)
+        for index, bearing in enumerate(range(0, 360, 30)):
+            self.place_at(f'p{index}', bearing, 8 if index % 2 else 12)
+        in_sql = set(Place.objects.within(*self.center, 10).values_list('id', flat=True))
+        in_python = {pk for _, pk in Place.objects.distances_within(*self.center, 10)}
+        self.assertEqual(in_sql, in_python)
+        self.assertEqual(len(in_sql), 6)
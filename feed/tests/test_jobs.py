@@ -0,0 +1,79 @@
+from datetime import timedelta
+from unittest import mock
+
+from django.test import override_settings
+from django.utils import timezone
+
+from feed import jobs
+from feed.enums import MediaJobKind, MediaJobStatus, ProcessingStatus
+from feed.models import Media, MediaJob
+from feed.tests.utils import MediaTestCase, make_user
+
+
+@override_settings(MEDIA_JOBS_MODE='worker', MEDIA_JOB_MAX_ATTEMPTS=2)
+class MediaJobTests(MediaTestCase):
+    def setUp(self):
+        super().setUp()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.media = Media.objects.create(
+                file='media/photo.jpg', media_type='photo', uploaded_by=make_user('uploader')
+            )
+            jobs.enqueue_processing(self.media)
+
+    def status(self):
+        return Media.objects.values_list('processing_status', flat=True).get(pk=self.media.pk)
+
+    def run_kind(self, kind, handler):
+        """Claim and run this media's job of one kind, leaving its siblings queued"""
+        later = timezone.now() + timedelta(days=1)
+        MediaJob.objects.filter(media=self.media).exclude(kind=kind).update(run_after=later)
+        MediaJob.objects.filter(media=self.media, kind=kind).update(run_after=timezone.now())
+        with mock.patch.dict(jobs.HANDLERS, {kind: handler}):
+            return jobs.run_job(jobs.claim_next())
+
+    def fail(self, media):
+        raise OSError("disk full")
+
+    def run_failing(self, kind):
+        with self.assertLogs('feed.jobs', 'WARNING'):
+            return self.run_kind(kind, self.fail)
+
+    def test_all_jobs_done_is_ready(self):
+        self.assertEqual(self.status(), ProcessingStatus.PENDING)
+        self.assertTrue(self.run_kind(MediaJobKind.THUMBNAIL, lambda media: None))
+        self.assertEqual(self.status(), ProcessingStatus.PROCESSING)
+        self.assertTrue(self.run_kind(MediaJobKind.RENDITIONS, lambda media: None))
+        self.assertEqual(self.status(), ProcessingStatus.READY)
+
+    def test_failure_survives_a_sibling_finishing_later(self):
+        self.assertFalse(self.run_failing(MediaJobKind.RENDITIONS))
+        job = MediaJob.objects.get(kind=MediaJobKind.RENDITIONS)
+        self.assertEqual((job.status, job.last_error), (MediaJobStatus.PENDING, "OSError: disk full"))
+        self.assertGreater(job.run_after, timezone.now() + timedelta(seconds=20))
+        self.assertEqual(self.status(), ProcessingStatus.PENDING)
+
+        self.assertFalse(self.run_failing(MediaJobKind.RENDITIONS))
+        self.assertEqual(MediaJob.objects.get(kind=MediaJobKind.RENDITIONS).status, MediaJobStatus.FAILED)
+        self.assertEqual(self.status(), ProcessingStatus.FAILED)
+
+        self.assertTrue(self.run_kind(MediaJobKind.THUMBNAIL, lambda media: None))
+        self.assertEqual(self.status(), ProcessingStatus.FAILED)
+
+    def test_status_while_a_sibling_is_running(self):
+        def check_running(media):
+            self.assertEqual(self.status(), ProcessingStatus.PROCESSING)
+        self.run_kind(MediaJobKind.THUMBNAIL, check_running)
+
+    def test_retry_after_sibling_done_is_processing(self):
+        self.run_kind(MediaJobKind.THUMBNAIL, lambda media: None)
+        self.run_failing(MediaJobKind.RENDITIONS)
+        self.assertEqual(self.status(), ProcessingStatus.PROCESSING)
+        self.run_kind(MediaJobKind.RENDITIONS, lambda media: None)
+        self.assertEqual(self.status(), ProcessingStatus.READY)
+
+    def test_requeue_stale_running_jobs(self):
+        job = jobs.claim_next()
+        MediaJob.objects.filter(pk=job.pk).update(updated_at=timezone.now() - timedelta(hours=1))
+        self.assertEqual(jobs.requeue_stale(), 1)
+        self.assertEqual(MediaJob.objects.get(pk=job.pk).status, MediaJobStatus.PENDING)
+        self.assertEqual(jobs.requeue_stale(), 0)
@@ -0,0 +1,127 @@
+import io
+import struct
+from unittest import mock
+
+from django.core.files.base import ContentFile
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.urls import reverse
+from PIL import Image
+from rest_framework.test import APIClient
+
+from feed.enums import MEDIA_TYPES
+from feed.media_info import probe_media, sniff_container
+from feed.models import Media
+from feed.tests.utils import MediaTestCase, box, image_bytes, make_user, mp4_bytes
+
+FTYP = box(b'ftyp', b'isom\0\0\0\0isomavc1')
+
+
+class SniffContainerTests(MediaTestCase):
+    def test_recognises_containers(self):
+        self.assertEqual(sniff_container(image_bytes(fmt='PNG')), 'png')
+        self.assertEqual(sniff_container(image_bytes(fmt='JPEG')), 'jpeg')
+        self.assertEqual(sniff_container(mp4_bytes()), 'iso-bmff')
+        self.assertIsNone(sniff_container(b'hello world'))
+
+    def test_heif_is_not_a_video(self):
+        self.assertIsNone(sniff_container(box(b'ftyp', b'heic\0\0\0\0')))
+
+    def test_legacy_quicktime_atoms(self):
+        self.assertEqual(sniff_container(mp4_bytes(ftyp=False)), 'quicktime')
+        self.assertEqual(sniff_container(box(b'wide') + box(b'mdat', b'\0' * 8)), 'quicktime')
+        self.assertEqual(sniff_container(struct.pack('>I4s', 0, b'mdat')), 'quicktime')
+        # Atom sizes 2-7 can't occur
+        self.assertIsNone(sniff_container(struct.pack('>I4s', 4, b'mdat')))
+
+
+class ProbeMediaTests(MediaTestCase):
+    def probe(self, data, media_type=MEDIA_TYPES.VIDEO):
+        return probe_media(io.BytesIO(data), media_type)
+
+    def test_reads_video_metadata(self):
+        info = self.probe(mp4_bytes(width=1280, height=720, seconds=3, codec=b'hvc1'))
+        self.assertEqual(info, {'width': 1280, 'height': 720, 'duration': 3.0, 'codec': 'hvc1'})
+
+    def test_truncated_boxes_give_no_metadata(self):
+        empty = {'width': None, 'height': None, 'duration': None, 'codec': ''}
+        for data in (
+            FTYP + box(b'moov', box(b'mvhd')),
+            FTYP + box(b'moov', box(b'trak', box(b'tkhd'))),
+            mp4_bytes()[:60],
+            FTYP + struct.pack('>I4s', 1, b'moov'),
+        ):
+            with self.subTest(data=data):
+                self.assertEqual(self.probe(data), empty)
+
+    def test_reads_image_metadata(self):
+        info = self.probe(image_bytes(30, 20), MEDIA_TYPES.PHOTO)
+        self.assertEqual((info['width'], info['height'], info['codec']), (30, 20, 'png'))
+
+
+class UploadValidationTests(MediaTestCase):
+    def setUp(self):
+        super().setUp()
+        self.client = APIClient()
+        self.client.force_authenticate(make_user('uploader'))
+
+    def upload(self, name, data, media_type):
+        return self.client.post(
+            reverse('media-upload'),
+            {'file': SimpleUploadedFile(name, data), 'media_type': media_type},
+            format='multipart',
+        )
+
+    def test_malformed_and_truncated_containers_are_rejected(self):
+        cases = [
+            ('empty-mvhd.mp4', FTYP + box(b'moov', box(b'mvhd')), 'video'),
+            ('empty-tkhd.mp4', FTYP + box(b'moov', box(b'trak', box(b'tkhd'))), 'video'),
+            ('no-moov.mp4', FTYP + box(b'mdat', b'\0' * 10), 'video'),
+            ('cut.mp4', mp4_bytes()[:60], 'video'),
+            ('cut.mov', mp4_bytes(ftyp=False)[:40], 'video'),
+            ('cut.png', image_bytes()[:30], 'photo'),
+            ('text.jpg', b'hello world' * 10, 'photo'),
+            ('photo.mp4', image_bytes(), 'video'),
+        ]
+        for name, data, media_type in cases:
+            with self.subTest(name=name):
+                response = self.upload(name, data, media_type)
+                self.assertEqual(response.status_code, 400, response.content)
+        self.assertFalse(Media.objects.exists())
+
+    def test_decompression_bomb_is_rejected(self):
+        with mock.patch.object(Image, 'MAX_IMAGE_PIXELS', 100):
+            response = self.upload('huge.png', image_bytes(50, 40), 'photo')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('too many pixels', str(response.json()))
+
+    def test_valid_uploads_store_metadata(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(self.upload('clip.mp4', mp4_bytes(), 'video').status_code, 201)
+            self.assertEqual(self.upload('legacy.mov', box(b'wide') + mp4_bytes(ftyp=False), 'video').status_code, 201)
+        self.assertEqual(
+            sorted(Media.objects.values_list('width', 'height', 'duration', 'codec')),
+            [(640, 360, 12.5, 'avc1')] * 2,
+        )
+
+
+class BackfillMetadataTests(MediaTestCase):
+    def test_probes_each_file_once(self):
+        owner = make_user('owner')
+        readable = Media(media_type=MEDIA_TYPES.VIDEO, uploaded_by=owner)
+        readable.file.save('clip.mp4', ContentFile(mp4_bytes(640, 360)), save=False)
+        # No codec the probe can read
+        unreadable = Media(media_type=MEDIA_TYPES.VIDEO, uploaded_by=owner)
+        unreadable.file.save('clip.webm', ContentFile(b'\x1a\x45\xdf\xa3' + b'\0' * 64), save=False)
+        Media.objects.bulk_create([readable, unreadable])
+
+        with mock.patch('feed.management.commands.backfill_media_metadata.probe_media',
+                        wraps=probe_media) as probe:
+            call_command('backfill_media_metadata', stdout=io.StringIO())
+            call_command('backfill_media_metadata', stdout=io.StringIO())
+        self.assertEqual(probe.call_count, 2)
+
+        readable.refresh_from_db()
+        unreadable.refresh_from_db()
+        self.assertEqual((readable.width, readable.height, readable.file_size), (640, 360, readable.file.size))
+        self.assertEqual((unreadable.codec, unreadable.file_size), ('', 68))
@@ -0,0 +1,146 @@
+import os
+
+from django.test import override_settings
+from django.utils.http import http_date
+from rest_framework.authtoken.models import Token
+
+from feed.models import Media, UserProfile
+from feed.tests.utils import MediaTestCase, make_user
+
+CONTENT = bytes(range(100))
+
+
+class ServeMediaTests(MediaTestCase):
+    def setUp(self):
+        super().setUp()
+        self.owner = make_user('owner')
+        self.public = self.store('media/public.mp4')
+        self.private = self.store('media/private.mp4', is_public=False)
+
+    def store(self, name, **fields):
+        path = os.path.join(self.media_root, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'wb') as file:
+            file.write(CONTENT)
+        return Media.objects.create(file=name, media_type='video', uploaded_by=self.owner, **fields)
+
+    def get(self, name, **headers):
+        return self.client.get(f'/media/{name}', headers=headers)
+
+    def body(self, response):
+        return b''.join(response.streaming_content)
+
+    def test_whole_file(self):
+        response = self.get('media/public.mp4')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.body(response), CONTENT)
+        self.assertEqual(response['Content-Length'], '100')
+        self.assertEqual(response['Accept-Ranges'], 'bytes')
+        self.assertEqual(response['Content-Type'], 'video/mp4')
+        self.assertTrue(response['Cache-Control'].startswith('public, max-age='))
+
+    def test_single_suffix_and_open_ended_ranges(self):
+        cases = [
+            ('bytes=10-19', 10, 19),
+            ('bytes=90-', 90, 99),
+            ('bytes=95-500', 95, 99),
+            ('bytes=-10', 90, 99),
+            ('bytes=-500', 0, 99),
+        ]
+        for header, start, end in cases:
+            with self.subTest(header=header):
+                response = self.get('media/public.mp4', Range=header)
+                self.assertEqual(response.status_code, 206)
+                self.assertEqual(self.body(response), CONTENT[start:end + 1])
+                self.assertEqual(response['Content-Range'], f'bytes {start}-{end}/100')
+                self.assertEqual(response['Content-Length'], str(end - start + 1))
+
+    def test_unsatisfiable_range(self):
+        for header in ('bytes=100-', 'bytes=500-600', 'bytes=-0'):
+            with self.subTest(header=header):
+                response = self.get('media/public.mp4', Range=header)
+                self.assertEqual(response.status_code, 416)
+                self.assertEqual(response['Content-Range'], 'bytes */100')
+
+    def test_malformed_and_multi_ranges_get_the_whole_file(self):
+        for header in ('bytes=5-2', 'bytes=0-1,5-6', 'bytes=-', 'items=0-5'):
+            with self.subTest(header=header):
+                response = self.get('media/public.mp4', Range=header)
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(self.body(response), CONTENT)
+
+    def test_if_range(self):
+        first = self.get('media/public.mp4')
+        etag, last_modified = first['ETag'], first['Last-Modified']
+        for if_range, status in (
+            (etag, 206),
+            ('"stale"', 200),
+            (last_modified, 206),
+            (http_date(0), 200),
+        ):
+            with self.subTest(if_range=if_range):
+                response = self.get('media/public.mp4', Range='bytes=0-9', **{'If-Range': if_range})
+                self.assertEqual(response.status_code, status)
+                self.assertEqual(len(self.body(response)), 10 if status == 206 else 100)
+
+    def test_not_modified(self):
+        etag = self.get('media/public.mp4')['ETag']
+        response = self.get('media/public.mp4', **{'If-None-Match': etag})
+        self.assertEqual(response.status_code, 304)
+        self.assertTrue(response['Cache-Control'].startswith('public'))
+        self.assertEqual(self.get('media/public.mp4', **{'If-None-Match': '"other"'}).status_code, 200)
+
+    def test_private_media_is_only_served_to_its_owner(self):
+        self.assertEqual(self.get('media/private.mp4').status_code, 404)
+        self.client.force_login(make_user('stranger'))
+        self.assertEqual(self.get('media/private.mp4').status_code, 404)
+
+        self.client.force_login(self.owner)
+        response = self.get('media/private.mp4')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response['Cache-Control'].startswith('private'))
+
+    def test_api_token_authenticates(self):
+        self.client.logout()
+        token = Token.objects.create(user=self.owner)
+        self.assertEqual(self.get('media/private.mp4', Authorization=f'Token {token.key}').status_code, 200)
+        self.assertEqual(self.get('media/private.mp4', Authorization='Token bogus').status_code, 404)
+
+    def test_deleted_media_is_not_served(self):
+        self.public.delete()
+        self.assertEqual(self.get('media/public.mp4').status_code, 404)
+        self.client.force_login(self.owner)
+        self.assertEqual(self.get('media/public.mp4').status_code, 404)
+
+    def test_files_no_row_points_at_are_not_served(self):
+        path = os.path.join(self.media_root, 'media/orphan.mp4')
+        with open(path, 'wb') as file:
+            file.write(CONTENT)
+        self.assertEqual(self.get('media/orphan.mp4').status_code, 404)
+        self.assertEqual(self.get('media/missing.mp4').status_code, 404)
+        self.assertEqual(self.get('../secrets.txt').status_code, 404)
+
+    def test_shared_blob_is_public_if_any_media_is(self):
+        blob = 'blobs/ab/cd/abcd.mp4'
+        self.store(blob, is_public=False)
+        self.assertEqual(self.get(blob).status_code, 404)
+        Media.objects.create(file=blob, media_type='video', uploaded_by=make_user('other'))
+        response = self.get(blob)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Cache-Control'], 'public, max-age=31536000, immutable')
+
+    def test_profile_pictures_are_public(self):
+        path = os.path.join(self.media_root, 'profiles/me.png')
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'wb') as file:
+            file.write(CONTENT)
+        self.assertEqual(self.get('profiles/me.png').status_code, 404)
+        UserProfile.objects.update_or_create(user=self.owner, defaults={'profile_picture': 'profiles/me.png'})
+        self.assertEqual(self.get('profiles/me.png').status_code, 200)
+
+    @override_settings(MEDIA_SERVE_MODE='x-accel', MEDIA_ACCEL_PREFIX='/protected-media/')
+    def test_x_accel_hands_off_after_the_access_check(self):
+        response = self.get('media/public.mp4')
+        self.assertEqual(response['X-Accel-Redirect'], '/protected-media/media/public.mp4')
+        self.assertEqual(response.content, b'')
+        self.assertEqual(self.get('media/private.mp4').status_code, 404)
@@ -0,0 +1,90 @@
+import base64
+import json
+from datetime import timedelta
+
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.exceptions import NotFound
+from rest_framework.request import Request
+from rest_framework.test import APIClient, APIRequestFactory
+
+from core.pagination import KeysetPagination
+from feed.models import Media
+from feed.tests.utils import MediaTestCase, make_user
+
+
+def token(payload):
+    raw = json.dumps(payload).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+class KeysetPaginationTests(MediaTestCase):
+    def setUp(self):
+        super().setUp()
+        uploader = make_user('uploader')
+        now = timezone.now()
+        for index in range(11):
+            Media.objects.create(file=f'media/{index}.mp4', media_type='video', uploaded_by=uploader)
+        # Six rows share one timestamp; the id breaks the tie
+        for index, media in enumerate(Media.objects.order_by('id')):
+            Media.objects.filter(pk=media.pk).update(
+                created_at=now if index < 6 else now - timedelta(minutes=index)
+            )
+        self.expected = list(Media.objects.order_by('-created_at', '-id').values_list('id', flat=True))
+        self.client = APIClient()
+
+    def fetch(self, url, **params):
+        response = self.client.get(url, params)
+        self.assertEqual(response.status_code, 200, response.content)
+        data = response.json()
+        return [item['id'] for item in data['results']], data['next'], data['previous']
+
+    def test_walks_forwards_and_back_through_ties(self):
+        pages = []
+        ids, next_url, previous = self.fetch(reverse('media-feed'), page_size=4)
+        self.assertIsNone(previous)
+        pages.append(ids)
+        while next_url:
+            ids, next_url, previous = self.fetch(next_url)
+            pages.append(ids)
+        self.assertEqual([len(page) for page in pages], [4, 4, 3])
+        self.assertEqual([media_id for page in pages for media_id in page], self.expected)
+
+        # And back again from the last page
+        back = []
+        while previous:
+            ids, _, previous = self.fetch(previous)
+            back.insert(0, ids)
+        self.assertEqual(back, pages[:-1])
+
+    def test_cursor_round_trip(self):
+        paginator = KeysetPagination()
+        row = Media.objects.get(pk=self.expected[3])
+        for reverse_cursor in (False, True):
+            encoded = paginator.encode_cursor(row, reverse=reverse_cursor)
+            self.assertNotIn('=', encoded)
+            request = Request(APIRequestFactory().get('/', {'cursor': encoded}))
+            self.assertEqual(paginator.decode_cursor(request), {
+                'timestamp': row.created_at, 'key': row.pk, 'reverse': reverse_cursor,
+            })
+
+    def test_tampered_cursors_are_not_found(self):
+        valid = token({'t': timezone.now().isoformat(), 'i': 1})
+        for cursor in (
+            'not-base64!', valid[:-3], token(['t', 'i']), token({'t': timezone.now().isoformat()}),
+            token({'t': 'yesterday', 'i': 1}), token({'t': 5, 'i': 1}), token({'t': timezone.now().isoformat(), 'i': 'x'}),
+            base64.urlsafe_b64encode(b'\xff\xfe').decode(),
+        ):
+            with self.subTest(cursor=cursor):
+                response = self.client.get(reverse('media-feed'), {'cursor': cursor})
+                self.assertEqual(response.status_code, 404)
+                request = Request(APIRequestFactory().get('/', {'cursor': cursor}))
+                with self.assertRaises(NotFound):
+                    KeysetPagination().decode_cursor(request)
+
+    def test_page_size_is_clamped(self):
+        paginator = KeysetPagination()
+        for value, size in (('0', 1), ('500', 100), ('abc', 20), ('7', 7)):
+            with self.subTest(value=value):
+                request = Request(APIRequestFactory().get('/', {'page_size': value}))
+                self.assertEqual(paginator.get_page_size(request), size)
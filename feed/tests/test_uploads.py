@@ -0,0 +1,189 @@
+import io
+import os
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.test import override_settings
+from django.urls import reverse
+from django.utils import timezone
+from PIL import Image
+from rest_framework.test import APIClient
+
+from feed.enums import UploadSessionStatus
+from feed.models import Media, UploadSession
+from feed.tests.utils import MediaTestCase, make_user
+from feed.uploads import parse_content_range
+
+
+def noise_png(width, height):
+    buffer = io.BytesIO()
+    Image.frombytes('RGB', (width, height), os.urandom(width * height * 3)).save(buffer, 'PNG')
+    return buffer.getvalue()
+
+
+class ParseContentRangeTests(MediaTestCase):
+    def test_valid_range(self):
+        self.assertEqual(parse_content_range('bytes 0-99/1000', 1000), (0, 100))
+        self.assertEqual(parse_content_range('bytes 900-999/1000', 1000), (900, 100))
+
+    def test_malformed_or_mismatched_ranges(self):
+        for header in (
+            None, '', 'bytes', 'bytes 0-99', 'bytes */1000', 'items 0-99/1000', 'bytes -1-99/1000',
+            'bytes 0-99/999',  # wrong total
+            'bytes 100-99/1000',  # start after end
+            'bytes 0-1000/1000',  # past the end
+        ):
+            with self.subTest(header=header):
+                self.assertIsNone(parse_content_range(header, 1000))
+
+    @override_settings(UPLOAD_CHUNK_MAX_SIZE=50)
+    def test_chunk_size_limit(self):
+        self.assertEqual(parse_content_range('bytes 0-49/1000', 1000), (0, 50))
+        self.assertIsNone(parse_content_range('bytes 0-50/1000', 1000))
+
+
+class UploadSessionTests(MediaTestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = make_user('uploader')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.data = noise_png(60, 40)  # ~7KB, enough for several chunks
+
+    def start(self, filename='photo.png', media_type='photo'):
+        response = self.client.post(reverse('upload-session-create'), {
+            'filename': filename, 'media_type': media_type, 'total_size': len(self.data), 'title': 'Chunked',
+        }, format='json')
+        self.assertEqual(response.status_code, 201, response.content)
+        return UploadSession.objects.get(pk=response.json()['id'])
+
+    def put(self, session, start, end, body=None):
+        return self.client.put(
+            reverse('upload-session', args=[session.pk]),
+            self.data[start:end + 1] if body is None else body,
+            content_type='application/octet-stream',
+            HTTP_CONTENT_RANGE=f'bytes {start}-{end}/{len(self.data)}',
+        )
+
+    def complete(self, session):
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.client.post(reverse('upload-session-complete', args=[session.pk]))
+
+    def test_malformed_content_range_is_rejected(self):
+        session = self.start()
+        url = reverse('upload-session', args=[session.pk])
+        for header in ('bytes 0-9', f'bytes 0-9/{len(self.data) + 1}', f'bytes 0-{len(self.data)}/{len(self.data)}'):
+            with self.subTest(header=header):
+                response = self.client.put(url, b'x' * 10, content_type='application/octet-stream', HTTP_CONTENT_RANGE=header)
+                self.assertEqual(response.status_code, 400)
+        self.assertEqual(self.put(session, 0, 9, body=b'short').status_code, 400)
+        self.assertEqual(session.missing_ranges(), [[0, len(self.data)]])
+
+    def test_out_of_order_duplicate_and_overlapping_chunks(self):
+        session = self.start()
+        size = len(self.data)
+        response = self.put(session, 200, size - 1)
+        self.assertEqual(response.json()['missing_ranges'], [[0, 200]])
+        self.assertEqual(self.put(session, 0, 99).json()['missing_ranges'], [[100, 200]])
+        # Re-sending a chunk replaces it
+        self.assertEqual(self.put(session, 0, 99).json()['missing_ranges'], [[100, 200]])
+        self.assertEqual(session.chunks.count(), 2)
+        # Overlapping ranges merge
+        self.assertEqual(self.put(session, 50, 149).json()['missing_ranges'], [[150, 200]])
+        self.assertEqual(self.put(session, 140, 210).json()['missing_ranges'], [])
+        self.assertEqual(session.received_ranges(), [[0, size]])
+
+        response = self.complete(session)
+        self.assertEqual(response.status_code, 201, response.content)
+        media = Media.objects.get()
+        with media.file.open('rb') as stored:
+            self.assertEqual(stored.read(), self.data)
+        self.assertEqual((media.title, media.width, media.height), ('Chunked', 60, 40))
+        session.refresh_from_db()
+        self.assertEqual((session.status, session.media), (UploadSessionStatus.COMPLETED, media))
+        self.assertFalse(os.path.exists(session.part_path))
+
+        # A retried complete returns the same media; further chunks are refused
+        response = self.client.post(reverse('upload-session-complete', args=[session.pk]))
+        self.assertEqual((response.status_code, response.json()['media']['id']), (200, media.pk))
+        self.assertEqual(self.put(session, 0, 99).status_code, 409)
+
+    def test_incomplete_upload_cannot_complete(self):
+        session = self.start()
+        self.put(session, 0, 99)
+        response = self.complete(session)
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()['missing_ranges'], [[100, len(self.data)]])
+        self.assertFalse(Media.objects.exists())
+
+    def test_first_chunk_failing_the_sniff_aborts(self):
+        session = self.start(filename='clip.mp4', media_type='video')
+        response = self.put(session, 0, 99)
+        self.assertEqual(response.status_code, 400)
+        session.refresh_from_db()
+        self.assertEqual(session.status, UploadSessionStatus.ABORTED)
+        self.assertFalse(os.path.exists(session.part_path))
+        self.assertEqual(self.put(session, 100, 199).status_code, 409)
+
+    def test_later_chunks_are_not_sniffed(self):
+        session = self.start()
+        self.assertEqual(self.put(session, 100, 199, body=b'\0' * 100).status_code, 200)
+
+    def test_retry_after_failed_complete(self):
+        session = self.start()
+        self.put(session, 0, len(self.data) - 1)
+        self.client.raise_request_exception = False
+
+        # Part file untouched: the session goes back to ACTIVE and can be completed
+        with mock.patch('feed.views.publish_upload', side_effect=RuntimeError):
+            self.assertEqual(self.complete(session).status_code, 500)
+        session.refresh_from_db()
+        self.assertEqual(session.status, UploadSessionStatus.ACTIVE)
+        self.assertEqual(self.complete(session).status_code, 201)
+
+    def test_failed_complete_after_part_file_was_consumed(self):
+        session = self.start()
+        self.put(session, 0, len(self.data) - 1)
+        self.client.raise_request_exception = False
+
+        def consume_part_file(request, serializer):
+            os.remove(session.part_path)
+            raise RuntimeError
+        with mock.patch('feed.views.publish_upload', side_effect=consume_part_file):
+            self.assertEqual(self.complete(session).status_code, 500)
+        session.refresh_from_db()
+        self.assertEqual(session.status, UploadSessionStatus.FAILED)
+        self.assertEqual(self.complete(session).status_code, 409)
+        self.assertEqual(self.put(session, 0, 99).status_code, 409)
+        self.assertFalse(Media.objects.exists())
+
+    def test_expired_session_refuses_chunks(self):
+        session = self.start()
+        UploadSession.objects.filter(pk=session.pk).update(expires_at=timezone.now() - timedelta(seconds=1))
+        self.assertEqual(self.put(session, 0, 99).status_code, 410)
+        self.assertEqual(self.complete(session).status_code, 410)
+
+    def test_purge_removes_expired_aborted_and_failed_sessions(self):
+        sessions = {status: self.start() for status in ('active', 'expired', 'aborted', 'failed', 'completed')}
+        UploadSession.objects.filter(pk=sessions['expired'].pk).update(expires_at=timezone.now() - timedelta(seconds=1))
+        for status in (UploadSessionStatus.ABORTED, UploadSessionStatus.FAILED, UploadSessionStatus.COMPLETED):
+            UploadSession.objects.filter(pk=sessions[status].pk).update(status=status)
+
+        out = StringIO()
+        call_command('purge_upload_sessions', stdout=out)
+        self.assertIn('Purged 3', out.getvalue())
+        self.assertEqual(
+            set(UploadSession.objects.values_list('pk', flat=True)),
+            {sessions['active'].pk, sessions['completed'].pk},
+        )
+        for status in ('expired', 'aborted', 'failed'):
+            self.assertFalse(os.path.exists(sessions[status].part_path))
+        self.assertTrue(os.path.exists(sessions['active'].part_path))
+
+    def test_sessions_are_private_to_their_user(self):
+        session = self.start()
+        other = APIClient()
+        other.force_authenticate(make_user('other'))
+        self.assertEqual(other.get(reverse('upload-session', args=[session.pk])).status_code, 404)
@@ -0,0 +1,65 @@
+import io
+import shutil
+import struct
+import tempfile
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from PIL import Image
+
+
+def make_user(username):
+    # No password: tests authenticate with force_authenticate, and hashing is slow
+    return User.objects.create_user(username=username)
+
+
+def image_bytes(width=50, height=40, fmt='PNG'):
+    buffer = io.BytesIO()
+    Image.new('RGB', (width, height), 'red').save(buffer, fmt)
+    return buffer.getvalue()
+
+
+def box(kind, payload=b''):
+    """One ISO-BMFF box with a 32-bit size"""
+    return struct.pack('>I4s', 8 + len(payload), kind) + payload
+
+
+def mp4_bytes(width=640, height=360, seconds=12.5, codec=b'avc1', ftyp=True):
+    """Smallest MP4 the probe reads: mvhd duration, one video trak with tkhd size and stsd codec"""
+    mvhd = box(b'mvhd', b'\0' * 12 + struct.pack('>II', 1000, int(seconds * 1000)) + b'\0' * 80)
+    tkhd = box(b'tkhd', b'\0\0\0\x07' + b'\0' * 72 + struct.pack('>II', width << 16, height << 16))
+    stsd = box(b'stsd', b'\0' * 4 + struct.pack('>I', 1) + box(codec, b'\0' * 70))
+    trak = box(b'trak', tkhd + box(b'mdia', box(b'minf', box(b'stbl', stsd))))
+    head = box(b'ftyp', b'isom\0\0\0\0isomavc1') if ftyp else b''
+    return head + box(b'moov', mvhd + trak) + box(b'mdat', b'\0' * 100)
+
+
+class MediaTestCase(TestCase):
+    """
+    TestCase with throwaway MEDIA_ROOT and upload session directories.
+
+    Media jobs and the autocomplete rebuild run inline: background threads
+    can't share the in-memory test database.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        cls.media_root = tempfile.mkdtemp()
+        cls._media_settings = override_settings(
+            MEDIA_ROOT=cls.media_root,
+            UPLOAD_SESSION_DIR=f"{cls.media_root}/sessions",
+            MEDIA_JOBS_MODE='eager',
+            AUTOCOMPLETE_REBUILD_MODE='eager',
+        )
+        cls._media_settings.enable()
+        super().setUpClass()
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        cls._media_settings.disable()
+        shutil.rmtree(cls.media_root, ignore_errors=True)
+
+    def setUp(self):
+        cache.clear()
@@ -0,0 +1,124 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, Q
+
+from social.models import Follow
+from .models import Media, TimelineEntry
+
+
+# -----------------------------
+# 🏠 Home timeline
+# -----------------------------
+# Media is copied into each follower's TimelineEntry rows when it is posted
+# (fan-out on write), so reading a timeline is a range scan over one user's rows.
+# Accounts with very many followers are skipped at write time and merged in
+# at read time instead (pull), which bounds the cost of a single upload.
+# Entries are written and retracted as media changes visibility, so a
+# user's rows are exactly what they may see and reads don't re-check Media.
+
+PULL_ACCOUNTS_CACHE_KEY = "timeline:pull_accounts"
+PULL_ACCOUNTS_TIMEOUT = 60 * 10
+
+
+def get_pull_account_ids():
+    """Ids of accounts whose followers pull their media at read time"""
+    pull_ids = cache.get(PULL_ACCOUNTS_CACHE_KEY)
+    if pull_ids is None:
+        pull_ids = set(
+            Follow.objects.order_by().values('following').annotate(
+                total=Count('id')
+            ).filter(
+                total__gte=settings.TIMELINE_PULL_FOLLOWER_THRESHOLD
+            ).values_list('following', flat=True)
+        )
+        cache.set(PULL_ACCOUNTS_CACHE_KEY, pull_ids, PULL_ACCOUNTS_TIMEOUT)
+    return pull_ids
+
+
+def followed_pull_account_ids(user):
+    """Pull accounts the user follows"""
+    pull_ids = get_pull_account_ids()
+    if not pull_ids:
+        return []
+    return list(
+        Follow.objects.filter(follower=user, following_id__in=pull_ids).values_list('following_id', flat=True)
+    )
+
+
+def write_entries(media, user_ids):
+    """Insert timeline rows for media, skipping users that already have it"""
+    TimelineEntry.objects.bulk_create(
+        [
+            TimelineEntry(user_id=user_id, media=media, author_id=media.uploaded_by_id, created_at=media.created_at)
+            for user_id in user_ids
+        ],
+        ignore_conflicts=True,
+    )
+
+
+def fan_out_media(media):
+    """Write media into its uploader's timeline and, for public media, every follower's"""
+    if media.pk is None:
+        # Hard-deleted before the transaction committed
+        return
+    write_entries(media, [media.uploaded_by_id])
+    if not media.is_public or media.is_deleted or media.uploaded_by_id in get_pull_account_ids():
+        return
+
+    batch_size = settings.TIMELINE_FANOUT_BATCH_SIZE
+    follower_ids = Follow.objects.filter(following_id=media.uploaded_by_id).order_by().values_list(
+        'follower_id', flat=True
+    )
+    batch = []
+    for follower_id in follower_ids.iterator(chunk_size=batch_size):
+        batch.append(follower_id)
+        if len(batch) >= batch_size:
+            write_entries(media, batch)
+            batch = []
+    if batch:
+        write_entries(media, batch)
+
+
+def retract_media(media):
+    """Remove media from timelines once it is deleted or made private"""
+    # By pk: a hard delete in the same transaction has already cleared media.pk (and its entries)
+    entries = TimelineEntry.objects.filter(media_id=media.pk)
+    if not media.is_deleted:
+        entries = entries.exclude(user_id=media.uploaded_by_id)
+    entries.delete()
+
+
+def backfill_follow(follower_id, following_id):
+    """Copy recent media from a newly followed account into the follower's timeline"""
+    if following_id in get_pull_account_ids():
+        return
+    recent = Media.objects.filter(
+        uploaded_by_id=following_id, is_public=True, is_deleted=False
+    ).order_by('-created_at')[:settings.TIMELINE_BACKFILL_LIMIT]
+    TimelineEntry.objects.bulk_create(
+        [
+            TimelineEntry(user_id=follower_id, media=media, author_id=following_id, created_at=media.created_at)
+            for media in recent
+        ],
+        ignore_conflicts=True,
+    )
+
+
+def remove_follow(follower_id, following_id):
+    """Drop an unfollowed account's media from the follower's timeline"""
+    TimelineEntry.objects.filter(user_id=follower_id, author_id=following_id).delete()
+
+
+def timeline_entries(user):
+    """Materialized timeline rows for the user, newest first"""
+    return TimelineEntry.objects.filter(user=user)
+
+
+def hybrid_timeline_media(user, pull_ids):
+    """Timeline media merged with media pulled from followed high-follower accounts"""
+    return Media.objects.filter(
+        Q(pk__in=TimelineEntry.objects.filter(user=user).values('media_id')) |
+        Q(uploaded_by_id__in=pull_ids, is_public=True),
+        Q(is_public=True) | Q(uploaded_by=user),
+        is_deleted=False,
+    )
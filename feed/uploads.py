@@ -0,0 +1,218 @@
+import hashlib
+import os
+import re
+
+from django.conf import settings
+from django.core.files.uploadedfile import UploadedFile
+from django.core.files.uploadhandler import FileUploadHandler
+from PIL import Image
+from rest_framework import serializers
+
+from feed.enums import MEDIA_TYPES
+from feed.media_info import CONTAINERS, SNIFF_SIZE, probe_media, sniff_container
+
+ALLOWED_EXTENSIONS = {
+    MEDIA_TYPES.PHOTO: ('.jpg', '.jpeg', '.png', '.gif', '.webp'),
+    MEDIA_TYPES.VIDEO: ('.mp4', '.avi', '.mov', '.wmv', '.flv', '.webm'),
+}
+EXTENSION_ERRORS = {
+    MEDIA_TYPES.PHOTO: "Invalid photo format. Allowed: JPG, PNG, GIF, WebP",
+    MEDIA_TYPES.VIDEO: "Invalid video format. Allowed: MP4, AVI, MOV, WMV, FLV, WebM",
+}
+
+CONTENT_RANGE = re.compile(r'^bytes (\d+)-(\d+)/(\d+)$')
+READ_BLOCK_SIZE = 64 * 1024
+
+
+# -----------------------------
+# 📤 Upload validation
+# -----------------------------
+
+def validate_upload(name, size, media_type):
+    """Size and extension checks shared by direct uploads and upload sessions"""
+    if size > settings.MEDIA_UPLOAD_MAX_SIZE:
+        raise serializers.ValidationError(
+            f"File size cannot exceed {settings.MEDIA_UPLOAD_MAX_SIZE // (1024 * 1024)}MB"
+        )
+    extensions = ALLOWED_EXTENSIONS.get(media_type)
+    if extensions and not name.lower().endswith(extensions):
+        raise serializers.ValidationError(EXTENSION_ERRORS[media_type])
+
+
+def validate_content(head, name, media_type):
+    """Check the first bytes of a file against its declared media type and extension; returns the container"""
+    if media_type not in MEDIA_TYPES.values:
+        # Reported by the media_type field itself
+        return None
+    container = sniff_container(head)
+    if container is None:
+        raise serializers.ValidationError("File content is not a supported photo or video format")
+    expected_type, extensions = CONTAINERS[container]
+    if expected_type != media_type:
+        raise serializers.ValidationError(f"File content is a {expected_type}, not a {media_type}")
+    if not name.lower().endswith(extensions):
+        raise serializers.ValidationError(f"File content ({container}) does not match its extension")
+    return container
+
+
+def inspect_upload(file, media_type):
+    """
+    Sniff and probe an upload, reading only its headers.
+
+    Returns the metadata to store on Media (width, height, duration, codec).
+    """
+    file.seek(0)
+    head = file.read(SNIFF_SIZE)
+    file.seek(0)
+    container = validate_content(head, file.name, media_type)
+    try:
+        info = probe_media(file, media_type)
+    except Image.DecompressionBombError:
+        raise serializers.ValidationError("Image has too many pixels to process")
+    if media_type == MEDIA_TYPES.PHOTO and info['width'] is None:
+        raise serializers.ValidationError("Image is corrupt or truncated")
+    if container in ('iso-bmff', 'quicktime') and info['width'] is None and info['duration'] is None:
+        raise serializers.ValidationError("Video is corrupt or missing its index (moov box)")
+    return info
+
+
+# -----------------------------
+# #️⃣ Content hashing
+# -----------------------------
+
+class HashingUploadHandler(FileUploadHandler):
+    """
+    Computes the SHA-256 of each multipart file while it streams in.
+
+    Chunks are passed on untouched to the regular handlers; install it first
+    in request.upload_handlers and call tag() once the body is parsed.
+    """
+
+    def __init__(self, request=None):
+        super().__init__(request)
+        self.digests = {}
+        self.hasher = None
+
+    def new_file(self, *args, **kwargs):
+        super().new_file(*args, **kwargs)
+        self.hasher = hashlib.sha256()
+
+    def receive_data_chunk(self, raw_data, start):
+        self.hasher.update(raw_data)
+        return raw_data
+
+    def file_complete(self, file_size):
+        self.digests[self.field_name] = self.hasher.hexdigest()
+        return None
+
+    def tag(self, files):
+        """Attach the digests to the parsed files as .sha256"""
+        for field_name, digest in self.digests.items():
+            if field_name in files:
+                files[field_name].sha256 = digest
+
+
+def file_digest(file):
+    """SHA-256 of an uploaded file, computed while streaming unless a handler already did"""
+    digest = getattr(file, 'sha256', None)
+    if digest is None:
+        hasher = hashlib.sha256()
+        file.seek(0)
+        for chunk in file.chunks():
+            hasher.update(chunk)
+        file.seek(0)
+        digest = hasher.hexdigest()
+    return digest
+
+
+# -----------------------------
+# 🧩 Chunked uploads
+# -----------------------------
+# Each session owns a sparse part file sized to the final upload. Chunks are
+# streamed from the request body into their offset with pwrite, so memory use
+# is one read block per request and chunks can arrive in any order or in
+# parallel.
+
+def create_part_file(session):
+    os.makedirs(settings.UPLOAD_SESSION_DIR, exist_ok=True)
+    fd = os.open(session.part_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    try:
+        os.ftruncate(fd, session.total_size)
+    finally:
+        os.close(fd)
+
+
+def delete_part_file(session):
+    try:
+        os.remove(session.part_path)
+    except FileNotFoundError:
+        pass
+
+
+def part_file_intact(session):
+    """Whether the part file still holds the whole upload (storage may have moved it away)"""
+    try:
+        return os.path.getsize(session.part_path) == session.total_size
+    except OSError:
+        return False
+
+
+def parse_content_range(header, total_size):
+    """(offset, length) from a 'bytes start-end/total' header, or None if it does not fit the session"""
+    match = CONTENT_RANGE.match(header or '')
+    if not match:
+        return None
+    start, end, total = (int(value) for value in match.groups())
+    if total != total_size or start > end or end >= total_size:
+        return None
+    length = end - start + 1
+    if length > settings.UPLOAD_CHUNK_MAX_SIZE:
+        return None
+    return start, length
+
+
+def write_chunk(session, offset, length, stream):
+    """
+    Copy exactly length bytes from stream into the part file; returns the bytes written.
+
+    The chunk at offset 0 is sniffed before anything is written, so a file
+    whose content does not match its declared type is rejected on its first
+    request (ValidationError).
+    """
+    if stream is None:
+        # DRF gives no stream for bodies without a Content-Length
+        return 0
+    fd = os.open(session.part_path, os.O_WRONLY)
+    written = 0
+    try:
+        while written < length:
+            block = stream.read(min(READ_BLOCK_SIZE, length - written))
+            if not block:
+                break
+            if offset + written == 0:
+                validate_content(block[:SNIFF_SIZE], session.filename, session.media_type)
+            os.pwrite(fd, block, offset + written)
+            written += len(block)
+    finally:
+        os.close(fd)
+    return written
+
+
+class AssembledUpload(UploadedFile):
+    """
+    Completed part file handed to the regular upload serializer.
+
+    Exposing temporary_file_path lets FileSystemStorage move the file into
+    place instead of copying it.
+    """
+
+    def __init__(self, session):
+        super().__init__(
+            file=open(session.part_path, 'rb'),
+            name=session.filename,
+            size=session.total_size,
+        )
+        self.path = session.part_path
+
+    def temporary_file_path(self):
+        return self.path
@@ -1,23 +1,39 @@
 from django.urls import path
 from .views import (
-    UserProfileView, UserProfileByIDView,
-    MediaUploadView, MediaFeedView, UserMediaView, MediaDetailView,
-    MediaUpdateView, MediaDeleteView, PlacesListView
+    UserProfileView, UserProfileByIDView, UserProfileMediaView,
+    MediaUploadView, UploadSessionCreateView, UploadSessionView, UploadSessionCompleteView,
+    MediaFeedView, UserMediaView, MediaDetailView,
+    MediaUpdateView, MediaDeleteView, PlacesListView, PlacesNearbyView, PlaceClustersView,
+    PlaceAutocompleteView,
+    HomeTimelineView, SearchView
 )
 
 urlpatterns = [
     # User profiles
     path("profile/<str:username>/", UserProfileView.as_view(), name="user-profile"),
     path("profile/id/<int:user_id>/", UserProfileByIDView.as_view(), name="user-profile-by-id"),
+    path("profile/<str:username>/media/", UserProfileMediaView.as_view(), name="user-profile-media"),
     
     # Media upload and management
     path("upload/", MediaUploadView.as_view(), name="media-upload"),
+    path("upload/sessions/", UploadSessionCreateView.as_view(), name="upload-session-create"),
+    path("upload/sessions/<uuid:session_id>/", UploadSessionView.as_view(), name="upload-session"),
+    path("upload/sessions/<uuid:session_id>/complete/", UploadSessionCompleteView.as_view(), name="upload-session-complete"),
     path("media/", MediaFeedView.as_view(), name="media-feed"),
     path("media/my/", UserMediaView.as_view(), name="user-media"),
     path("media/<int:pk>/", MediaDetailView.as_view(), name="media-detail"),
     path("media/<int:pk>/update/", MediaUpdateView.as_view(), name="media-update"),
     path("media/<int:pk>/delete/", MediaDeleteView.as_view(), name="media-delete"),
     
+    # Home timeline of followed accounts
+    path("timeline/", HomeTimelineView.as_view(), name="home-timeline"),
+    
+    # Search over places, media and users
+    path("search/", SearchView.as_view(), name="search"),
+    
     # Places for media upload
     path("places/", PlacesListView.as_view(), name="places-list"),
+    path("places/nearby/", PlacesNearbyView.as_view(), name="places-nearby"),
+    path("places/clusters/", PlaceClustersView.as_view(), name="places-clusters"),
+    path("places/autocomplete/", PlaceAutocompleteView.as_view(), name="places-autocomplete"),
 ]
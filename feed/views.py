@@ -1,37 +1,132 @@
 from rest_framework import generics, permissions, status
 from rest_framework.response import Response
 from rest_framework.views import APIView
+from rest_framework.exceptions import ValidationError
 from rest_framework.parsers import MultiPartParser, FormParser
+from datetime import timedelta
+from django.core.cache import cache
 from django.shortcuts import get_object_or_404
+from django.urls import reverse
 from django.contrib.auth.models import User
+from django.conf import settings
+from django.db import transaction
 from django.db.models import Q
+from django.utils import timezone
 
-from feed.enums import MEDIA_TYPES
-from .models import UserProfile, Media, Place
+from core.caching import anonymous_response_cache
+from core.media_urls import MediaURLResolver
+from core.pagination import KeysetPagination
+from social.serializers import UserBasicSerializer
+from feed.enums import MEDIA_TYPES, UploadSessionStatus
+from . import clusters, geo, jobs, search, timeline, uploads
+from .autocomplete import place_index
+from .models import UserProfile, Media, Place, UploadSession, UploadChunk
 from .serializers import (
     UserProfileSerializer, MediaUploadSerializer, 
-    MediaFeedSerializer, UserMediaSerializer, PlaceSerializer
+    MediaFeedSerializer, UserMediaSerializer, PlaceSerializer, NearbyPlaceSerializer,
+    UploadSessionSerializer
 )
 
 class Feed(APIView):
     """Media feed view for all public videos """
     permission_classes = [permissions.AllowAny]
     
+    @anonymous_response_cache('media')
     def get(self, request):
         """Get public media feed"""
         
         queryset = Media.objects.filter(media_type=MEDIA_TYPES.VIDEO, is_public=True, is_deleted=False)
         
-        queryset = queryset.select_related('uploaded_by', 'place', 'place__city').order_by('-created_at')
-        serializer = MediaFeedSerializer(queryset, many=True, context={'request': request})
+        queryset = queryset.select_related('uploaded_by__profile', 'place__city').prefetch_related('renditions')
         
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        paginator = KeysetPagination()
+        page = paginator.paginate_queryset(queryset, request, view=self)
+        serializer = MediaFeedSerializer(page, many=True, context={'request': request})
+        
+        return paginator.get_paginated_response(serializer.data)
+
+
+
+
+def profile_media_queryset(user, viewer):
+    """Non-deleted media uploaded by user; private items only for the owner"""
+    queryset = Media.objects.filter(uploaded_by=user, is_deleted=False)
+    if viewer != user:
+        queryset = queryset.filter(is_public=True)
+    return queryset.select_related('place', 'place__city').prefetch_related('renditions')
+
+
+class ProfileDetailMixin:
+    """Profile payload built from a cached header plus the first page of uploaded media"""
+    header_cache_timeout = 60 * 10
 
+    def retrieve(self, request, *args, **kwargs):
+        profile = self.get_object()
+        data = dict(self.get_header(profile))
+        data['uploaded_media'] = self.get_first_media_page(profile)
+        return Response(data)
 
+    def get_header(self, profile):
+        """Serialized profile header, cached per user (and per host, since URLs are absolute)"""
+        key = UserProfile.header_cache_key(profile.user_id)
+        host = self.request.get_host()
+        headers = cache.get(key) or {}
+        if host not in headers:
+            headers[host] = self.get_serializer(profile).data
+            cache.set(key, headers, self.header_cache_timeout)
+        return headers[host]
+
+    def get_first_media_page(self, profile):
+        """First page of media; the next link continues on the profile media endpoint"""
+        paginator = KeysetPagination()
+        paginator.base_url = self.request.build_absolute_uri(
+            reverse('user-profile-media', kwargs={'username': profile.user.username})
+        )
+        page = paginator.paginate(profile_media_queryset(profile.user, self.request.user), self.request)
+        serializer = UserMediaSerializer(page, many=True, context=self.get_serializer_context())
+        return {
+            'results': serializer.data,
+            'next': paginator.get_next_link(),
+        }
+
+
+class TimelinePagination(KeysetPagination):
+    """Keyset pagination over TimelineEntry rows, keyed by the media they point at"""
+    tiebreak_field = 'media_id'
 
 
-class UserProfileView(generics.RetrieveAPIView):
-    """View to get user profile with all uploaded media and metadata"""
+class HomeTimelineView(APIView):
+    """Home timeline: media from the accounts the current user follows"""
+    permission_classes = [permissions.IsAuthenticated]
+    
+    def get(self, request):
+        """Read the materialized timeline, merging in followed high-follower accounts"""
+        pull_ids = timeline.followed_pull_account_ids(request.user)
+        
+        if pull_ids:
+            paginator = KeysetPagination()
+            queryset = timeline.hybrid_timeline_media(request.user, pull_ids)
+            page = paginator.paginate_queryset(
+                queryset.select_related('uploaded_by__profile', 'place__city').prefetch_related('renditions'),
+                request, view=self
+            )
+        else:
+            # Cursors carry (created_at, media id) either way, so clients can switch paths mid-scroll
+            paginator = TimelinePagination()
+            entries = paginator.paginate_queryset(
+                timeline.timeline_entries(request.user).select_related(
+                    'media__uploaded_by__profile', 'media__place__city'
+                ).prefetch_related('media__renditions'),
+                request, view=self
+            )
+            page = [entry.media for entry in entries]
+        
+        serializer = MediaFeedSerializer(page, many=True, context={'request': request})
+        return paginator.get_paginated_response(serializer.data)
+
+
+class UserProfileView(ProfileDetailMixin, generics.RetrieveAPIView):
+    """View to get user profile with metadata and the first page of uploaded media"""
     serializer_class = UserProfileSerializer
     permission_classes = [permissions.AllowAny]  # public profiles
     
@@ -41,7 +136,7 @@ class UserProfileView(generics.RetrieveAPIView):
         profile, created = UserProfile.objects.get_or_create(user=user)
         return profile
 
-class UserProfileByIDView(generics.RetrieveAPIView):
+class UserProfileByIDView(ProfileDetailMixin, generics.RetrieveAPIView):
     """View to get user profile by user ID"""
     serializer_class = UserProfileSerializer
     permission_classes = [permissions.AllowAny]  # public profiles
@@ -52,6 +147,36 @@ class UserProfileByIDView(generics.RetrieveAPIView):
         profile, created = UserProfile.objects.get_or_create(user=user)
         return profile
 
+class UserProfileMediaView(generics.ListAPIView):
+    """View to page through a user's uploaded media after the profile's first page"""
+    serializer_class = UserMediaSerializer
+    permission_classes = [permissions.AllowAny]  # public profiles
+    pagination_class = KeysetPagination
+    
+    def get_queryset(self):
+        user = get_object_or_404(User, username=self.kwargs.get('username'))
+        return profile_media_queryset(user, self.request.user)
+
+def publish_upload(request, serializer):
+    """Save a validated MediaUploadSerializer and start post-upload work"""
+    with transaction.atomic():
+        # The upload activity is emitted by the Media post_save signal and
+        # written together with the media on commit
+        media = serializer.save()
+        
+        # Thumbnails are generated in the background once the upload commits
+        jobs.enqueue_processing(media)
+    return media
+
+
+def upload_response(request, media, response_status=status.HTTP_201_CREATED):
+    response_serializer = MediaFeedSerializer(media, context={'request': request})
+    return Response({
+        'message': f'{media.get_media_type_display()} uploaded successfully',
+        'media': response_serializer.data
+    }, status=response_status)
+
+
 class MediaUploadView(APIView):
     """View for uploading photos and videos"""
     permission_classes = [permissions.IsAuthenticated]
@@ -59,42 +184,196 @@ class MediaUploadView(APIView):
     
     def post(self, request):
         """Upload new media (photo or video)"""
+        # Hash the file as it streams in so storage can deduplicate identical uploads
+        hasher = uploads.HashingUploadHandler(request)
+        request.upload_handlers.insert(0, hasher)
+        hasher.tag(request.FILES)
+        
         serializer = MediaUploadSerializer(data=request.data, context={'request': request})
         
         if serializer.is_valid():
-            media = serializer.save()
-            
-            # Create activity for the upload
-            from social.models import Activity
-            from social.enums import ActivityType
-            
-            Activity.create_activity(
-                actor=request.user,
-                target_user=request.user,  # User sees their own upload
-                activity_type=ActivityType.VIDEO_UPLOAD if media.media_type == 'video' else ActivityType.VIDEO_UPLOAD,  # Using same type for now
-                content_object=media
-            )
-            
-            response_serializer = MediaFeedSerializer(media, context={'request': request})
-            return Response({
-                'message': f'{media.get_media_type_display()} uploaded successfully',
-                'media': response_serializer.data
-            }, status=status.HTTP_201_CREATED)
+            media = publish_upload(request, serializer)
+            return upload_response(request, media)
         
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
+# -----------------------------
+# 🧩 Chunked uploads
+# -----------------------------
+# init: POST upload/sessions/ with filename, media_type, total_size and the media fields
+# chunks: PUT upload/sessions/<id>/ with a raw body and "Content-Range: bytes start-end/total"
+# resume: GET upload/sessions/<id>/ lists received and missing byte ranges
+# finalize: POST upload/sessions/<id>/complete/ creates the Media like a direct upload
+
+def get_upload_session(request, session_id):
+    return get_object_or_404(UploadSession, pk=session_id, user=request.user)
+
+
+def inactive_session_response(session):
+    """Error response when a session no longer accepts chunks, or None"""
+    if session.status != UploadSessionStatus.ACTIVE:
+        return Response({'error': f'Upload session is {session.status}'}, status=status.HTTP_409_CONFLICT)
+    if session.is_expired:
+        return Response({'error': 'Upload session has expired'}, status=status.HTTP_410_GONE)
+    return None
+
+
+class UploadSessionCreateView(APIView):
+    """Start a chunked upload"""
+    permission_classes = [permissions.IsAuthenticated]
+    
+    def post(self, request):
+        serializer = UploadSessionSerializer(data=request.data, context={'request': request})
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        
+        session = serializer.save(
+            user=request.user,
+            expires_at=timezone.now() + timedelta(seconds=settings.UPLOAD_SESSION_TTL),
+        )
+        uploads.create_part_file(session)
+        return Response(UploadSessionSerializer(session).data, status=status.HTTP_201_CREATED)
+
+
+class UploadSessionView(APIView):
+    """Upload status, chunk writes and cancellation for one session"""
+    permission_classes = [permissions.IsAuthenticated]
+    
+    def get(self, request, session_id):
+        session = get_upload_session(request, session_id)
+        return Response(UploadSessionSerializer(session).data)
+    
+    def put(self, request, session_id):
+        """Store one chunk; chunks may be sent in any order, in parallel, and re-sent"""
+        session = get_upload_session(request, session_id)
+        error = inactive_session_response(session)
+        if error is not None:
+            return error
+        
+        chunk = uploads.parse_content_range(request.headers.get('Content-Range'), session.total_size)
+        if chunk is None:
+            return Response({
+                'error': f'Content-Range must be "bytes start-end/{session.total_size}" '
+                         f'covering at most {settings.UPLOAD_CHUNK_MAX_SIZE} bytes'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        offset, length = chunk
+        
+        try:
+            written = uploads.write_chunk(session, offset, length, request.stream)
+        except ValidationError as exc:
+            # First chunk does not match the declared file; nothing later can fix that
+            session.status = UploadSessionStatus.ABORTED
+            session.save(update_fields=['status', 'updated_at'])
+            uploads.delete_part_file(session)
+            return Response({'file': exc.detail}, status=status.HTTP_400_BAD_REQUEST)
+        if written != length:
+            return Response({'error': f'Expected {length} bytes, received {written}'},
+                           status=status.HTTP_400_BAD_REQUEST)
+        
+        UploadChunk.objects.update_or_create(session=session, offset=offset, defaults={'size': length})
+        return Response({
+            'offset': offset,
+            'size': length,
+            'missing_ranges': session.missing_ranges(),
+        })
+    
+    def delete(self, request, session_id):
+        session = get_upload_session(request, session_id)
+        if session.status == UploadSessionStatus.COMPLETED:
+            return Response({'error': 'Upload session is completed'}, status=status.HTTP_409_CONFLICT)
+        session.status = UploadSessionStatus.ABORTED
+        session.save(update_fields=['status', 'updated_at'])
+        uploads.delete_part_file(session)
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+
+class UploadSessionCompleteView(APIView):
+    """Assemble a fully received session into Media"""
+    permission_classes = [permissions.IsAuthenticated]
+    
+    def post(self, request, session_id):
+        session = get_upload_session(request, session_id)
+        if session.status == UploadSessionStatus.COMPLETED and session.media_id:
+            # Retried finalize after a dropped response
+            return upload_response(request, session.media, status.HTTP_200_OK)
+        error = inactive_session_response(session)
+        if error is not None:
+            return error
+        
+        missing = session.missing_ranges()
+        if missing:
+            return Response({'error': 'Upload is incomplete', 'missing_ranges': missing},
+                           status=status.HTTP_400_BAD_REQUEST)
+        
+        claimed = UploadSession.objects.filter(pk=session.pk, status=UploadSessionStatus.ACTIVE).update(
+            status=UploadSessionStatus.COMPLETING, updated_at=timezone.now()
+        )
+        if not claimed:
+            return Response({'error': 'Upload is already being completed'}, status=status.HTTP_409_CONFLICT)
+        
+        data = {
+            'file': uploads.AssembledUpload(session),
+            'media_type': session.media_type,
+            'title': session.title,
+            'description': session.description,
+            'is_public': session.is_public,
+        }
+        if session.place_id:
+            data['place'] = session.place_id
+        serializer = MediaUploadSerializer(data=data, context={'request': request})
+        
+        try:
+            if not serializer.is_valid():
+                session.status = UploadSessionStatus.ABORTED
+                session.save(update_fields=['status', 'updated_at'])
+                uploads.delete_part_file(session)
+                return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+            
+            with transaction.atomic():
+                media = publish_upload(request, serializer)
+                session.status = UploadSessionStatus.COMPLETED
+                session.media = media
+                session.save(update_fields=['status', 'media', 'updated_at'])
+        except Exception:
+            # Retrying is only possible while the assembled part file is untouched;
+            # once storage has moved or consumed it the session can't be completed
+            if uploads.part_file_intact(session):
+                UploadSession.objects.filter(pk=session.pk).update(
+                    status=UploadSessionStatus.ACTIVE, updated_at=timezone.now()
+                )
+            else:
+                UploadSession.objects.filter(pk=session.pk).update(
+                    status=UploadSessionStatus.FAILED, updated_at=timezone.now()
+                )
+                uploads.delete_part_file(session)
+            raise
+        finally:
+            data['file'].close()
+        
+        # Storages that copy rather than move the part file leave it behind
+        uploads.delete_part_file(session)
+        return upload_response(request, media)
+
+
 class MediaFeedView(generics.ListAPIView):
     """View to get public media feed for all users"""
     serializer_class = MediaFeedSerializer
     permission_classes = [permissions.AllowAny]
+    pagination_class = KeysetPagination
+    default_near_radius_km = 5
+    max_near_radius_km = 50
+    
+    @anonymous_response_cache('media')
+    def get(self, request, *args, **kwargs):
+        return super().get(request, *args, **kwargs)
     
     def get_queryset(self):
         """Get public media ordered by latest first"""
         queryset = Media.objects.filter(
             is_public=True,
             is_deleted=False
-        ).select_related('uploaded_by', 'place', 'place__city').order_by('-created_at')
+        ).select_related('uploaded_by__profile', 'place__city').prefetch_related('renditions').order_by('-created_at')
         
         # Filter by media type if provided
         media_type = self.request.query_params.get('type')
@@ -106,7 +385,26 @@ class MediaFeedView(generics.ListAPIView):
         if user_id:
             queryset = queryset.filter(uploaded_by_id=user_id)
         
+        # Filter to spots near a point: ?near=lat,lng[&radius=km]
+        near = self.request.query_params.get('near')
+        if near:
+            queryset = queryset.filter(place__in=self.nearby_places(near).values('id'))
+        
         return queryset
+    
+    def nearby_places(self, near):
+        """Places within the radius as a subquery, narrowed by the geohash index"""
+        params = self.request.query_params
+        try:
+            latitude, _, longitude = near.partition(',')
+            latitude, longitude = geo.parse_point(latitude, longitude)
+            radius = float(params.get('radius', self.default_near_radius_km))
+        except ValueError as exc:
+            raise ValidationError({'near': str(exc)})
+        if not 0 < radius <= self.max_near_radius_km:
+            raise ValidationError({'radius': f'radius must be between 0 and {self.max_near_radius_km} km'})
+        
+        return Place.objects.filter(is_deleted=False).within(latitude, longitude, radius)
 
 
 class UserMediaView(generics.ListAPIView):
@@ -119,7 +417,7 @@ class UserMediaView(generics.ListAPIView):
         return Media.objects.filter(
             uploaded_by=self.request.user,
             is_deleted=False
-        ).select_related('place', 'place__city').order_by('-created_at')
+        ).select_related('place', 'place__city').prefetch_related('renditions').order_by('-created_at')
 
 
 class MediaDetailView(generics.RetrieveAPIView):
@@ -130,15 +428,19 @@ class MediaDetailView(generics.RetrieveAPIView):
     def get_queryset(self):
         """Get media that is public or belongs to the current user"""
         if self.request.user.is_authenticated:
-            return Media.objects.filter(
+            queryset = Media.objects.filter(
                 Q(is_public=True) | Q(uploaded_by=self.request.user),
                 is_deleted=False
-            ).select_related('uploaded_by', 'place', 'place__city')
+            )
         else:
-            return Media.objects.filter(
+            queryset = Media.objects.filter(
                 is_public=True,
                 is_deleted=False
-            ).select_related('uploaded_by', 'place', 'place__city')
+            )
+        # Single item: read exact counts in the same statement rather than the stored counters
+        return queryset.with_engagement().select_related(
+            'uploaded_by__profile', 'place__city'
+        ).prefetch_related('renditions')
 
 
 class MediaUpdateView(generics.UpdateAPIView):
@@ -193,7 +495,127 @@ class PlacesListView(generics.ListAPIView):
     serializer_class = PlaceSerializer
     permission_classes = [permissions.AllowAny]
     
+    @anonymous_response_cache('places')
+    def get(self, request, *args, **kwargs):
+        return super().get(request, *args, **kwargs)
+    
     def get_queryset(self):
         """Get all places ordered by name"""
         return Place.objects.filter(is_deleted=False).select_related('city').order_by('name')
 
+
+
+class PlacesNearbyView(APIView):
+    """Places near a point, nearest first: ?lat=&lng=[&radius=km][&limit=]"""
+    permission_classes = [permissions.AllowAny]
+    default_limit = 20
+    max_limit = 100
+    max_radius_km = 50
+    
+    @anonymous_response_cache('places')
+    def get(self, request):
+        params = request.query_params
+        try:
+            latitude, longitude = geo.parse_point(params.get('lat'), params.get('lng'))
+            radius = float(params['radius']) if 'radius' in params else None
+            limit = int(params.get('limit', self.default_limit))
+        except ValueError as exc:
+            return Response({'error': str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+        if radius is not None and not 0 < radius <= self.max_radius_km:
+            return Response({'error': f'radius must be between 0 and {self.max_radius_km} km'},
+                           status=status.HTTP_400_BAD_REQUEST)
+        limit = max(1, min(limit, self.max_limit))
+        
+        places = Place.objects.filter(is_deleted=False).select_related('city').nearby(
+            latitude, longitude, limit, radius_km=radius, max_radius_km=self.max_radius_km
+        )
+        return Response(NearbyPlaceSerializer(places, many=True, context={'request': request}).data)
+
+
+class PlaceClustersView(APIView):
+    """Pre-aggregated map clusters: ?bbox=south,west,north,east&zoom="""
+    permission_classes = [permissions.AllowAny]
+    
+    def get(self, request):
+        try:
+            south, west, north, east = (float(value) for value in request.query_params.get('bbox', '').split(','))
+            zoom = int(request.query_params.get('zoom', ''))
+        except ValueError:
+            return Response({'error': 'bbox=south,west,north,east and zoom are required'},
+                           status=status.HTTP_400_BAD_REQUEST)
+        if not (-90 <= south <= north <= 90 and -180 <= west <= 180 and -180 <= east <= 180):
+            return Response({'error': 'bbox is outside [-90, 90] x [-180, 180] or south > north'},
+                           status=status.HTTP_400_BAD_REQUEST)
+        
+        precision = clusters.precision_for_zoom(zoom)
+        # A box crossing the antimeridian (west > east) is read as two boxes
+        spans = [(west, east)] if west <= east else [(west, 180.0), (-180.0, east)]
+        boxes = [clusters.snap_bbox(south, span_west, north, span_east, precision) for span_west, span_east in spans]
+        if sum(clusters.cell_count(*box, precision) for box in boxes) > clusters.MAX_CELLS:
+            return Response({'error': 'Bounding box is too large for this zoom level'},
+                           status=status.HTTP_400_BAD_REQUEST)
+        
+        resolver = MediaURLResolver(request)
+        results = []
+        for box in boxes:
+            for cluster in clusters.get_clusters(*box, zoom):
+                top_media = cluster['top_media']
+                if top_media is not None:
+                    top_media = {'id': top_media['id'], 'thumbnail_url': resolver.url_for_name(top_media['thumbnail'])}
+                results.append({**cluster, 'top_media': top_media})
+        
+        return Response({'zoom': zoom, 'precision': precision, 'clusters': results})
+
+
+class PlaceAutocompleteView(APIView):
+    """Typeahead for the upload place picker, most photographed first: ?q=[&limit=]"""
+    permission_classes = [permissions.AllowAny]
+    default_limit = 10
+    max_limit = 25
+    
+    def get(self, request):
+        query = request.query_params.get('q', '').strip()
+        try:
+            limit = int(request.query_params.get('limit', self.default_limit))
+        except ValueError:
+            return Response({'error': 'limit must be a number'}, status=status.HTTP_400_BAD_REQUEST)
+        limit = max(1, min(limit, self.max_limit))
+        
+        return Response({'query': query, 'results': place_index.search(query, limit)})
+
+
+class SearchView(APIView):
+    """Ranked search over places, media and users: ?q=[&type=place|media|user][&limit=]"""
+    permission_classes = [permissions.AllowAny]
+    default_limit = 20
+    max_limit = 50
+    serializer_classes = {
+        'place': PlaceSerializer,
+        'media': MediaFeedSerializer,
+        'user': UserBasicSerializer,
+    }
+    
+    def get(self, request):
+        query = request.query_params.get('q', '').strip()
+        kind = request.query_params.get('type')
+        if kind and kind not in search.KINDS:
+            return Response({'error': f"type must be one of: {', '.join(search.KINDS)}"},
+                           status=status.HTTP_400_BAD_REQUEST)
+        try:
+            limit = max(1, min(int(request.query_params.get('limit', self.default_limit)), self.max_limit))
+        except ValueError:
+            return Response({'error': 'limit must be a number'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        hits = search.search(query, [kind] if kind else None, limit)
+        
+        # Serialize each kind as one list (so per-page lookups run once), then restore rank order
+        objects_by_kind = {}
+        for hit_kind, obj in hits:
+            objects_by_kind.setdefault(hit_kind, []).append(obj)
+        serialized = {}
+        for hit_kind, objects in objects_by_kind.items():
+            data = self.serializer_classes[hit_kind](objects, many=True, context={'request': request}).data
+            serialized[hit_kind] = iter(data)
+        
+        results = [{'type': hit_kind, 'object': next(serialized[hit_kind])} for hit_kind, _ in hits]
+        return Response({'query': query, 'results': results})
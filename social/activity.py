@@ -0,0 +1,235 @@
+import threading
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.contenttypes.models import ContentType
+from django.db import transaction
+from django.db.models import Min
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from social.enums import ActivityType
+from social.models import Activity, ActivityCounter, Comment, Like, Share
+
+# Interactions on an object that are rolled up into one notification, and the
+# rows that record them
+AGGREGATED_TYPES = {
+    ActivityType.LIKE: Like,
+    ActivityType.COMMENT: Comment,
+    ActivityType.SHARE: Share,
+}
+
+_state = threading.local()
+
+
+# -----------------------------
+# 📣 Activity emission
+# -----------------------------
+# Every activity goes through emit(). Activities are buffered until the
+# surrounding transaction commits and then written with one bulk_create;
+# outside a transaction the buffer is flushed straight away. Within one
+# buffer an activity is only recorded once per (actor, target, type, content
+# object), so a view and a signal reacting to the same save don't both write
+# it. Each savepoint level has its own buffer, so nothing emitted inside a
+# savepoint or transaction that rolls back is written.
+#
+# Likes, comments and shares are aggregated: while the owner has an unread
+# notification for the same object and type younger than
+# ACTIVITY_AGGREGATION_WINDOW, new interactions update that row (count,
+# latest actor, recent actor ids, timestamp) instead of adding one, so a
+# post with 10k likes is one "Ali and 9,999 others liked your video". The
+# count is the number of distinct users with a Like/Comment/Share row on the
+# object since the notification opened, so repeat interactions by the same
+# user are counted once; recent actor ids are only for display.
+
+def activity_key(activity):
+    return (
+        activity.actor_id, activity.target_user_id, activity.activity_type,
+        activity.content_type_id, activity.object_id,
+    )
+
+
+def _live_buffers():
+    """Buffers of the current transaction whose flush is still registered, by savepoint ids"""
+    registered = [func for _, func, _ in transaction.get_connection().run_on_commit]
+    buffers = {
+        savepoint_ids: pending for savepoint_ids, pending in getattr(_state, 'buffers', {}).items()
+        # A rolled-back savepoint (or transaction) took its buffer's flush with it
+        if pending['flush'] in registered
+    }
+    _state.buffers = buffers
+    return buffers
+
+
+def _buffer_for_savepoint(buffers):
+    """
+    The buffer for the innermost savepoint, registering its flush there.
+
+    Django drops on_commit callbacks registered inside a savepoint that rolls
+    back, so activities emitted inside it are discarded with it.
+    """
+    savepoint_ids = tuple(transaction.get_connection().savepoint_ids)
+    pending = buffers.get(savepoint_ids)
+    if pending is None:
+        pending = {'activities': {}}
+        pending['flush'] = lambda: flush(pending)
+        buffers[savepoint_ids] = pending
+        transaction.on_commit(pending['flush'])
+    return pending
+
+
+def emit(actor, target_user, activity_type, content_object=None, extra_data=None):
+    """
+    Record an activity once the current transaction commits.
+
+    Returns the buffered Activity (the one already buffered for the same
+    actor, target, type and content object, if any). Aggregated types may
+    end up merged into an existing notification instead of being inserted.
+    """
+    activity = Activity(
+        actor=actor,
+        target_user=target_user,
+        activity_type=activity_type,
+        extra_data=extra_data or {},
+    )
+    if content_object is not None:
+        activity.content_type = ContentType.objects.get_for_model(content_object)
+        activity.object_id = content_object.pk
+    if not transaction.get_connection().in_atomic_block:
+        flush({'activities': {activity_key(activity): activity}})
+        return activity
+    key = activity_key(activity)
+    buffers = _live_buffers()
+    for pending in buffers.values():
+        if key in pending['activities']:
+            return pending['activities'][key]
+    _buffer_for_savepoint(buffers)['activities'][key] = activity
+    return activity
+
+
+def flush(pending):
+    activities = list(pending['activities'].values())
+    pending['activities'] = {}
+    buffers = getattr(_state, 'buffers', {})
+    for savepoint_ids in [ids for ids, buffer in buffers.items() if buffer is pending]:
+        del buffers[savepoint_ids]
+    if not activities:
+        return
+
+    new_rows, groups = [], {}
+    for activity in activities:
+        if settings.ACTIVITY_AGGREGATION_WINDOW and activity.activity_type in AGGREGATED_TYPES \
+                and activity.object_id is not None:
+            group = (activity.target_user_id, activity.activity_type, activity.content_type_id, activity.object_id)
+            groups.setdefault(group, []).append(activity)
+        else:
+            new_rows.append(activity)
+    with transaction.atomic():
+        for batch in groups.values():
+            rolled_up = roll_up(batch)
+            if rolled_up is not None:
+                new_rows.append(rolled_up)
+        Activity.objects.bulk_create(new_rows)
+        ActivityCounter.record_new(new_rows)
+
+
+def interactions(activity):
+    """Rows of other users' interactions behind an aggregated activity"""
+    model = AGGREGATED_TYPES[activity.activity_type]
+    rows = model.objects.filter(content_type_id=activity.content_type_id, object_id=activity.object_id)
+    if model is Comment:
+        rows = rows.filter(is_deleted=False)
+    return rows.exclude(user_id=activity.target_user_id)
+
+
+def roll_up(batch):
+    """
+    Fold same-object interactions into the open notification for them.
+
+    Returns the activity to insert when no notification is open.
+    """
+    latest = batch[-1]
+    actor_ids = []
+    for activity in reversed(batch):
+        if activity.actor_id not in actor_ids:
+            actor_ids.append(activity.actor_id)
+    keep = settings.ACTIVITY_RECENT_ACTORS
+
+    cutoff = timezone.now() - timedelta(seconds=settings.ACTIVITY_AGGREGATION_WINDOW)
+    current = Activity.objects.select_for_update().filter(
+        target_user_id=latest.target_user_id,
+        activity_type=latest.activity_type,
+        content_type_id=latest.content_type_id,
+        object_id=latest.object_id,
+        is_read=False,
+        is_deleted=False,
+        created_at__gte=cutoff,
+    ).order_by('-created_at').first()
+
+    rows = interactions(latest)
+    if current is None:
+        # The notification opens with the earliest of these interactions
+        since = rows.filter(user_id__in=actor_ids, created_at__gte=cutoff).aggregate(
+            since=Min('created_at')
+        )['since'] or latest.created_at
+        recent = []
+        extra_data = latest.extra_data
+    else:
+        since = parse_datetime(current.extra_data.get('since', '')) or current.created_at
+        recent = current.extra_data.get('recent_actors', [current.actor_id])
+        extra_data = {**current.extra_data, **latest.extra_data}
+    # At least the notification's own actor, for interactions recorded without a row
+    count = max(rows.filter(created_at__gte=since).values('user_id').distinct().count(), 1)
+    extra_data = {
+        **extra_data,
+        'since': since.isoformat(),
+        'recent_actors': (actor_ids + [actor_id for actor_id in recent if actor_id not in actor_ids])[:keep],
+    }
+
+    if current is None:
+        latest.aggregate_count = count
+        latest.extra_data = extra_data
+        return latest
+
+    Activity.objects.filter(pk=current.pk).update(
+        actor_id=latest.actor_id,
+        aggregate_count=count,
+        extra_data=extra_data,
+        created_at=latest.created_at,
+        updated_at=timezone.now(),
+    )
+    return None
+
+
+# -----------------------------
+# 📥 Content object loading
+# -----------------------------
+
+def attach_content_objects(activities):
+    """
+    Load the content objects of a page of activities with one in_bulk per
+    content type and cache them on the activities' content_object.
+
+    The activities need content_type selected. Missing objects are cached
+    as None, like a dangling GenericForeignKey.
+    """
+    ids_by_type = {}
+    for activity in activities:
+        if activity.content_type_id is not None:
+            ids_by_type.setdefault(activity.content_type_id, set()).add(activity.object_id)
+
+    loaded = {}
+    for activity in activities:
+        content_type_id = activity.content_type_id
+        if content_type_id is not None and content_type_id not in loaded:
+            model = activity.content_type.model_class()
+            # Like GenericForeignKey, soft-deleted objects are still returned
+            loaded[content_type_id] = model._base_manager.in_bulk(ids_by_type[content_type_id]) if model else {}
+
+    field = Activity._meta.get_field('content_object')
+    for activity in activities:
+        content_object = None
+        if activity.content_type_id is not None:
+            content_object = loaded[activity.content_type_id].get(activity.object_id)
+        field.set_cached_value(activity, content_object)
+    return activities
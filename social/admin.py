@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Like, Comment, Share, Follow, Activity
+from .models import Like, Comment, Share, Follow, Activity, ActivityCounter
 
 
 @admin.register(Like)
@@ -32,10 +32,17 @@ class FollowAdmin(admin.ModelAdmin):
 
 @admin.register(Activity)
 class ActivityAdmin(admin.ModelAdmin):
-    list_display = ['actor', 'target_user', 'activity_type', 'is_read', 'created_at']
+    list_display = ['actor', 'target_user', 'activity_type', 'aggregate_count', 'is_read', 'created_at']
     list_filter = ['activity_type', 'is_read', 'created_at']
     search_fields = ['actor__username', 'target_user__username']
     readonly_fields = ['created_at', 'updated_at']
     
     def get_queryset(self, request):
         return super().get_queryset(request).select_related('actor', 'target_user', 'content_type')
+
+
+@admin.register(ActivityCounter)
+class ActivityCounterAdmin(admin.ModelAdmin):
+    list_display = ['user', 'total', 'unread', 'updated_at']
+    search_fields = ['user__username']
+    readonly_fields = ['updated_at']
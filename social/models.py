@@ -1,11 +1,22 @@
 from django.contrib.contenttypes.fields import GenericForeignKey
 from django.contrib.contenttypes.models import ContentType
-from django.db import models
+from django.core.cache import cache
+from django.db import models, transaction
+from django.db.models import Count, F
+from django.db.models.functions import Greatest
 from django.contrib.auth.models import User
 from django.utils import timezone
-from core.mixins import TimeStampedMixin, SoftDeleteMixin, GenericRelationBaseMixin
+from core.mixins import TimeStampedMixin, SoftDeleteMixin, GenericRelationBaseMixin, EngagementCounterMixin
 from social.enums import ActivityType, SharePlatform
 
+
+def adjust_engagement_counter(content_type_id, object_id, field, delta):
+    """Shift the stored counter on the target object, if its model keeps one"""
+    model = ContentType.objects.get_for_id(content_type_id).model_class()
+    if model is not None and issubclass(model, EngagementCounterMixin):
+        model.adjust_counter(object_id, field, delta)
+
+
 class Like(GenericRelationBaseMixin, TimeStampedMixin, models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='likes_given')
     
@@ -52,6 +63,14 @@ class Comment(GenericRelationBaseMixin, TimeStampedMixin, SoftDeleteMixin, model
             self.is_edited = True
             self.edited_at = timezone.now()
         super().save(*args, **kwargs)
+
+    def delete(self, *args, **kwargs):
+        """Soft delete and drop the comment from the target's comment_count"""
+        was_deleted = self.is_deleted
+        with transaction.atomic():
+            super().delete(*args, **kwargs)
+            if not was_deleted:
+                adjust_engagement_counter(self.content_type_id, self.object_id, 'comment_count', -1)
     
     @classmethod
     def get_comments_for_content(cls, content_object):
@@ -113,12 +132,15 @@ class Activity(TimeStampedMixin, SoftDeleteMixin, models.Model):
     extra_data = models.JSONField(default=dict, blank=True)
     
     is_read = models.BooleanField(default=False)
+    # Interactions rolled into this notification (see social.activity)
+    aggregate_count = models.PositiveIntegerField(default=1)
     
     class Meta:
         ordering = ['-created_at']
         indexes = [
             models.Index(fields=['target_user', '-created_at']),
             models.Index(fields=['target_user', 'is_read']),
+            models.Index(fields=['target_user', 'content_type', 'object_id', 'activity_type']),  # Open roll-ups
         ]
 
     def __str__(self):
@@ -126,11 +148,84 @@ class Activity(TimeStampedMixin, SoftDeleteMixin, models.Model):
 
     @classmethod
     def create_activity(cls, actor, target_user, activity_type, content_object=None, extra_data=None):
-        """Helper method to create activities"""
-        return cls.objects.create(
-            actor=actor,
-            target_user=target_user,
-            activity_type=activity_type,
-            content_object=content_object,
-            extra_data=extra_data or {}
-        )
\ No newline at end of file
+        """Record an activity; it is written (once) when the current transaction commits"""
+        from social.activity import emit
+        return emit(actor, target_user, activity_type, content_object=content_object, extra_data=extra_data)
+
+
+class ActivityCounter(models.Model):
+    """Per-user activity totals behind the stats endpoint and unread badge"""
+    user = models.OneToOneField(User, on_delete=models.CASCADE, primary_key=True, related_name='activity_counter')
+    total = models.PositiveIntegerField(default=0)
+    unread = models.PositiveIntegerField(default=0)
+    by_type = models.JSONField(default=dict, blank=True)  # activity_type -> count
+    updated_at = models.DateTimeField(auto_now=True)
+
+    STATS_TIMEOUT = 30
+
+    def __str__(self):
+        return f"{self.user_id}: {self.unread}/{self.total} unread"
+
+    @staticmethod
+    def stats_cache_key(user_id):
+        return f"activity:stats:{user_id}"
+
+    @classmethod
+    def invalidate_stats(cls, user_id):
+        cache.delete(cls.stats_cache_key(user_id))
+
+    @classmethod
+    def backfill(cls, user_id):
+        """Create the counter from the user's activities (once, for users who predate it)"""
+        activities = Activity.objects.filter(target_user_id=user_id)
+        by_type = dict(activities.order_by().values_list('activity_type').annotate(count=Count('id')))
+        counter, _ = cls.objects.get_or_create(user_id=user_id, defaults={
+            'total': sum(by_type.values()),
+            'unread': activities.filter(is_read=False).count(),
+            'by_type': by_type,
+        })
+        return counter
+
+    @classmethod
+    def get_stats(cls, user_id):
+        """Stats for the user: one primary key lookup, cached for STATS_TIMEOUT"""
+        key = cls.stats_cache_key(user_id)
+        stats = cache.get(key)
+        if stats is None:
+            counter = cls.objects.filter(pk=user_id).first() or cls.backfill(user_id)
+            stats = {
+                'total_activities': counter.total,
+                'unread_count': counter.unread,
+                'activities_by_type': dict(sorted(counter.by_type.items(), key=lambda item: -item[1])),
+            }
+            cache.set(key, stats, cls.STATS_TIMEOUT)
+        return stats
+
+    @classmethod
+    def record_new(cls, activities):
+        """Count newly inserted (unread) activities; call in the inserting transaction"""
+        by_user = {}
+        for activity in activities:
+            by_type = by_user.setdefault(activity.target_user_id, {})
+            by_type[activity.activity_type] = by_type.get(activity.activity_type, 0) + 1
+
+        for user_id, by_type in by_user.items():
+            counter = cls.objects.select_for_update().filter(pk=user_id).first()
+            if counter is None:
+                # The backfill counts the rows just inserted
+                cls.backfill(user_id)
+            else:
+                for activity_type, count in by_type.items():
+                    counter.by_type[activity_type] = counter.by_type.get(activity_type, 0) + count
+                added = sum(by_type.values())
+                cls.objects.filter(pk=user_id).update(
+                    total=F('total') + added, unread=F('unread') + added, by_type=counter.by_type
+                )
+            transaction.on_commit(lambda user_id=user_id: cls.invalidate_stats(user_id))
+
+    @classmethod
+    def record_read(cls, user_id, count=None):
+        """Drop count activities (all of them when None) from the unread badge"""
+        unread = 0 if count is None else Greatest(F('unread') - count, 0)
+        cls.objects.filter(pk=user_id).update(unread=unread)
+        transaction.on_commit(lambda: cls.invalidate_stats(user_id))
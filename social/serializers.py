@@ -1,8 +1,9 @@
 from rest_framework import serializers
+from core.media_urls import get_media_url_resolver
 from django.contrib.auth.models import User
 from django.contrib.contenttypes.models import ContentType
 from .models import Like, Comment, Share, Follow, Activity
-from feed.models import Place, UserProfile
+from feed.models import Media, Place, UserProfile
 
 
 class UserBasicSerializer(serializers.ModelSerializer):
@@ -15,13 +16,9 @@ class UserBasicSerializer(serializers.ModelSerializer):
     
     def get_profile_picture_url(self, obj):
         try:
-            profile = obj.profile
-            if profile.profile_picture:
-                request = self.context.get("request")
-                return request.build_absolute_uri(profile.profile_picture.url)
+            return get_media_url_resolver(self.context).url(obj.profile.profile_picture)
         except UserProfile.DoesNotExist:
-            pass
-        return None
+            return None
 
 
 class ContentObjectSerializer(serializers.Serializer):
@@ -52,11 +49,9 @@ class ContentObjectSerializer(serializers.Serializer):
             
         # Add URL if it's a media object
         if hasattr(instance, 'file') and instance.file:
-            request = self.context.get("request")
-            data['url'] = request.build_absolute_uri(instance.file.url)
+            data['url'] = get_media_url_resolver(self.context).url(instance.file)
         elif hasattr(instance, 'profile_picture') and instance.profile_picture:
-            request = self.context.get("request")
-            data['url'] = request.build_absolute_uri(instance.profile_picture.url)
+            data['url'] = get_media_url_resolver(self.context).url(instance.profile_picture)
             
         return data
 
@@ -72,7 +67,8 @@ class ActivitySerializer(serializers.ModelSerializer):
         model = Activity
         fields = [
             'id', 'actor', 'activity_type', 'content_object_data', 
-            'activity_message', 'time_ago', 'is_read', 'created_at', 'extra_data'
+            'activity_message', 'time_ago', 'is_read', 'created_at', 'extra_data',
+            'aggregate_count'
         ]
     
     def get_content_object_data(self, obj):
@@ -84,6 +80,13 @@ class ActivitySerializer(serializers.ModelSerializer):
         """Generate human-readable activity message"""
         actor_name = obj.actor.first_name or obj.actor.username
         
+        # Rolled-up notifications name the latest actor: "Ali and 241 others"
+        others = obj.aggregate_count - 1
+        if others == 1:
+            actor_name = f"{actor_name} and 1 other"
+        elif others > 1:
+            actor_name = f"{actor_name} and {others:,} others"
+        
         messages = {
             'follow': f"{actor_name} started following you",
             'like': f"{actor_name} liked your {self._get_content_type_name(obj)}",
@@ -99,9 +102,11 @@ class ActivitySerializer(serializers.ModelSerializer):
         """Get a human-readable name for the content type"""
         if not obj.content_object:
             return "content"
+        
+        if isinstance(obj.content_object, Media):
+            return obj.content_object.media_type  # "photo" or "video"
             
         content_type_map = {
-            'video': 'video',
             'place': 'place',
             'userprofile': 'profile',
         }
@@ -3,7 +3,7 @@ from django.dispatch import receiver
 from django.contrib.auth.models import User
 from django.contrib.contenttypes.models import ContentType
 
-from .models import Activity
+from .models import Activity, Like, Comment, Share, adjust_engagement_counter
 from .enums import ActivityType
 from feed.models import Place, Media
 
@@ -32,3 +32,47 @@ def create_place_created_activity(sender, instance, created, **kwargs):
             activity_type=ActivityType.PLACE_CREATED,
             content_object=instance
         )
+
+
+# -----------------------------
+# 🔢 Engagement counters
+# -----------------------------
+
+@receiver(post_save, sender=Like)
+def increment_like_count(sender, instance, created, **kwargs):
+    """Count a new like on the liked object"""
+    if created:
+        adjust_engagement_counter(instance.content_type_id, instance.object_id, 'like_count', 1)
+
+
+@receiver(post_delete, sender=Like)
+def decrement_like_count(sender, instance, **kwargs):
+    """Drop a removed like from the liked object"""
+    adjust_engagement_counter(instance.content_type_id, instance.object_id, 'like_count', -1)
+
+
+@receiver(post_save, sender=Comment)
+def increment_comment_count(sender, instance, created, **kwargs):
+    """Count a new comment on the commented object"""
+    if created and not instance.is_deleted:
+        adjust_engagement_counter(instance.content_type_id, instance.object_id, 'comment_count', 1)
+
+
+@receiver(post_delete, sender=Comment)
+def decrement_comment_count(sender, instance, **kwargs):
+    """Drop a hard-deleted comment; soft deletes are handled by Comment.delete"""
+    if not instance.is_deleted:
+        adjust_engagement_counter(instance.content_type_id, instance.object_id, 'comment_count', -1)
+
+
+@receiver(post_save, sender=Share)
+def increment_share_count(sender, instance, created, **kwargs):
+    """Count a new share of the shared object"""
+    if created:
+        adjust_engagement_counter(instance.content_type_id, instance.object_id, 'share_count', 1)
+
+
+@receiver(post_delete, sender=Share)
+def decrement_share_count(sender, instance, **kwargs):
+    """Drop a removed share from the shared object"""
+    adjust_engagement_counter(instance.content_type_id, instance.object_id, 'share_count', -1)
@@ -0,0 +1,242 @@
+from django.contrib.contenttypes.models import ContentType
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count
+from django.test import TransactionTestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from feed.models import Media
+from feed.tests.utils import MediaTestCase, make_user
+from social.activity import emit
+from social.enums import ActivityType
+from social.models import Activity, ActivityCounter
+from social.serializers import ActivitySerializer
+
+
+class ActivityEmitterTests(TransactionTestCase):
+    """
+    emit() buffers per savepoint through Django's on_commit internals; these
+    run real transactions so an upgrade that changes them fails here.
+    """
+
+    def setUp(self):
+        self.owner = make_user('owner')
+        self.fans = [make_user(f'fan{i}') for i in range(3)]
+
+    def follows(self):
+        return sorted(Activity.objects.filter(activity_type=ActivityType.FOLLOW).values_list('actor__username', flat=True))
+
+    def test_outside_a_transaction_writes_immediately(self):
+        emit(self.fans[0], self.owner, ActivityType.FOLLOW)
+        self.assertEqual(self.follows(), ['fan0'])
+
+    def test_written_on_commit(self):
+        with transaction.atomic():
+            emit(self.fans[0], self.owner, ActivityType.FOLLOW)
+            self.assertEqual(self.follows(), [])
+        self.assertEqual(self.follows(), ['fan0'])
+
+    def test_rolled_back_transaction_writes_nothing(self):
+        with self.assertRaises(RuntimeError), transaction.atomic():
+            emit(self.fans[0], self.owner, ActivityType.FOLLOW)
+            raise RuntimeError
+        self.assertEqual(self.follows(), [])
+        # Nothing stale is left buffered for the next transaction
+        with transaction.atomic():
+            emit(self.fans[1], self.owner, ActivityType.FOLLOW)
+        self.assertEqual(self.follows(), ['fan1'])
+
+    def test_rolled_back_savepoint_drops_its_activities(self):
+        with transaction.atomic():
+            emit(self.fans[0], self.owner, ActivityType.FOLLOW)
+            with self.assertRaises(RuntimeError), transaction.atomic():
+                emit(self.fans[1], self.owner, ActivityType.FOLLOW)
+                # Already buffered outside the savepoint: kept
+                emit(self.fans[0], self.owner, ActivityType.FOLLOW)
+                raise RuntimeError
+            emit(self.fans[2], self.owner, ActivityType.FOLLOW)
+        self.assertEqual(self.follows(), ['fan0', 'fan2'])
+
+    def test_re_emitting_after_a_savepoint_rolled_back(self):
+        with transaction.atomic():
+            with self.assertRaises(RuntimeError), transaction.atomic():
+                emit(self.fans[0], self.owner, ActivityType.FOLLOW)
+                raise RuntimeError
+            emit(self.fans[0], self.owner, ActivityType.FOLLOW)
+        self.assertEqual(self.follows(), ['fan0'])
+
+    def test_released_savepoint_keeps_its_activities(self):
+        with transaction.atomic():
+            with transaction.atomic():
+                emit(self.fans[0], self.owner, ActivityType.FOLLOW)
+                with transaction.atomic():
+                    emit(self.fans[1], self.owner, ActivityType.FOLLOW)
+            self.assertEqual(self.follows(), [])
+        self.assertEqual(self.follows(), ['fan0', 'fan1'])
+
+    def test_duplicates_in_one_transaction_are_merged(self):
+        media = Media.objects.create(file='media/clip.mp4', media_type='video', uploaded_by=self.owner)
+        Activity.objects.all().delete()
+        with transaction.atomic():
+            first = emit(self.fans[0], self.owner, ActivityType.FOLLOW)
+            with transaction.atomic():
+                self.assertIs(emit(self.fans[0], self.owner, ActivityType.FOLLOW), first)
+            emit(self.fans[0], self.owner, ActivityType.SHARE, media)
+            emit(self.fans[0], self.owner, ActivityType.SHARE, media)
+        self.assertEqual(self.follows(), ['fan0'])
+        self.assertEqual(Activity.objects.filter(activity_type=ActivityType.SHARE).count(), 1)
+        self.assertEqual(Activity.objects.get(activity_type=ActivityType.SHARE).content_type,
+                         ContentType.objects.get_for_model(Media))
+
+
+@override_settings(ACTIVITY_RECENT_ACTORS=3)
+class ActivityRollUpTests(MediaTestCase):
+    def setUp(self):
+        super().setUp()
+        self.owner = make_user('owner')
+        self.fans = [make_user(f'fan{i}') for i in range(6)]
+        with self.captureOnCommitCallbacks(execute=True):
+            self.media = Media.objects.create(file='media/clip.mp4', media_type='video', uploaded_by=self.owner)
+        self.content_type = ContentType.objects.get_for_model(Media)
+
+    def client_for(self, user):
+        client = APIClient()
+        client.force_authenticate(user)
+        return client
+
+    def toggle_like(self, user):
+        return self.client_for(user).post(
+            reverse('toggle-like'), {'content_type_id': self.content_type.pk, 'object_id': self.media.pk}
+        )
+
+    def like(self, *users):
+        with self.captureOnCommitCallbacks(execute=True):
+            for user in users:
+                self.toggle_like(user)
+
+    def likes(self):
+        return Activity.objects.filter(activity_type=ActivityType.LIKE)
+
+    def message(self, activity):
+        return ActivitySerializer(activity).data['activity_message']
+
+    def test_likes_roll_up_into_one_notification(self):
+        for fan in self.fans[:5]:
+            self.like(fan)
+        notification = self.likes().get()
+        self.assertEqual(notification.aggregate_count, 5)
+        self.assertEqual(notification.actor, self.fans[4])
+        self.assertEqual(notification.extra_data['recent_actors'], [fan.pk for fan in self.fans[4:1:-1]])
+        self.assertEqual(self.message(notification), 'fan4 and 4 others liked your video')
+
+    def test_repeat_actor_is_counted_once(self):
+        for fan in self.fans[:5]:
+            self.like(fan)
+        # fan0 dropped out of recent_actors; unliking and liking again is still one liker
+        self.like(self.fans[0], self.fans[0])
+        self.like(self.fans[0])
+        self.like(self.fans[0])
+        notification = self.likes().get()
+        self.assertEqual(notification.aggregate_count, 5)
+        self.assertEqual(notification.actor, self.fans[0])
+        self.assertEqual(notification.extra_data['recent_actors'][0], self.fans[0].pk)
+
+    def test_like_removed_before_roll_up_is_not_counted(self):
+        self.like(self.fans[0])
+        # Liked and unliked before the batch was flushed
+        self.like(self.fans[1], self.fans[1], self.fans[2], self.fans[2])
+        self.assertEqual(self.likes().get().aggregate_count, 1)
+        self.like(self.fans[3])
+        self.assertEqual(self.likes().get().aggregate_count, 2)
+
+    def test_new_notification_once_the_previous_one_is_read(self):
+        self.like(self.fans[0], self.fans[1])
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client_for(self.owner).post(reverse('mark-activities-read'), {}, format='json')
+        self.like(self.fans[2])
+        read, unread = self.likes().order_by('is_read', 'created_at').reverse()
+        self.assertEqual((read.is_read, read.aggregate_count), (True, 2))
+        self.assertEqual((unread.is_read, unread.aggregate_count, unread.actor), (False, 1, self.fans[2]))
+        self.assertEqual(self.message(unread), 'fan2 liked your video')
+
+    def test_repeat_comments_count_one_commenter(self):
+        client = self.client_for(self.fans[0])
+        for text in ('first', 'second'):
+            with self.captureOnCommitCallbacks(execute=True):
+                client.post(reverse('add-comment'), {
+                    'content_type_id': self.content_type.pk, 'object_id': self.media.pk, 'text': text,
+                })
+        notification = Activity.objects.get(activity_type=ActivityType.COMMENT)
+        self.assertEqual((notification.aggregate_count, notification.extra_data['comment_text']), (1, 'second'))
+
+    @override_settings(ACTIVITY_AGGREGATION_WINDOW=0)
+    def test_aggregation_can_be_disabled(self):
+        self.like(self.fans[0], self.fans[1])
+        self.assertEqual(sorted(self.likes().values_list('aggregate_count', flat=True)), [1, 1])
+
+    def test_message_wording(self):
+        notification = Activity(actor=self.fans[0], target_user=self.owner, activity_type=ActivityType.LIKE,
+                                content_object=self.media)
+        for count, text in ((1, 'fan0 liked'), (2, 'fan0 and 1 other liked'), (1243, 'fan0 and 1,242 others liked')):
+            with self.subTest(count=count):
+                notification.aggregate_count = count
+                self.assertEqual(self.message(notification), f'{text} your video')
+
+
+class ActivityCounterTests(MediaTestCase):
+    def setUp(self):
+        super().setUp()
+        self.owner = make_user('owner')
+        self.fans = [make_user(f'fan{i}') for i in range(4)]
+        self.client = APIClient()
+        self.client.force_authenticate(self.owner)
+
+    def recount(self):
+        activities = Activity.objects.filter(target_user=self.owner)
+        by_type = activities.order_by().values_list('activity_type').annotate(count=Count('id'))
+        return {
+            'total_activities': activities.count(),
+            'unread_count': activities.filter(is_read=False).count(),
+            'activities_by_type': dict(sorted(by_type, key=lambda item: -item[1])),
+        }
+
+    def emit_some(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            for fan in self.fans:
+                emit(fan, self.owner, ActivityType.FOLLOW)
+            emit(self.fans[0], self.owner, ActivityType.PLACE_CREATED)
+
+    def mark_read(self, activity_ids=None):
+        with self.captureOnCommitCallbacks(execute=True):
+            data = {'activity_ids': activity_ids} if activity_ids else {}
+            self.assertEqual(self.client.post(reverse('mark-activities-read'), data, format='json').status_code, 200)
+
+    def test_stats_match_a_recount(self):
+        self.assertEqual(ActivityCounter.get_stats(self.owner.id), self.recount())
+
+        # First emit for a user without a counter row backfills it
+        self.emit_some()
+        self.assertEqual(ActivityCounter.get_stats(self.owner.id), self.recount())
+        self.emit_some()
+        self.assertEqual(ActivityCounter.get_stats(self.owner.id)['total_activities'], 10)
+        self.assertEqual(ActivityCounter.get_stats(self.owner.id), self.recount())
+
+        # Already-read and other users' ids don't move the badge
+        other = Activity.objects.create(actor=self.owner, target_user=self.fans[0], activity_type=ActivityType.FOLLOW)
+        ids = list(Activity.objects.filter(target_user=self.owner).values_list('id', flat=True)[:3])
+        self.mark_read(ids)
+        self.mark_read(ids[:1] + [other.pk])
+        self.assertEqual(ActivityCounter.get_stats(self.owner.id)['unread_count'], 7)
+        self.assertEqual(ActivityCounter.get_stats(self.owner.id), self.recount())
+
+        self.mark_read()
+        self.assertEqual(ActivityCounter.get_stats(self.owner.id), self.recount())
+        self.emit_some()
+        self.assertEqual(ActivityCounter.get_stats(self.owner.id), self.recount())
+
+        # A missing row is rebuilt from the activities
+        ActivityCounter.objects.filter(pk=self.owner.pk).delete()
+        cache.clear()
+        self.assertEqual(ActivityCounter.get_stats(self.owner.id), self.recount())
+        self.assertTrue(ActivityCounter.objects.filter(pk=self.owner.pk).exists())
@@ -2,12 +2,15 @@ from rest_framework import generics, permissions, status
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from django.contrib.auth.models import User
-from django.db.models import Count, Q
+from django.db import transaction
+from django.db.models import Q
 from django.utils import timezone
 from django.contrib.contenttypes.models import ContentType
 from datetime import timedelta
 
-from .models import Activity, Follow, Like, Comment, Share
+from core.pagination import KeysetPagination
+from .activity import attach_content_objects
+from .models import Activity, ActivityCounter, Follow, Like, Comment, Share
 from .serializers import ActivitySerializer, FollowSerializer, ActivityStatsSerializer
 from .enums import ActivityType
 from feed.models import Place
@@ -17,6 +20,7 @@ class ActivityFeedView(generics.ListAPIView):
     """View to get the activity feed for the logged-in user"""
     serializer_class = ActivitySerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = KeysetPagination
     
     def get_queryset(self):
         """Get activities for the current user"""
@@ -24,8 +28,8 @@ class ActivityFeedView(generics.ListAPIView):
         
         # Get activities where the current user is the target
         queryset = Activity.objects.filter(target_user=user).select_related(
-            'actor', 'content_type'
-        ).prefetch_related('content_object')
+            'actor__profile', 'content_type'
+        )
         
         # Filter by activity type if provided
         activity_type = self.request.query_params.get('type')
@@ -38,6 +42,11 @@ class ActivityFeedView(generics.ListAPIView):
             queryset = queryset.filter(is_read=is_read.lower() == 'true')
         
         return queryset
+    
+    def paginate_queryset(self, queryset):
+        """Load the page's content objects with one query per content type"""
+        page = super().paginate_queryset(queryset)
+        return attach_content_objects(page)
 
 
 class ActivityStatsView(generics.RetrieveAPIView):
@@ -46,27 +55,8 @@ class ActivityStatsView(generics.RetrieveAPIView):
     serializer_class = ActivityStatsSerializer
     
     def get_object(self):
-        """Get activity statistics for the current user"""
-        user = self.request.user
-        
-        # Get total activities
-        total_activities = Activity.objects.filter(target_user=user).count()
-        
-        # Get unread count
-        unread_count = Activity.objects.filter(target_user=user, is_read=False).count()
-        
-        # Get activities by type
-        activities_by_type = Activity.objects.filter(target_user=user).values(
-            'activity_type'
-        ).annotate(count=Count('id')).order_by('-count')
-        
-        activities_by_type_dict = {item['activity_type']: item['count'] for item in activities_by_type}
-        
-        return {
-            'total_activities': total_activities,
-            'unread_count': unread_count,
-            'activities_by_type': activities_by_type_dict
-        }
+        """Get activity statistics for the current user from their counter row"""
+        return ActivityCounter.get_stats(self.request.user.id)
 
 
 class MarkActivitiesAsReadView(APIView):
@@ -77,15 +67,20 @@ class MarkActivitiesAsReadView(APIView):
         user = request.user
         activity_ids = request.data.get('activity_ids', [])
         
-        if activity_ids:
-            # Mark specific activities as read
-            Activity.objects.filter(
-                id__in=activity_ids,
-                target_user=user
-            ).update(is_read=True)
-        else:
-            # Mark all activities as read
-            Activity.objects.filter(target_user=user).update(is_read=True)
+        # The unread badge counter moves with the rows
+        with transaction.atomic():
+            if activity_ids:
+                # Mark specific activities as read
+                marked = Activity.objects.filter(
+                    id__in=activity_ids,
+                    target_user=user,
+                    is_read=False
+                ).update(is_read=True)
+                ActivityCounter.record_read(user.id, marked)
+            else:
+                # Mark all activities as read
+                Activity.objects.filter(target_user=user, is_read=False).update(is_read=True)
+                ActivityCounter.record_read(user.id)
         
         return Response({'message': 'Activities marked as read'}, status=status.HTTP_200_OK)
 
@@ -145,7 +140,7 @@ class FollowingListView(generics.ListAPIView):
     permission_classes = [permissions.IsAuthenticated]
     
     def get_queryset(self):
-        return Follow.objects.filter(follower=self.request.user).select_related('following')
+        return Follow.objects.filter(follower=self.request.user).select_related('following__profile')
 
 
 class FollowersListView(generics.ListAPIView):
@@ -154,7 +149,7 @@ class FollowersListView(generics.ListAPIView):
     permission_classes = [permissions.IsAuthenticated]
     
     def get_queryset(self):
-        return Follow.objects.filter(following=self.request.user).select_related('follower')
+        return Follow.objects.filter(following=self.request.user).select_related('follower__profile')
 
 
 class ToggleLikeView(APIView):
@@ -175,12 +170,15 @@ class ToggleLikeView(APIView):
         except (ContentType.DoesNotExist, Exception):
             return Response({'error': 'Content object not found'}, status=status.HTTP_404_NOT_FOUND)
         
-        # Check if already liked
-        like, created = Like.objects.get_or_create(
-            user=request.user,
-            content_type=content_type,
-            object_id=object_id
-        )
+        # Check if already liked; the like and the target's like_count move together
+        with transaction.atomic():
+            like, created = Like.objects.get_or_create(
+                user=request.user,
+                content_type=content_type,
+                object_id=object_id
+            )
+            if not created:
+                like.delete()
         
         if created:
             # Create activity for the content owner
@@ -202,7 +200,6 @@ class ToggleLikeView(APIView):
             
             return Response({'message': 'Liked successfully', 'liked': True}, status=status.HTTP_201_CREATED)
         else:
-            like.delete()
             return Response({'message': 'Unliked successfully', 'liked': False}, status=status.HTTP_200_OK)
 
 
@@ -225,13 +222,14 @@ class AddCommentView(APIView):
         except (ContentType.DoesNotExist, Exception):
             return Response({'error': 'Content object not found'}, status=status.HTTP_404_NOT_FOUND)
         
-        # Create comment
-        comment = Comment.objects.create(
-            user=request.user,
-            content_type=content_type,
-            object_id=object_id,
-            text=text
-        )
+        # Create comment; the target's comment_count is bumped in the same transaction
+        with transaction.atomic():
+            comment = Comment.objects.create(
+                user=request.user,
+                content_type=content_type,
+                object_id=object_id,
+                text=text
+            )
         
         # Create activity for the content owner
         target_user = None